@@ -1,6 +1,11 @@
 # Código del juego de estrategia que acompaña al Trabajo de Fin de Grado
 # A.A. Daniel García Cañada (2025)
 #
+# Este fichero contiene la interfaz gráfica del juego. Las reglas (medios,
+# casillas, jugadores, fases y pasos) están en el motor (motor.py), que no
+# depende de PyGame; aquí simplemente se muestra su estado y se le transmiten
+# las acciones del jugador.
+#
 # Indice del código:
 #   - Constantes:
 #       En esta sección se definen muchos parámetros generales que
@@ -9,8 +14,8 @@
 #       Crear y configurar la ventana, cargar recursos necesarios
 #        (fuentes, imágenes, etc) y demás operaciones con PyGame.
 #   - Clases del juego:
-#       En esta sección se definen todas las clases empleadas por el
-#       propio juego (sus elementos y partes).
+#       En esta sección se definen las clases que representan gráficamente
+#       los elementos del juego (mapa, tienda, información, etc).
 #   - Clases de la interfaz:
 #       Clases auxiliares para facilitar la construcción de la
 #       interfaz gráfica haciendo uso de PyGame.
@@ -27,11 +32,25 @@
 #       Esqueleto del proceso en cada fotograma: escanear eventos,
 #       actualizar estado, y dibujar en pantalla.
 
-import amplpy  # Progración lineal
-import math    # Operaciones y funciones matemáticas
-import os      # Manipulaciones del sistema
-import pygame  # Motor del juego
-import random  # Para generacion de números aleatorios
+import collections # Diccionarios ordenados para las cachés LRU
+import contextlib  # Medir etapas del fotograma con bloques "with"
+import csv         # Exportar las muestras del perfilador
+import functools   # Memorización de funciones
+import hashlib     # Resúmenes de ficheros para la caché de recursos
+import io          # Cargar los recursos desde el contenido ya leído de sus ficheros
+import itertools   # Recorrer parte de un iterable
+import math        # Operaciones y funciones matemáticas
+import numpy as np # Estadísticas de los tiempos de fotograma
+import os          # Manipulaciones del sistema
+import pygame      # Motor del juego
+import threading   # Lectura de los ficheros de los recursos en segundo plano
+import time        # Medición del tiempo de arranque
+
+from motor import (  # Reglas del juego, independientes de la interfaz
+    MAPA_DIM_X, MAPA_DIM_Y, Partida, Vista, g_modelos, g_decisiones,
+    MedioAtaque, MedioAereo, MedioAntiaereo, AvionCaza, AvionAtaque, AvionTransporte, Helicoptero, Dron,
+    Radar, Bateria, Inteligencia, Infraestructura, Ciudad, Base, Capital
+)
 
 # Lo siguiente es para evitar que se muestre publicidad de PyGame en la consola al iniciar
 os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
@@ -43,7 +62,6 @@ os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
 
 # Constantes generales del juego
 NOMBRE_JUEGO    = "AIR GAME"
-CREDITO_INICIAL = 500
 MULTIJUGADOR    = True
 
 # Características generales de la interfaz
@@ -52,17 +70,34 @@ ALTURA                          = 720       # Altura de la ventana en pixeles
 PANTALLA_COMPLETA               = False     # Para abrir el juego en ventana completa
 PANTALLA_MODIFICARDIMENSION     = False     # Para poder modificar la dimensión de la ventana
 FPS                             = 60        # Fotogramas por segundo
+ESPERA_INACTIVO                 = 250       # Milisegundos máximos sin actualizar cuando no pasa nada (ver leer_eventos)
 COLOR_FONDO                     = "#cccccc" # Color RGB del fondo de pantalla
 
 # Configuraciones
 MUSICA_REPRODUCIR  = True  # Activar o desactivar la música por defecto
 MUSICA_VOLUMEN     = 0.5   # Volumen relativo de la musica (0.0 - 1.0)
 SALTAR_PREPARACION = False # Saltar la primera fase, útil para testear
+GUARDAR_REPETICION = False # Guardar la grabación de la partida al salir, útil para reproducir errores
+FICHERO_REPETICION = "repeticion.json" # Fichero donde se guarda la grabación
+INFORME_ARRANQUE   = False # Mostrar por consola cuánto tarda cada etapa del arranque
+INFORME_AMPL       = False # Mostrar por consola al salir cuánto han tardado en cargar y resolver los modelos de la IA
+GUARDAR_DECISIONES = False # Recordar entre sesiones las decisiones de la IA ya calculadas (ver FICHERO_DECISIONES)
+
+# Perfilador de fotogramas (ver Perfilador)
+PERFIL_VISIBLE     = False         # Mostrar desde el inicio los tiempos de cada etapa del fotograma
+PERFIL_MUESTRAS    = 600           # Fotogramas que se guardan para las estadísticas (los más recientes)
+PERFIL_REFRESCO    = 30            # Cada cuántos fotogramas se actualizan las estadísticas en pantalla
+GUARDAR_PERFIL     = False         # Guardar las muestras del perfilador al salir
+FICHERO_PERFIL     = "perfil.csv"  # Fichero donde se guardan las muestras
+TECLA_PERFIL       = pygame.K_F3   # Tecla para mostrar u ocultar el perfilador
+TECLA_PERFIL_CSV   = pygame.K_F4   # Tecla para guardar las muestras del perfilador
 
 # Carpetas de ficheros del juego
 CARPETA_AUDIO      = "audio" # Localización de los sonidos y música
 CARPETA_IMAGENES   = "img"   # Localización de las imágenes, sprites, etc
 CARPETA_DOCUMENTOS = "docs"  # Localización de la documentación del juego
+CARPETA_CACHE      = "cache" # Localización de los recursos ya procesados (se puede borrar)
+FICHERO_DECISIONES = os.path.join(CARPETA_CACHE, "decisiones.json") # Caché de decisiones de la IA entre sesiones
 
 # Propiedades del texto
 COLOR_TEXTO        = (0, 0, 0)        # Color RGB por defecto del texto
@@ -70,6 +105,7 @@ TEXTO_FUENTE       = "Century Gothic" # Fuente de los textos
 TEXTO_FUENTE_MONO  = "Mono"           # Fuente para textos monoespaciados
 TEXTO_TAMANO       = 24               # Tamaño de fuente por defecto
 TEXTO_TAMANOS = [14, 16, 20, 24, 36, 72, 180] # Tamaños de fuente que se usaran
+TEXTO_CACHE_BYTES  = 16 * 1024 * 1024 # Memoria máxima para las líneas de texto ya renderizadas (ver CacheTextos)
 
 # Propiedades generales de todos los paneles, por defecto
 PANEL_BORDE_COLOR  = "#006600" # Color del borde de los paneles
@@ -131,15 +167,7 @@ TEXTURA_INFO_COLOR      = '#66669920'
 TEXTURA_REGLAS_COLOR    = '#80808020'
 TEXTURA_BOTON_COLOR     = '#0675ac20'
 
-AMPL_COMPRA     = 'compra'      # Ficheros que contienen el modelo lineal para decidir qué comprar en cada turno
-AMPL_ATAQUE     = 'ataque'      # Ídem para planificar un ataque
-AMPL_POSICION   = 'posicion'    # Ídem para determinar la posición de un medio
-AMPL_MOVIMIENTO = 'movimiento'  # Ídem para determinar el despliegue de un medio
-
 # Escenario
-MAPA_DIM_X = 25 # Anchura del mapa en casillas
-MAPA_DIM_Y = 15 # Altura del mapa en casillas
-MAPA_DIM_J = 11 # Número de columnas en propiedad inicial de cada jugador
 MAPA_COLOR_NEUTRO  = "#f2f2f2" # Color de casilla sin superioridad aerea
 MAPA_COLOR_J1      = "#bdd7ee" # Color de casilla con superioridad aerea de J1
 MAPA_COLOR_J2      = "#f8cbad" # Color de casilla con superioridad aerea de J2
@@ -149,11 +177,6 @@ MAPA_COLOR_BORDE   = "#9900cc" # Color del borde de la casilla actualmente selec
 MAPA_COLOR_BORDE2  = "#ffee00" # Color del borde de la casilla actualmente seleccionada cuando estamos situando
 MAPA_COLOR_BORDE3  = "#000000" # Color del borde de la casilla actualmente seleccionada cuando está en rango
 
-# Sistema de puntos y superioridad aerea
-COEF_SUP        = 20  # Coeficiente de sup aerea en una casilla normal
-SUP_INICIAL     = 0.1 # Proporción de casillas iniciales con supremacia (aleatorias)
-MULT_SUPREMACIA = 2   # Ratio entre superioridad y supremacia aerea
-
 # Recuadros de ayuda e informacion
 AYUDA_COLOR = (255, 255, 192) # Color del fondo
 AYUDA_TAMANO = 16             # Tamaño de la letra
@@ -162,38 +185,351 @@ AYUDA_TAMANO = 16             # Tamaño de la letra
 #                          INICIALIZACION INTERFAZ
 # < -------------------------------------------------------------------------- >
 
+g_ficheros = {} # Contenido de los ficheros de los recursos ya leídos en segundo plano, por ruta (ver precargar_recursos)
+
+def leer_fichero(ruta):
+    """Contenido de un fichero, como objeto de fichero en memoria. Si ya se ha leído en segundo plano, no se vuelve a leer."""
+    contenido = g_ficheros.get(ruta)
+    if contenido is None:
+        with open(ruta, 'rb') as f:
+            contenido = f.read()
+    return io.BytesIO(contenido)
+
+def ruta_imagen(nombre):
+    """Fichero de una imagen"""
+    return os.path.join(CARPETA_IMAGENES, nombre)
+
+def ruta_textura(nombre, color, fondo = '#000000'):
+    """
+    Fichero de la textura ya procesada en la caché, identificado por el contenido del fichero
+    original, el tinte y el fondo (ver cargar_textura)
+    """
+    resumen = hashlib.sha1(leer_fichero(ruta_imagen(nombre)).getbuffer())
+    resumen.update(f'{color}{fondo}'.encode())
+    return os.path.join(CARPETA_CACHE, f'{os.path.splitext(nombre)[0]}_{resumen.hexdigest()[:16]}.png')
+
+def ficheros_textura(nombre, color, fondo = '#000000'):
+    """Ficheros que lee cargar_textura: la imagen original y la textura ya procesada, si está en la caché"""
+    yield ruta_imagen(nombre)
+    yield ruta_textura(nombre, color, fondo)
+
 def cargar_imagen(nombre, trans=True):
     """Cargar un fichero de imagen en PyGame"""
-    img = pygame.image.load(os.path.join(CARPETA_IMAGENES, nombre))
+    ruta = ruta_imagen(nombre)
+    img = pygame.image.load(leer_fichero(ruta), ruta)
     return img.convert_alpha() if trans else img.convert()
 
 def cargar_textura(nombre, color, fondo = '#000000'):
     """
     Cargar una imagen para usar como textura monocromo. Las texturas suelen ser en blanco
     y negro: el blanco se tinta de un color, y el negro se hace transparente.
+    El resultado se guarda en la caché, identificado por el contenido del fichero
+    original, el tinte y el fondo, de manera que en los siguientes arranques se
+    carga directamente sin procesar.
     """
+    cache = ruta_textura(nombre, color, fondo)
+    if os.path.exists(cache):
+        try:
+            return pygame.image.load(leer_fichero(cache), cache).convert_alpha()
+        except pygame.error:
+            pass # Caché corrupta: la regeneramos
+
     imagen = cargar_imagen(nombre)
 
     # Tintar blanco
     imagen.fill(color, special_flags = pygame.BLEND_RGBA_MULT)
 
-    # Transparentar negro
+    # Transparentar negro, sobre todos los píxeles a la vez
     fondo = pygame.Color(fondo)
-    r1, g1, b1 = fondo.r, fondo.g, fondo.b
-    w, h = imagen.get_size()
-    imagen.lock()
-    for y in range(h):
-        for x in range(w):
-            r2, g2, b2, _ = imagen.get_at((x, y))
-            if (r2, g2, b2) == (r1, g1, b1):
-                imagen.set_at((x, y), (r2, g2, b2, 0))
-    imagen.unlock()
+    rgb = pygame.surfarray.pixels3d(imagen)
+    alfa = pygame.surfarray.pixels_alpha(imagen)
+    alfa[(rgb == (fondo.r, fondo.g, fondo.b)).all(axis=2)] = 0
+    del rgb, alfa # Liberar el bloqueo de la superficie
+
+    try:
+        os.makedirs(CARPETA_CACHE, exist_ok=True)
+        pygame.image.save(imagen, cache)
+    except (OSError, pygame.error):
+        pass # Sin caché simplemente procesaremos la textura en cada arranque
 
     return imagen
 
+def ruta_sonido(nombre):
+    """Fichero de un sonido"""
+    return os.path.join(CARPETA_AUDIO, nombre)
+
 def cargar_sonido(nombre):
     """Cargar un fichero de audio en PyGame"""
-    return pygame.mixer.Sound(os.path.join(CARPETA_AUDIO, nombre))
+    return pygame.mixer.Sound(leer_fichero(ruta_sonido(nombre)))
+
+@functools.lru_cache(maxsize = None)
+def buscar_fuente(nombre):
+    """Fichero de una fuente del sistema. La búsqueda es lenta, así que se hace una sola vez por fuente."""
+    return pygame.font.match_font(nombre)
+
+def cargar_fuente(nombre, tamaño):
+    """Cargar una fuente del sistema con el tamaño dado (si no existe, se usa la de PyGame)"""
+    ruta = buscar_fuente(nombre)
+    return pygame.font.Font(leer_fichero(ruta) if ruta else None, tamaño)
+
+@functools.lru_cache(maxsize = None)
+def fuente_estilo(tamaño, negrita = False, cursiva = False, subrayado = False, mono = False):
+    """
+    Fuente con el tamaño y estilo dados. Cada estilo tiene su propio objeto de fuente, así
+    no hay que cambiar (y restaurar) el estilo de una fuente compartida cada vez que se usa.
+    """
+    if not (negrita or cursiva or subrayado):
+        return g_fuentes_mono[tamaño] if mono else g_fuentes[tamaño]
+    fuente = cargar_fuente(TEXTO_FUENTE_MONO if mono else TEXTO_FUENTE, tamaño)
+    fuente.bold      = negrita
+    fuente.italic    = cursiva
+    fuente.underline = subrayado
+    return fuente
+
+def cronometrar(etapa, inicio = None):
+    """Informar por consola (si INFORME_ARRANQUE) de cuándo termina una etapa del arranque y cuánto ha durado"""
+    if INFORME_ARRANQUE:
+        ahora = time.perf_counter()
+        duracion = f' ({1000 * (ahora - inicio):.1f} ms)' if inicio is not None else ''
+        print(f'[Arranque] {1000 * (ahora - g_arranque):8.1f} ms  {etapa}{duracion}')
+
+class Recursos(dict):
+    """
+        Diccionario de recursos (sonidos, fuentes, texturas...) que no se cargan hasta que se
+        usan por primera vez, o hasta que se precargan (ver precargar_recursos). Cada clave
+        tiene los argumentos con los que se llama a la función de carga. Los objetos de PyGame
+        sólo se crean en el hilo principal; en segundo plano sólo se leen sus ficheros.
+    """
+
+    def __init__(self, cargador, argumentos, ficheros):
+        super().__init__()
+        self.cargador   = cargador         # Función que carga un recurso
+        self.argumentos = argumentos       # Argumentos de la función de carga para cada clave
+        self.ficheros   = ficheros         # Función que da las rutas de los ficheros que lee la de carga, con sus mismos argumentos
+        self.leidos     = set()            # Claves cuyos ficheros ya se han leído en segundo plano (ver leer)
+        self.cerrojo    = threading.Lock() # Protege leidos, que se llena desde el hilo de lectura
+
+    def __missing__(self, clave):
+        inicio = time.perf_counter()
+        self[clave] = self.cargador(*self.argumentos_de(clave))
+        cronometrar(f'{self.cargador.__name__}{self.argumentos_de(clave)}', inicio)
+        return dict.__getitem__(self, clave)
+
+    def argumentos_de(self, clave):
+        """Argumentos de la función de carga para una clave, siempre como tupla"""
+        argumentos = self.argumentos[clave]
+        return argumentos if isinstance(argumentos, tuple) else (argumentos,)
+
+    def leer(self):
+        """Leer los ficheros de todos los recursos que falten, sin crearlos. Se puede llamar desde otro hilo."""
+        for clave in self.argumentos:
+            if dict.__contains__(self, clave):
+                continue
+            try:
+                for ruta in self.ficheros(*self.argumentos_de(clave)):
+                    if ruta and ruta not in g_ficheros and os.path.exists(ruta):
+                        with open(ruta, 'rb') as f:
+                            g_ficheros[ruta] = f.read()
+            except Exception:
+                pass # Ya fallará (con su error) cuando se use el recurso
+            with self.cerrojo:
+                self.leidos.add(clave)
+
+    def precargar(self):
+        """Cargar uno de los recursos que falten cuyos ficheros ya se hayan leído. Devuelve si lo ha habido."""
+        if len(self) == len(self.argumentos):
+            return False
+        with self.cerrojo:
+            leidos = list(self.leidos) # Copia, el hilo de lectura puede seguir añadiendo claves
+        clave = next((clave for clave in leidos if not dict.__contains__(self, clave)), None)
+        if clave is None:
+            return False
+        try:
+            self[clave]
+        except Exception:
+            with self.cerrojo:
+                self.leidos.discard(clave) # Ya fallará (con su error) cuando se use el recurso
+        return True
+
+class CacheTextos:
+    """
+        Caché LRU de líneas de texto ya renderizadas, compartida por toda la interfaz. Muchas
+        cadenas se repiten (nombres de medios, indicadores de las casillas, botones...), así
+        que se renderizan una sola vez. Las superficies se comparten, no deben modificarse.
+        Cuando se supera la memoria máxima se descartan las líneas usadas hace más tiempo.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes                  # Memoria máxima ocupada por las superficies
+        self.bytes     = 0                          # Memoria ocupada actualmente
+        self.lineas    = collections.OrderedDict()  # Superficies por clave, de la menos a la más reciente
+        self.aciertos  = 0                          # Líneas encontradas ya renderizadas
+        self.fallos    = 0                          # Líneas que ha habido que renderizar
+
+    def renderizar(self, cadena, tamaño, color, negrita = False, cursiva = False, subrayado = False, mono = False):
+        """Superficie con la línea de texto, renderizándola sólo si no está ya en la caché"""
+        estilo = (bool(negrita), bool(cursiva), bool(subrayado), bool(mono))
+        clave = (cadena, tamaño, tuple(pygame.Color(color)), estilo)
+        imagen = self.lineas.get(clave)
+        if imagen is not None:
+            self.lineas.move_to_end(clave)
+            self.aciertos += 1
+            return imagen
+        self.fallos += 1
+        imagen = fuente_estilo(tamaño, *estilo).render(cadena, True, color)
+        self.lineas[clave] = imagen
+        self.bytes += imagen.get_pitch() * imagen.get_height()
+        while self.bytes > self.max_bytes and len(self.lineas) > 1:
+            _, descartada = self.lineas.popitem(last = False)
+            self.bytes -= descartada.get_pitch() * descartada.get_height()
+        return imagen
+
+class Perfilador:
+    """
+        Mide cuánto tarda cada etapa del bucle principal (ver ETAPAS) en cada fotograma, y guarda
+        los tiempos de los últimos fotogramas en un buffer circular. De ellos se sacan la mediana,
+        el percentil 95 y el máximo de cada etapa, que se pueden mostrar en pantalla, y se pueden
+        exportar a CSV para ver qué parte provoca los tirones. El tiempo de una etapa no incluye
+        el de las etapas anidadas dentro de ella (p. ej. el renderizado dentro del escenario).
+    """
+
+    ETAPAS = [
+        'eventos',     # Leer los eventos de PyGame
+        'espera',      # Esperar eventos con la partida inactiva (ver leer_eventos)
+        'variables',   # Estado de cada fotograma (ver actualizar_variables) y creación de recursos precargados
+        'motor',       # Lógica automática de la partida
+        'ia',          # Lógica automática de la partida en el turno de un jugador IA
+        'escenario',   # Lógica del escenario
+        'renderizado', # Renderizar el escenario y sus casillas
+        'tienda',      # Lógica de la tienda
+        'informacion', # Lógica del panel informativo
+        'dibujo',      # Dibujar en pantalla las zonas que han cambiado
+        'pantalla',    # Llevar el fotograma a la pantalla
+        'reloj',       # Esperar para limitar los fotogramas por segundo
+    ]
+    COLOR_FONDO = (0, 0, 0, 160)
+    COLOR_TEXTO = "#ffffff"
+    TAMANO_TEXTO = 14
+
+    def __init__(self, muestras, visible = False):
+        columnas = len(self.ETAPAS) + 1                  # Una por etapa, y el total del fotograma
+        self.indices    = {etapa: i for i, etapa in enumerate(self.ETAPAS)}
+        self.muestras   = np.zeros((muestras, columnas)) # Milisegundos de cada etapa en los últimos fotogramas (buffer circular)
+        self.numeros    = np.zeros(muestras, dtype = int) # Número de fotograma de cada muestra
+        self.actual     = np.zeros(columnas)             # Segundos de cada etapa en el fotograma en curso
+        self.fotograma  = 0                              # Fotogramas medidos en total
+        self.inicio     = None                           # Instante de comienzo del fotograma en curso
+        self.anidadas   = []                             # Tiempo de las etapas anidadas en cada etapa abierta
+        self.visible    = visible                        # Si se muestran las estadísticas en pantalla
+        self.imagen     = None                           # Recuadro con las estadísticas ya renderizado
+        self.dibujado   = None                           # Zona de la pantalla en la que se dibujó el recuadro
+
+    def comenzar(self):
+        """Comenzar a medir un fotograma"""
+        self.inicio = time.perf_counter()
+        self.actual[:] = 0
+
+    def terminar(self):
+        """Terminar de medir el fotograma en curso y guardar sus tiempos"""
+        self.actual[-1] = time.perf_counter() - self.inicio
+        fila = self.fotograma % len(self.muestras)
+        self.muestras[fila] = 1000 * self.actual
+        self.numeros[fila] = self.fotograma
+        self.fotograma += 1
+
+    @contextlib.contextmanager
+    def etapa(self, nombre):
+        """Medir el tiempo de una etapa del fotograma (se acumula si se mide varias veces)"""
+        inicio = time.perf_counter()
+        self.anidadas.append(0)
+        try:
+            yield
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.actual[self.indices[nombre]] += duracion - self.anidadas.pop()
+            if self.anidadas:
+                self.anidadas[-1] += duracion
+
+    def historial(self):
+        """Números de fotograma y tiempos guardados, del más antiguo al más reciente"""
+        n = min(self.fotograma, len(self.muestras))
+        orden = (np.arange(n) + self.fotograma - n) % len(self.muestras)
+        return self.numeros[orden], self.muestras[orden]
+
+    def estadisticas(self):
+        """Mediana, percentil 95 y máximo (en milisegundos) de cada etapa y del total, sobre los fotogramas guardados"""
+        _, muestras = self.historial()
+        if not len(muestras):
+            return np.zeros((3, self.muestras.shape[1]))
+        p50, p95 = np.percentile(muestras, [50, 95], axis = 0)
+        return np.array([p50, p95, muestras.max(axis = 0)])
+
+    def guardar(self, fichero):
+        """Exportar a CSV los tiempos (en milisegundos) de cada etapa en los fotogramas guardados"""
+        numeros, muestras = self.historial()
+        with open(fichero, 'w', newline = '', encoding = 'utf-8') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(['fotograma'] + self.ETAPAS + ['total'])
+            for numero, fila in zip(numeros, muestras):
+                escritor.writerow([numero] + [f'{t:.3f}' for t in fila])
+
+    def alternar(self):
+        """Mostrar u ocultar las estadísticas en pantalla"""
+        self.visible = not self.visible
+        self.imagen = None
+
+    def renderizar(self):
+        """Renderizar el recuadro con las estadísticas de cada etapa"""
+        salto = fuente_estilo(self.TAMANO_TEXTO, mono = True).get_linesize()
+        filas = [['etapa', 'p50', 'p95', 'max']]
+        for etapa, tiempos in zip(self.ETAPAS + ['total'], self.estadisticas().T):
+            filas.append([etapa] + [f'{t:.2f}' for t in tiempos])
+        celdas = [[g_textos.renderizar(celda, self.TAMANO_TEXTO, self.COLOR_TEXTO, mono = True) for celda in fila] for fila in filas]
+
+        # La primera columna se alinea a la izquierda y las de tiempos a la derecha
+        anchuras = [max(fila[j].get_width() for fila in celdas) + 8 for j in range(len(filas[0]))]
+        imagen = pygame.Surface((sum(anchuras) + 8, len(filas) * salto + 8), pygame.SRCALPHA)
+        imagen.fill(self.COLOR_FONDO)
+        for i, fila in enumerate(celdas):
+            x = 4
+            for j, celda in enumerate(fila):
+                imagen.blit(celda, (x + (anchuras[j] - celda.get_width() if j else 0), 4 + i * salto))
+                x += anchuras[j]
+        return imagen
+
+    def actualizar(self, pos):
+        """Colocar las estadísticas (si son visibles), actualizándolas cada PERFIL_REFRESCO fotogramas, y marcar la zona si cambian"""
+        if self.visible and (self.imagen is None or self.fotograma % PERFIL_REFRESCO == 0):
+            self.imagen = self.renderizar()
+        dibujado = self.imagen.get_rect(topleft = pos) if self.visible else None
+        if dibujado != self.dibujado or self.fotograma % PERFIL_REFRESCO == 0:
+            for zona in (self.dibujado, dibujado):
+                if zona:
+                    redibujar(zona)
+            self.dibujado = dibujado
+
+    def dibujar(self):
+        """Dibujar las estadísticas en pantalla, donde se colocaron (ver actualizar)"""
+        if self.dibujado:
+            g_pantalla.blit(self.imagen, self.dibujado)
+
+def precargar_recursos():
+    """
+        Leer en segundo plano, mientras se muestra el pantallazo, los ficheros de todos los recursos
+        que no se hayan usado aún, y buscar las fuentes del sistema. PyGame no permite crear los
+        recursos fuera del hilo principal: los crea él, uno por fotograma (ver cargar_precargados),
+        o al usarlos por primera vez si se piden antes.
+    """
+    def leer():
+        inicio = time.perf_counter()
+        for recursos in g_recursos:
+            recursos.leer()
+        cronometrar('Lectura de recursos', inicio)
+    threading.Thread(target = leer, daemon = True).start()
+
+def cargar_precargados():
+    """Crear uno de los recursos cuyos ficheros ya se han leído en segundo plano. Devuelve si lo ha habido."""
+    return any(recursos.precargar() for recursos in g_recursos)
 
 def reproducir_sonido(nombre, canal = None):
     """Reproducir uno de los sonidos cargados por el canal especificado"""
@@ -205,49 +541,56 @@ def reproducir_sonido(nombre, canal = None):
 flags = 0
 if (PANTALLA_COMPLETA): flags |= pygame.FULLSCREEN
 if (PANTALLA_MODIFICARDIMENSION): flags |= pygame.RESIZABLE
+g_arranque = time.perf_counter() # Instante de arranque (ver cronometrar)
 pygame.init()
 pygame.display.set_caption(NOMBRE_JUEGO)
 g_pantalla = pygame.display.set_mode((ANCHURA, ALTURA), flags)
 g_reloj = pygame.time.Clock()
+g_zonas = [] # Zonas de la pantalla que han cambiado en este fotograma (ver redibujar)
 
-# Cargar recursos
+# Cargar recursos. Sólo el pantallazo y la música se cargan ahora, el resto se cargan
+# cuando se usan por primera vez o en segundo plano (ver precargar_recursos)
 pygame.mixer.init()
 pygame.mixer.music.load(os.path.join(CARPETA_AUDIO, MUSICA_FONDO))
 g_pantallazo = cargar_imagen(IMAGEN_FONDO)
-g_fuentes = { tam: pygame.font.SysFont(TEXTO_FUENTE, tam) for tam in TEXTO_TAMANOS }
-g_fuentes_mono = { tam: pygame.font.SysFont(TEXTO_FUENTE_MONO, tam) for tam in TEXTO_TAMANOS }
-g_iconos = {
-    'AvionCaza':       cargar_imagen(ICONO_AVIONCAZA),
-    'AvionAtaque':     cargar_imagen(ICONO_AVIONATAQUE),
-    'AvionTransporte': cargar_imagen(ICONO_AVIONTRANSPORTE),
-    'Helicoptero':     cargar_imagen(ICONO_HELICOPTERO),
-    'Dron':            cargar_imagen(ICONO_DRON),
-    'Radar':           cargar_imagen(ICONO_RADAR),
-    'Bateria':         cargar_imagen(ICONO_BATERIA),
-    'Inteligencia':    cargar_imagen(ICONO_INTELIGENCIA),
-    'Ciudad':          cargar_imagen(ICONO_CIUDAD),
-    'Base':            cargar_imagen(ICONO_BASE)
-}
-g_sonidos = {
-    'pagar':         cargar_sonido(SONIDO_PAGAR),
-    'cobrar':        cargar_sonido(SONIDO_COBRAR),
-    'error':         cargar_sonido(SONIDO_ERROR),
-    'boton_sel':     cargar_sonido(SONIDO_BOTON_SEL),
-    'boton_pul':     cargar_sonido(SONIDO_BOTON_PUL),
-    'casilla_sel':   cargar_sonido(SONIDO_CASILLA_SEL),
-    'casilla_pul':   cargar_sonido(SONIDO_CASILLA_PUL),
-    'pagina':        cargar_sonido(SONIDO_PAGINA),
-    'puerta_abre':   cargar_sonido(SONIDO_PUERTA_ABRE),
-    'puerta_cierra': cargar_sonido(SONIDO_PUERTA_CIERRA),
-    'construir':     cargar_sonido(SONIDO_CONSTRUIR)
-}
-g_texturas = {
-    'hierba':    cargar_textura(TEXTURA_ESCENARIO, TEXTURA_ESCENARIO_COLOR),
-    'ladrillos': cargar_textura(TEXTURA_TIENDA,    TEXTURA_TIENDA_COLOR),
-    'piedras':   cargar_textura(TEXTURA_INFO,      TEXTURA_INFO_COLOR),
-    'malla':     cargar_textura(TEXTURA_REGLAS,    TEXTURA_REGLAS_COLOR),
-    'gotele':    cargar_textura(TEXTURA_BOTON,     TEXTURA_BOTON_COLOR),
-}
+g_fuentes = Recursos(cargar_fuente, { tam: (TEXTO_FUENTE, tam) for tam in TEXTO_TAMANOS }, lambda nombre, tam: [buscar_fuente(nombre)])
+g_fuentes_mono = Recursos(cargar_fuente, { tam: (TEXTO_FUENTE_MONO, tam) for tam in TEXTO_TAMANOS }, lambda nombre, tam: [buscar_fuente(nombre)])
+g_iconos = Recursos(cargar_imagen, {
+    'AvionCaza':       ICONO_AVIONCAZA,
+    'AvionAtaque':     ICONO_AVIONATAQUE,
+    'AvionTransporte': ICONO_AVIONTRANSPORTE,
+    'Helicoptero':     ICONO_HELICOPTERO,
+    'Dron':            ICONO_DRON,
+    'Radar':           ICONO_RADAR,
+    'Bateria':         ICONO_BATERIA,
+    'Inteligencia':    ICONO_INTELIGENCIA,
+    'Ciudad':          ICONO_CIUDAD,
+    'Base':            ICONO_BASE
+}, lambda nombre: [ruta_imagen(nombre)])
+g_sonidos = Recursos(cargar_sonido, {
+    'pagar':         SONIDO_PAGAR,
+    'cobrar':        SONIDO_COBRAR,
+    'error':         SONIDO_ERROR,
+    'boton_sel':     SONIDO_BOTON_SEL,
+    'boton_pul':     SONIDO_BOTON_PUL,
+    'casilla_sel':   SONIDO_CASILLA_SEL,
+    'casilla_pul':   SONIDO_CASILLA_PUL,
+    'pagina':        SONIDO_PAGINA,
+    'puerta_abre':   SONIDO_PUERTA_ABRE,
+    'puerta_cierra': SONIDO_PUERTA_CIERRA,
+    'construir':     SONIDO_CONSTRUIR
+}, lambda nombre: [ruta_sonido(nombre)])
+g_texturas = Recursos(cargar_textura, {
+    'hierba':    (TEXTURA_ESCENARIO, TEXTURA_ESCENARIO_COLOR),
+    'ladrillos': (TEXTURA_TIENDA,    TEXTURA_TIENDA_COLOR),
+    'piedras':   (TEXTURA_INFO,      TEXTURA_INFO_COLOR),
+    'malla':     (TEXTURA_REGLAS,    TEXTURA_REGLAS_COLOR),
+    'gotele':    (TEXTURA_BOTON,     TEXTURA_BOTON_COLOR),
+}, ficheros_textura)
+g_recursos = (g_texturas, g_fuentes, g_fuentes_mono, g_iconos, g_sonidos) # Todos los recursos que se precargan
+g_textos = CacheTextos(TEXTO_CACHE_BYTES)
+g_perfil = Perfilador(PERFIL_MUESTRAS, PERFIL_VISIBLE)
+cronometrar('PyGame y pantallazo')
 
 # Canales de sonido. Un canal sólo puede reproducir un sonido al mismo tiempo,
 # de manera que ordenando los sonidos por canales evitamos que se solapen
@@ -261,501 +604,45 @@ g_canales = {
 #                              CLASES DEL JUEGO
 # < -------------------------------------------------------------------------- >
 
-class Medio:
-    """Clase genérica que representa cualquier medio militar"""
-    NOMBRE        = None # Nombre del medio
-    ICONO         = None # Icono del botón en la tienda
-    DESC          = None # Breve descripción informativa
-    PRECIO        = None # Precio de compra (M€)
-    PRECIO_MEJORA = None # Precio de mejora - sólo para infraestructuras (M€)
-    VELOCIDAD     = None # Velocidad de avance de un medio aéreo (casillas por turno)
-    AUTONOMIA     = None # Tiempo que puede permanecer fuera de la base un medio aéreo (turnos)
-    ALCANCE       = None # Distancia de la base que puede recorrer un medio aéreo (turnos)
-    HUELLA        = None # Probabilidad de ser captado por una vigilancia (%)
-    DIST_AIRE     = None # Distancia a la que puede derribar un medio aéreo (casillas)
-    DIST_SUP      = None # Distancia a la que puede derribar un medio anti-aéreo (casillas)
-    VIGILANCIA    = None # Probabilidad de captar un medio aéreo con radar (%)
-    RADIOVIG      = None # Distancia a la que puede vigilar otros medios aéreos (casillas)
-    SUPAEREA      = None # Peso del medio a la hora de aportar superioridad aérea (puntos)
-
-    def __init__(self, jugador, casilla = None):
-        self.jugador = jugador
-        self.casilla = casilla
-        self.texto   = Texto(self.NOMBRE, (0, 0), 16, alineado_h = 'd', surface = g_escenario.panel.lienzo)
+class VistaPygame(Vista):
+    """Conecta el motor con la interfaz: muestra sus mensajes, reproduce sus sonidos y re-renderiza ante cambios"""
 
-    @classmethod
-    def info(cls):
+    actividad = False # Si el motor ha notificado algo desde la última vez que se miró (ver leer_eventos)
 
-        # Información breve en la ayuda del ratón
-        texto_ayuda = cls.NOMBRE
-        if cls.PRECIO:
-            texto_ayuda += f" ({cls.PRECIO}M)"
-        if cls.PRECIO_MEJORA:
-            casilla = g_escenario.casilla_pulsa
-            if casilla and casilla.infraestructura:
-                infra = casilla.infraestructura
-                if type(infra) is cls and infra.jugador == g_jugador:
-                    texto_ayuda = f"Mejorar {cls.NOMBRE} ({cls.PRECIO_MEJORA}M)"
-        g_ayuda.cambiar(texto_ayuda)
-
-        # Texto informativo extenso en el panel inferior
-        y0 = g_fuentes[Informacion.TAMANO_TITULO].get_linesize()
-        y1 = g_fuentes[Informacion.TAMANO_TEXTO].get_linesize()
-        g_info.borrar()
-        g_info.escribir("Descripción:", (10, y0), negrita = True)
-        g_info.escribir(cls.DESC, (120, y0))
-        nombres = ""
-        valores = ""
-        if cls.PRECIO:        nombres += "\nPrecio:";        valores += f"\n{cls.PRECIO}"
-        if cls.PRECIO_MEJORA: nombres += "\nPrecio mejora:"; valores += f"\n{cls.PRECIO_MEJORA}"
-        if cls.VELOCIDAD:     nombres += "\nVelocidad:";     valores += f"\n{cls.VELOCIDAD}"
-        if cls.AUTONOMIA:     nombres += "\nAutonomía:";     valores += f"\n{cls.AUTONOMIA}"
-        if cls.ALCANCE:       nombres += "\nAlcance:";       valores += f"\n{cls.ALCANCE}"
-        if cls.HUELLA:        nombres += "\nHuella:";        valores += f"\n{cls.HUELLA}"
-        if cls.DIST_AIRE:     nombres += "\nAire-aire:";     valores += f"\n{cls.DIST_AIRE}"
-        if cls.DIST_SUP:      nombres += "\nAire-sup:";      valores += f"\n{cls.DIST_SUP}"
-        if cls.VIGILANCIA:    nombres += "\nVigilancia:";    valores += f"\n{cls.VIGILANCIA}"
-        if cls.RADIOVIG:      nombres += "\nRadio-vigil.:";  valores += f"\n{cls.RADIOVIG}"
-        if cls.SUPAEREA:      nombres += "\nSup.-aerea:";    valores += f"\n{cls.SUPAEREA}"
-        g_info.escribir(nombres, ( 10, y0 + 1 * y1), negrita = True)
-        g_info.escribir(valores, (120, y0 + 1 * y1))
-
-    def actualizar(self):
-        """
-            Prototipo de función que realiza la lógica interna de cada medio
-            Cada tipo de medio debería implementar la suya propia
-        """
-        pass
-
-class MedioAtaque(Medio):
-    """Representa cualquier medio con la capacidad de atacar, ya sea aéreo o anti-aéreo"""
-    ESCALA = 50.0 # Kilómetros por casilla, para convertir los datos
-
-    def __init__(self, jugador, casilla):
-        super().__init__(jugador, casilla)
-        self.ataque_aire = self.DIST_AIRE and self.DIST_AIRE > 0 # Tiene la capacidad de atacar a medios aéreos
-        self.ataque_sup  = self.DIST_SUP  and self.DIST_SUP  > 0 # Tiene la capacidad de atacar a medios en superficie
-        self.vigilancia  = self.RADIOVIG  and self.RADIOVIG  > 0 # Tiene la capacidad de vigilar su entorno
-
-    def radio_ataque(self):
-        """Calcular el radio de ataque en casillas"""
-        # El medio no tiene la capacidad de atacar
-        if not self.ataque_aire and not self.ataque_sup:
-            return -1
-
-        # El medio es de ataque aéreo (p. ej. Caza)
-        if self.ataque_aire:
-            return math.ceil(self.DIST_AIRE / self.ESCALA)
-
-        # El medio es de ataque superficie (p. ej. Helicóptero)
-        if self.ataque_sup:
-            return math.ceil(self.DIST_SUP / self.ESCALA)
-
-    def radio_vigilancia(self):
-        """Calcular el radio de vigilancia en casillas"""
-        if not self.vigilancia:
-            return -1
-        return math.ceil(self.RADIOVIG / self.ESCALA)
-
-    def vigilar(self):
-        """
-            Escanear las casillas dentro del radio de vigilancia para intentar
-            detectar medios aéreos enemigos no detectados aún.
-        """
-        if not self.vigilancia:
-            return
-        avos = [medio for medio in self.jugador.adversario().medios if isinstance(medio, MedioAereo) and medio.vigilado(self) and not medio.detectado(self)]
-        for avo in avos:
-            if random.random() <= (self.VIGILANCIA / 100.0) * (avo.HUELLA / 100.0):
-                avo.detectar(self)
-
-    def destruir(self, manual, verdugo):
-        """
-            Destruir el medio como consecuencia de un ataque.
-            El ataque manual es el efectuado por aeronaves. El automático es el efectuado por medios antiaéreos.
-        """
-
-        # Si se trata de un medio aéreo, ejercer puntos de superioridad
-        if isinstance(self, MedioAereo):
-            self.casilla.ejercer(self.sup)
-
-        # Reportar información (ahora o después) a ambos jugadores
-        mensaje = f"Derribado {self.NOMBRE} enemigo con {verdugo.NOMBRE} en casilla {self.casilla.id()}"
-        if manual:
-            g_info.medio(mensaje)
-        else:
-            verdugo.jugador.reportar(mensaje)
-        self.jugador.reportar(f"Tu {self.NOMBRE} fue derribado en la casilla {self.casilla.id()}")
-
-        # Eliminar medio del juego
-        self.jugador.medios.remove(self)
-        for medio in self.jugador.adversario().medios:
-            if isinstance(medio, MedioAereo) and medio.detectado(self):
-                medio.detectores.remove(self)
-
-    def puntuar(self):
-        """Devolver los puntos AIRGAME otorgados por este medio"""
-        return self.SUPAEREA
-
-class MedioEstrategico(Medio):
-    """Representa cualquier medio estratégico (inteligencia, infraestructuras)"""
-
-class MedioAereo(MedioAtaque):
-    """Representa cualquier medio aéreo"""
-
-    def __init__(self, jugador, casilla):
-        super().__init__(jugador, casilla)
-        self.base = self.casilla
-        x, y = g_escenario.panel.pos
-        self.botones = [
-            Boton((0,0), texto="D", anchura=20, origen=(x,y), info=lambda: g_ayuda.cambiar('Desplegar'), surface=g_escenario.panel.lienzo, accion=self.desplegar),
-            Boton((0,0), texto="R", anchura=20, origen=(x,y), info=lambda: g_ayuda.cambiar('Retornar'),  surface=g_escenario.panel.lienzo, accion=self.aterrizar),
-            Boton((0,0), texto="A", anchura=20, origen=(x,y), info=lambda: g_ayuda.cambiar('Atacar'),    surface=g_escenario.panel.lienzo, accion=self.atacar)
-        ]
-        self.detectores = [] # Lista de medios que han detectado a este medio
-        self.resetear()
-
-    def resetear(self):
-        """Inicializar los valores del medio"""
-        self.casilla    = self.base # La casilla en la que este medio está actualmente
-        self.desplegado = False     # Si este medio está actualmente desplegado
-        self.turnos     = 0         # Número de turnos desde que este medio fue desplegado
-        self.atacado    = False     # Si este medio ha atacado ya en este turno
-        self.sup        = 0         # Puntos de superioridad acumulados
-
-    def alcance(self):
-        """Calcular el alcance en casillas"""
-        return  math.ceil((self.ALCANCE / 200) - 2)
-
-    def autonomia(self, casilla = None):
-        """
-            Calcular la autonomía en turnos, que depende de la distancia a la base.
-            Si no se pasa una casilla, se toma la casilla actual.
-        """
-        distancia = self.base.distancia(casilla or self.casilla)
-        alcance = self.alcance()
-        if distancia > alcance:
-            return -1
-        return math.ceil(self.AUTONOMIA * (1 - distancia / alcance))
-
-    def desplegar(self, casilla = None):
-        """Desplegar el medio aéreo"""
-        # Realizar chequeos para asegurarnos de que el despliegue es posible
-        if g_paso != 'Despliegue':
-            emitir_error('Sólo se pueden desplegar medios aéreos en el paso de despliegue')
-            return
-        if self.desplegado:
-            emitir_error(f'Este {self.NOMBRE} ya está desplegado')
-            return
-        if len(self.base.infraestructura.avos_desplegados()) >= self.base.infraestructura.nivel:
-            emitir_error(f'Ya no puedes desplegar más medios desde esta base')
-            return
-
-        # Si no pasamos casilla, permitimos que el jugador escoja la casilla
-        if not casilla:
-            g_jugador.situar_on(self)
-            return
+    def mensaje(self, tipo, texto):
+        """Mostrar el mensaje en el panel informativo"""
+        self.actividad = True
+        if g_info:
+            g_info.añadir_mensaje(tipo, texto)
 
-        # Chequeamos que la casilla es correcta
-        radio = self.alcance()
-        if self.casilla.distancia(casilla) > radio:
-            emitir_error(f'Este medio tiene un alcance de {radio} casillas')
-            return
-
-        # Realizamos el despliegue
-        self.desplegado = True
-        self.casilla = casilla
-        g_jugador.situar_off()
-        g_info.medio(f"{self.NOMBRE} desplegado en casilla {casilla.id()} (límite {self.autonomia()} turnos)")
-
-    def aterrizar(self, auto = False):
-        """Retornar el medio aéreo a la base de origen"""
-        # Chequeos para asegurar que es posible aterrizar el medio
-        if g_paso != 'Despliegue' and not auto:
-            emitir_error('Sólo se pueden retornar medios aéreos en el paso de despliegue')
-            return
-        if not self.desplegado:
-            emitir_error(f'Este {self.NOMBRE} no está desplegado')
-            return
-        if self.turnos == 0 and not auto:
-            emitir_error('No puedes desplegar y aterrizar un medio en el mismo turno')
-            return
+    def sonido(self, nombre):
+        """Reproducir el sonido (los errores por el canal de la interfaz, el resto por el de efectos)"""
+        self.actividad = True
+        reproducir_sonido(nombre, 'interfaz' if nombre == 'error' else 'efectos')
 
-        # Aterrizar el avión (ejercer puntos de superioridad, resetear variables...)
-        self.desplegado = False
-        self.casilla.ejercer(self.sup)
-        g_info.medio(f"{self.NOMBRE} retornado{' automáticamente' if auto else ''}")
-        self.resetear()
-
-    def atacar(self, casilla = None):
-        """Usar el medio aéreo para atacar otra casilla"""
-        # Chequeos para asegurar que el ataque es posible
-        if not self.ataque_aire and not self.ataque_sup:
-            emitir_error('Este medio no tiene capacidad de ataque')
-            return
-        if g_paso != 'Despliegue':
-            emitir_error('Sólo se puede atacar con medios aéreos en el paso de despliegue')
-            return
-        if not self.desplegado:
-            emitir_error(f'Este {self.NOMBRE} no está desplegado')
-            return
-        if self.atacado:
-            emitir_error('Ya has atacado con este medio este turno')
-            return
-
-        # Si no pasamos casilla, permitimos que el jugador escoja la casilla
-        if not casilla:
-            g_jugador.atacar_on(self)
-            return
-
-        # Chequeamos que la casilla es correcta
-        radio = self.radio_ataque()
-        if self.casilla.distancia(casilla) > radio:
-            emitir_error(f'Este medio tiene un radio de ataque de {radio} casillas')
-            return
-
-        # Realizamos el ataque
-        g_jugador.atacar_off()
-        self.atacado = True
-        medios = casilla.medios(g_adversario)
-        if self.ataque_aire:
-            medios = [medio for medio in medios if isinstance(medio, MedioAereo) and medio.desplegado]
-        else:
-            medios = [medio for medio in medios if isinstance(medio, MedioAntiaereo)]
-        if len(medios) == 0:
-            g_info.medio(f"Ataque fallido con {self.NOMBRE} en casilla {casilla.id()}")
-            g_adversario.reportar(f"Ataque adversario fallido a la casilla {casilla.id()}")
+    def evento(self, nombre, objeto = None):
+        """Actualizar los elementos de la interfaz afectados por el cambio"""
+        self.actividad = True
+        if nombre in ('fase', 'paso', 'turno') and g_info:
+            g_info.actualizar_texto()
+        if g_tienda:
+            g_tienda.ensuciar() # Cualquier cambio en la partida puede cambiar lo que se puede comprar
+            if nombre in ('turno', 'credito'):
+                g_tienda.actualizar_textos()
+        if not g_escenario:
             return
-        for medio in medios:
-            medio.destruir(True, self)
-
-    def detectar(self, medio):
-        """Hemos sido detectados por el medio"""
-        self.detectores.append(medio)
-        medio.jugador.reportar(f"Detectado {self.NOMBRE} enemigo en la casilla {self.casilla.id()}")
-        if type(medio) is Bateria:
-            self.destruir(False, medio)
-
-    def detectado(self, medio):
-        """Determinar si hemos sido detectados por el medio"""
-        return medio in self.detectores
-
-    def vigilado(self, medio):
-        """Determinar si estamos dentro del radio de vigilancia del medio"""
-        return self.casilla.distancia(medio.casilla) <= medio.radio_vigilancia()
-
-    def visible(self):
-        """
-            Devuelve si el medio es actualmente visible por el adversario porque
-            está dentro del radio de vigilancia de un medio que ya lo ha detectado
-        """
-        return sum(1 for medio in self.detectores if self.vigilado(medio)) > 0
+        if nombre == 'casilla':
+            g_escenario.hexagono(objeto).numerar()
+        elif nombre in ('medio', 'destruir'):
+            g_escenario.mover_medio(objeto, nombre == 'destruir')
+        elif nombre == 'mapa':
+            g_escenario.cambio = True
+        elif nombre == 'turno':
+            g_escenario.renderizar()
 
-    def actualizar(self):
-        """Ejecutar lógica del medio aéreo"""
-        self.atacado = False
-        if self.desplegado:
-            if self.turnos < self.autonomia():
-                self.turnos += 1
-                self.sup += self.SUPAEREA
-            else:
-                self.aterrizar(True)
-
-class MedioAntiaereo(MedioAtaque):
-    """Representa cualquier medio anti-aéreo"""
-
-class AvionCaza(MedioAereo):
-    """Representa un avión de caza"""
-    NOMBRE     = "Avo. Caza"
-    ICONO      = g_iconos['AvionCaza']
-    DESC       = 'Único medio aéreo que puede atacar otros medios aéreos. El otro medio que puede hacerlo es la batería antiaérea.'
-    PRECIO     = 67
-    VELOCIDAD  = 2301
-    AUTONOMIA  = 1.42
-    ALCANCE    = 3269
-    HUELLA     = 13.12
-    DIST_AIRE  = 160
-    DIST_SUP   = 0
-    VIGILANCIA = 0
-    RADIOVIG   = 0
-    SUPAEREA   = 10
-
-class AvionAtaque(MedioAereo):
-    """Representa un avión de ataque"""
-    NOMBRE     = "Avo. Ataque"
-    ICONO      = g_iconos['AvionAtaque']
-    DESC       = 'Medio aéreo capaz de atacar medios anti aéreos.'
-    PRECIO     = 142
-    VELOCIDAD  = 1363
-    AUTONOMIA  = 4.44
-    ALCANCE    = 6057
-    HUELLA     = 46
-    DIST_AIRE  = 0
-    DIST_SUP   = 1122.98
-    VIGILANCIA = 0
-    RADIOVIG   = 0
-    SUPAEREA   = 6
-
-class AvionTransporte(MedioAereo):
-    """Representa un avión de transporte"""
-    NOMBRE     = "Avo. Transporte"
-    ICONO      = g_iconos['AvionTransporte']
-    DESC       = 'Medio aéreo con más alcance.'
-    PRECIO     = 101
-    VELOCIDAD  = 785
-    AUTONOMIA  = 10.94
-    ALCANCE    = 8588
-    HUELLA     = 100
-    DIST_AIRE  = 0
-    DIST_SUP   = 0
-    VIGILANCIA = 0
-    RADIOVIG   = 0
-    SUPAEREA   = 3
-
-class Helicoptero(MedioAereo):
-    """Representa un helicóptero"""
-    NOMBRE     = "Helicóptero"
-    ICONO      = g_iconos['Helicoptero']
-    DESC       = 'Único medio aéreo capaz de aterrizar en una casilla que no sea una base. Además es capaz de atacar medios anti aéreos.'
-    PRECIO     = 24
-    VELOCIDAD  = 290
-    AUTONOMIA  = 2
-    ALCANCE    = 597
-    HUELLA     = 20
-    DIST_AIRE  = 0
-    DIST_SUP   = 51
-    VIGILANCIA = 0
-    RADIOVIG   = 0
-    SUPAEREA   = 4
-
-class Dron(MedioAereo):
-    """Representa un dron"""
-    NOMBRE     = "Dron"
-    ICONO      = g_iconos['Dron']
-    DESC       = 'Único medio aéreo con capacidad de vigilancia y con mayor autonomía, además es capaz de atacar medios anti aéreos.'
-    PRECIO     = 17
-    VELOCIDAD  = 450
-    AUTONOMIA  = 8
-    ALCANCE    = 3414
-    HUELLA     = 16.39
-    DIST_AIRE  = 0
-    DIST_SUP   = 51
-    VIGILANCIA = 32.78
-    RADIOVIG   = 230
-    SUPAEREA   = 2
-
-class Radar(MedioAntiaereo):
-    """Representa un radar"""
-    NOMBRE     = "Radar"
-    ICONO      = g_iconos['Radar']
-    DESC       = 'Medio antiaéreo con el mayor alcance de vigilancia.'
-    PRECIO     = 48
-    DIST_AIRE  = 0
-    DIST_SUP   = 0
-    VIGILANCIA = 90
-    RADIOVIG   = 360
-    SUPAEREA   = 0
-
-class Bateria(MedioAntiaereo):
-    """Representa una batería anti-aérea"""
-    NOMBRE     = "Batería"
-    ICONO      = g_iconos['Bateria']
-    DESC       = 'Único medio antiaéreo con capacidad de vigilancia.'
-    PRECIO     = 206
-    DIST_AIRE  = 0
-    DIST_SUP   = 0
-    VIGILANCIA = 60
-    RADIOVIG   = 160
-    SUPAEREA   = 0
-
-class Inteligencia(MedioEstrategico):
-    """Clase genérica para representar inteligencia"""
-    NOMBRE     = "Inteligencia"
-    PRECIO     = 50
-    ICONO      = g_iconos['Inteligencia']
-    DESC       = 'Medio estratégico que permite obtener diversa información sobre el adversario.'
-
-class Infraestructura(MedioEstrategico):
-    """Clase genérica que representa una infraestructura"""
-    INC     = 5   # Incremento del coeficiente de superioridad por cada nivel extra
-    BONUS   = 0   # Crédito (en M) otorgado al jugador por turno y nivel
-    NIVELES = 9   # Maximo nivel de una infraestructura
-    PRECIO  = 200 # Precio de construcción
-
-    def __init__(self, jugador, casilla):
-        super().__init__(jugador, casilla)
-        self.nivel = 1
-
-    def destruir(self):
-        """Eliminar la infraestructura"""
-        self.casilla.infraestructura = None
-        self.casilla.numero = None
-        if self in self.jugador.infraestructuras:
-            self.jugador.infraestructuras.remove(self)
-
-    def mejorar(self):
-        """Mejorar el nivel y las propiedades de la infraestructura"""
-        if self.nivel == self.NIVELES:
-            emitir_error(f'Esta {self.NOMBRE} ya está al máximo nivel')
-            return
-        if self.jugador.pagar(self.PRECIO_MEJORA):
-            self.nivel += 1
-            reproducir_sonido('construir', 'efectos')
-            g_info.medio(f'Has mejorado tu {self.NOMBRE} de la casilla {self.casilla.id()} a nivel {self.nivel}')
-            self.casilla.numerar()
-
-    def cosechar(self):
-        """Obtener el bonus económico que otorga la infraestructura"""
-        cantidad = self.BONUS * self.nivel
-        self.jugador.cobrar(cantidad)
-        return cantidad
-
-    def puntuar(self):
-        """Obtener los puntos AIRGAME correspondientes"""
-        return self.PUNTOS
-
-class Ciudad(Infraestructura):
-    """Infraestructura que otorga recursos al jugador"""
-    NOMBRE        = "Ciudad"
-    ICONO         = g_iconos['Ciudad']
-    DESC          = "Infraestructura que cosecha recursos cada turno."
-    PRECIO_MEJORA = 100
-    SUP           = 40
-    BONUS         = 10
-    CANTIDAD      = 2
-    COLOR         = "#000000"
-    PUNTOS        = 30
-
-class Base(Infraestructura):
-    """Infraestructura que permite desplegar medios aéreos"""
-    NOMBRE        = "Base aérea"
-    ICONO         = g_iconos['Base']
-    DESC          = "Infraestructura que permite desplegar medios aéreos."
-    PRECIO_MEJORA = 150
-    SUP           = 60
-    CANTIDAD      = 3
-    COLOR         = "#00b050"
-    PUNTOS        = 50
-
-    def avos(self):
-        """Devuelve la lista de medios aéreos del jugador correspondientes a esta base"""
-        return [medio for medio in self.casilla.medios() if isinstance(medio, MedioAereo)]
-
-    def avos_desplegados(self):
-        """Devueve la lista de medios aéreos desplegados de esta base del jugador"""
-        return [avo for avo in self.avos() if avo.desplegado]
-
-class Capital(Ciudad):
-    """Ciudad principal del jugador. Además, perderla implica perder la partida."""
-    NOMBRE        = "Capital"
-    DESC          = "Ciudad principal del jugador. Conquistarla implica ganar la partida."
-    PRECIO        = None
-    PRECIO_MEJORA = None
-    SUP           = 100
-    CANTIDAD      = 1
-    COLOR         = "#c09200"
-
-class Casilla:
+class Hexagono:
+    """Representación gráfica de una casilla del mapa. Se puede destacar
+     pasando el ratón por encima, y seleccionar pulsando."""
     ESCALA   = 0.6
     BORDE    = 0.9
     RADIO    = min(ESCALA * ANCHURA * ANCHURA_JUEGO / MAPA_DIM_X, ESCALA * ALTURA * ALTURA_JUEGO / MAPA_DIM_Y)
@@ -763,24 +650,28 @@ class Casilla:
     DIM_X    = RADIO * 3 ** 0.5
     DIM_Y    = RADIO * 1.5
     DIM      = pygame.math.Vector2(DIM_X, DIM_Y)
-    BONUS    = 1 # Crédito otorgado al jugador con superioridad aérea en la casilla por turno
-    BONUS_F  = 2 # Ídem, pero con supremacía aérea
-    PUNTOS   = 1 # Puntos AIRGAME otorgados al final de la partida por una casilla con superioridad aérea
-    PUNTOS_F = 3 # Puntos AIRGAME otorgados al final de la partida por una casilla con supremacía aérea
-
-    def __init__(self, esc, x, y):
-        self.x = x
-        self.y = y
+    COLORES  = { # Color de la casilla en función de su estado (ver Casilla.estado)
+        -2: MAPA_COLOR_J2_F,
+        -1: MAPA_COLOR_J2,
+         0: MAPA_COLOR_NEUTRO,
+         1: MAPA_COLOR_J1,
+         2: MAPA_COLOR_J1_F
+    }
+
+    def __init__(self, esc, casilla):
+        self.casilla = casilla
+        x, y = casilla.x, casilla.y
         self.centro = pygame.math.Vector2(Escenario.ORIGEN_X + self.DIM_X * (x + (y % 2) / 2), Escenario.ORIGEN_Y + self.DIM_Y * y)
-        self.verts = [self.centro + v for v in esc.hex_vertices]
-        self.infraestructura = None
+        self.vecinos = [self] # Hexágonos (incluido éste) que invaden el rectángulo de éste, ver Escenario.renderizar_casillas
         cx, cy = self.centro
+        tx, ty = esc.centro_tesela
+        self.rect = pygame.Rect((round(cx) - tx, round(cy) - ty), esc.dim_tesela) # Donde se pega la tesela de la casilla
         r = self.RADIO
         self.numero = Texto(
             '1',
             (cx - r * 0.4, cy),
             12,
-            self.infraestructura.COLOR if self.infraestructura else '#000000',
+            '#000000',
             alineado_h = 'l',
             alineado_v = 'c',
             negrita = True,
@@ -788,178 +679,60 @@ class Casilla:
         )
         self.indicador  = Texto('*', (cx + 0.25 * r, cy - 0.85 * r), 12, '#000000', surface = esc.panel.lienzo)
         self.indicador2 = Texto('!', (cx - 0.75 * r, cy - 0.85 * r), 12, '#000000', surface = esc.panel.lienzo)
+        self.version    = 0    # Aumenta cada vez que la casilla se marca para dibujarla (ver Escenario.ensuciar)
+        self.clave      = None # Versiones con las que se compuso el texto de ayuda
+        self.texto      = None # Texto de ayuda de la casilla
         self.resetear()
 
-    def id(self):
-        """Cadena de texto informativa que identifica a la casilla"""
-        return f"({self.x + 1}, {MAPA_DIM_Y - self.y})"
-
     def resetear(self):
-        """Inicializar todas las propiedades y contenidos de la casilla"""
-        self.infraestructura = None # Infraestructura construida en esta casilla
+        """Inicializar el estado gráfico de la casilla"""
         self.sel = False            # Si el ratón está sobre esta casilla
         self.pul = False            # Si esta casilla está actualmente pulsada
         self.auto = -1              # Cantidad de turnos que puede permanecer el medio seleccionado en esta casilla
         self.numero.ocultar()
-        self.destruir()
-        self.recalcular()
-        self.inicializar_coeficientes()
-        self.asignar()
-        self.colorear()
-
-    def asignar(self):
-        """Determinar propietario de la casilla, que tiene inicialmente la superioridad aerea"""
-        self.jugador = g_jugadores[0] if self.sup >= self.supCas else g_jugadores[1] if self.sup <= -self.supCas else None
-
-    def inicializar_coeficientes(self):
-        """Especificar valor inicial del coeficiente de superioridad aérea"""
-        if self.x < MAPA_DIM_J:
-            self.sup = self.supCas
-        elif self.x >= MAPA_DIM_X - MAPA_DIM_J:
-            self.sup = -self.supCas
-        else:
-            self.sup = 0
-
-    def recalcular(self):
-        """Determinar coeficiente de superioridad de casilla"""
-        infra = self.infraestructura
-        self.supCas = infra.SUP + infra.INC * infra.nivel if infra else COEF_SUP
-
-    def ejercer(self, puntos):
-        """Ejercer una cierta cantidad de superioridad aérea sobre la casilla"""
-
-        # Guardamos el estado previo de la casilla
-        hay_supre1 = self.hay_supremacia(g_adversario)
-        hay_super1 = self.hay_superioridad(g_adversario)
-
-        # Modificamos el coeficiente de superioridad aérea de la casilla
-        self.sup += puntos if g_jugador.indice == 0 else -puntos
-
-        # Guardamos el estado posterior de la casilla
-        hay_supre2 = self.hay_supremacia(g_adversario)
-        hay_super2 = self.hay_superioridad(g_adversario)
-
-        # Reportamos cambios en el estado de la casilla
-        if hay_supre1 and not hay_supre2:
-            g_adversario.reportar(f'Has perdido la supremacía aérea en la casilla {self.id()}!')
-        if hay_super1 and not hay_super2:
-            g_adversario.reportar(f'Has perdido la superioridad aérea en la casilla {self.id()}!')
-
-        # Cambiamos el color de la casilla si es necesario
-        self.colorear()
 
     def numerar(self):
         """Cambiar el número de la casilla"""
-        if not self.infraestructura:
+        infra = self.casilla.infraestructura
+        if not infra:
+            self.numero.ocultar()
+            g_escenario.ensuciar(self)
             return
-        self.numero.editar(str(self.infraestructura.nivel))
-        self.numero.colorear(self.infraestructura.COLOR)
+        self.numero.editar(str(infra.nivel))
+        self.numero.colorear(infra.COLOR)
         self.numero.mostrar()
-        g_escenario.cambio = True
-
-    def cosechar(self):
-        """Otorgar bonus de crédito al jugador"""
-        if self.hay_supremacia():
-            g_jugador.cobrar(self.BONUS_F)
-            return self.BONUS_F
-        elif self.hay_superioridad():
-            g_jugador.cobrar(self.BONUS)
-            return self.BONUS
-        return 0
-
-    def puntuar(self, jugador):
-        """Otorgar puntos AIRGAME al jugador"""
-        return self.PUNTOS_F if self.hay_supremacia(jugador) else self.PUNTOS if self.hay_superioridad(jugador) else 0
-
-    def construir(self, tipo):
-        """Construir una infraestructura en esta casilla"""
-        infra = tipo(g_jugador, self)
-        self.infraestructura = infra
-        self.recalcular()
-        self.sup = round((self.sup / abs(self.sup)) * self.supCas)
-        self.numerar()
-        return infra
-
-    def destruir(self):
-        """Destruir la infraestructura de la casilla"""
-        if self.infraestructura:
-            self.infraestructura.destruir()
+        g_escenario.ensuciar(self)
 
     def raton(self, pos_vec):
         """Detecta si el ratón está sobre la casilla. Aproximamos el hexágono por el círculo inscrito."""
         return pos_vec.distance_squared_to(self.centro + g_escenario.panel.pos) < self.INRADIO ** 2
 
-    def hay_superioridad(self, jugador = None):
-        """Detecta si el jugador actual tiene superioridad aérea en la casilla"""
-        if not jugador:
-            jugador = g_jugador
-        return jugador.indice == 0 and self.sup >= self.supCas or jugador.indice == 1 and self.sup <= -self.supCas
-
-    def hay_supremacia(self, jugador = None):
-        """Detecta si el jugador actual tiene supremacia aérea en la casilla"""
-        if not jugador:
-            jugador = g_jugador
-        return jugador.indice == 0 and self.sup >= MULT_SUPREMACIA * self.supCas or jugador.indice == 1 and self.sup <= -MULT_SUPREMACIA * self.supCas
-
-    def es_base(self):
-        """Detecta si el jugador actual tiene una base aérea en la casilla"""
-        infra = self.infraestructura
-        return infra and type(infra) is Base and infra.jugador == g_jugador
-
-    def medios(self, jugador = None):
-        """Devuelve la lista de medios que el jugador actual tiene en esta casilla (desplegados o no)"""
-        if not jugador:
-            jugador = g_jugador
-        return [medio for medio in jugador.medios if medio.casilla == self]
-
-    def colorear(self):
-        """Determinar color"""
-        if self.sup <= -MULT_SUPREMACIA * self.supCas:
-            self.color = MAPA_COLOR_J2_F
-        elif self.sup <= -self.supCas:
-            self.color = MAPA_COLOR_J2
-        elif self.sup < self.supCas:
-            self.color = MAPA_COLOR_NEUTRO
-        elif self.sup < MULT_SUPREMACIA * self.supCas:
-            self.color = MAPA_COLOR_J1
-        else:
-            self.color = MAPA_COLOR_J1_F
-
-    def bordear(self, surface, color, grosor):
-        """Dibujar el borde hexagonal de la casilla"""
-        pygame.draw.polygon(surface, color, self.verts, grosor)
-
-    def dibujar(self, surface):
-        """Dibujar casilla en pantalla"""
+    def dibujar(self, surface, estado):
+        """Dibujar casilla en pantalla, con el color correspondiente a su estado (ver Tablero.estados)"""
+        casilla = self.casilla
+        jugador, adversario = g_partida.jugador, g_partida.adversario
 
-        # Hexágono e indicador de infraestructura
-        pygame.draw.polygon(surface, self.color, self.verts)
-        if self.infraestructura:
-            self.bordear(surface, self.infraestructura.COLOR, 4)
+        # Hexágono con sus bordes (infraestructura, alcance, selección), ya pre-renderizado
+        infra = casilla.infraestructura
+        color_borde = MAPA_COLOR_BORDE if not g_escenario.situando and not g_escenario.atacando else MAPA_COLOR_BORDE2
+        clave = (self.COLORES[estado], infra.COLOR if infra else None, self.auto >= 0, self.sel, self.pul, color_borde)
+        surface.blit(g_escenario.tesela(clave), self.rect)
+        if infra:
             self.numero.dibujar()
 
         # Indicadores de medios (propios y enemigos detectados)
-        if g_jugador and sum(1 for medio in g_jugador.medios if medio.casilla == self) > 0:
+        if jugador and casilla.medios(jugador):
             self.indicador.dibujar()
-        if g_adversario and sum(1 for medio in g_adversario.medios if medio.casilla == self and isinstance(medio, MedioAereo) and medio.visible()) > 0:
+        if adversario and any(medio.visible() for medio in casilla.aereos(adversario)):
             self.indicador2.dibujar()
 
-        # Bordes de selección
-        color_borde = MAPA_COLOR_BORDE if not g_jugador or not g_jugador.situando and not g_jugador.atacando else MAPA_COLOR_BORDE2
-        if self.auto >= 0:
-            self.bordear(surface, MAPA_COLOR_BORDE3, 1)
-        if self.sel:
-            self.bordear(surface, color_borde, 2)
-        if self.pul:
-            self.bordear(surface, color_borde, 4)
-
     def seleccionar(self):
         """Seleccionar la casilla cuando el raton pasa por encima"""
         if self.sel:
             return
         self.sel = True
         g_escenario.casilla_sobre = self
-        g_escenario.cambio = True
+        g_escenario.ensuciar(self)
         reproducir_sonido('casilla_sel', 'interfaz')
 
     def deseleccionar(self):
@@ -968,7 +741,7 @@ class Casilla:
             return
         self.sel = False
         g_escenario.casilla_sobre = None
-        g_escenario.cambio = True
+        g_escenario.ensuciar(self)
 
     def pulsar(self):
         """Pulsar la casilla cuando el raton hace click"""
@@ -976,11 +749,15 @@ class Casilla:
             return
         self.pul = True
         g_escenario.casilla_pulsa = self
-        g_escenario.cambio = True
-        if g_jugador and g_jugador.situando:
-            g_jugador.situando.desplegar(self)
-        if g_jugador and g_jugador.atacando:
-            g_jugador.atacando.atacar(self)
+        g_escenario.ensuciar(self, acciones = True)
+        g_tienda.ensuciar()
+        if (g_escenario.situando or g_escenario.atacando) and g_partida.pensando():
+            emitir_error('Espera a que la IA termine de pensar')
+        else:
+            if g_escenario.situando and g_escenario.situando.desplegar(self.casilla):
+                g_escenario.situar_off()
+            if g_escenario.atacando and g_escenario.atacando.atacar(self.casilla):
+                g_escenario.atacar_off()
         reproducir_sonido('casilla_pul', 'interfaz')
 
     def despulsar(self, final = False):
@@ -989,92 +766,189 @@ class Casilla:
             return
         self.pul = False
         g_escenario.casilla_pulsa = None
-        g_escenario.cambio = True
-        if g_jugador and final:
-            g_jugador.situar_off()
-            g_jugador.atacar_off()
+        g_escenario.ensuciar(self, acciones = True)
+        g_tienda.ensuciar()
+        if final:
+            g_escenario.situar_off()
+            g_escenario.atacar_off()
 
     def ayuda(self):
         """Mostrar el recuadro de ayuda al pasar el ratón sobre la casilla"""
+        # Todo cambio en la casilla la marca para dibujarla, y los cambios en todo el mapa lo
+        # renderizan entero, así que el texto sólo se compone si ha cambiado alguna versión
+        clave = (self.version, g_escenario.version, self.auto)
+        if clave != self.clave:
+            self.clave = clave
+            self.texto = self.componer_ayuda()
+        g_ayuda.cambiar(self.texto)
+        g_ayuda.mostrar()
+
+    def componer_ayuda(self):
+        """Texto de ayuda de la casilla"""
+        casilla = self.casilla
 
         # Coeficientes de superioridad y jugador
-        texto_ayuda = f"{self.supCas} / {abs(self.sup)}"
-        if self.sup != 0:
-            indice = 1 if self.sup > 0 else 2
+        texto_ayuda = f"{casilla.supCas} / {abs(casilla.sup)}"
+        if casilla.sup != 0:
+            indice = 1 if casilla.sup > 0 else 2
             texto_ayuda += f" (J{indice})"
 
         # Información de la infraestructura
-        infra = self.infraestructura
+        infra = casilla.infraestructura
         if infra:
             texto_ayuda += f"\n{type(infra).__name__} ({infra.nivel})"
 
-            # Bases aéreas: Medios aéreos movilizados
-            avos = [medio for medio in self.medios() if isinstance(medio, MedioAereo)]
-            movil = [avo for avo in avos if avo.desplegado]
-            if len(avos) > 0 or type(infra) is Base:
-                texto_ayuda += f"\nAvos: {len(movil)} / {infra.nivel} ({len(avos)})"
+            # Bases aéreas: Medios aéreos movilizados desde la base
+            if type(infra) is Base:
+                movil = len(infra.avos_desplegados())
+                texto_ayuda += f"\nAvos: {movil} / {infra.nivel} ({len(infra.avos())})"
 
         # Turnos de autonomía disponibles al desplegar
         if self.auto >= 0:
             texto_ayuda += f"\nTurnos: {self.auto}"
-
-        # Cambiar texto y hacerlo visible
-        g_ayuda.cambiar(texto_ayuda)
-        g_ayuda.mostrar()
-
-    def axial(self):
-        """Calcula la coordenadas axiales de la casilla (lugar de cartesianas)"""
-        return (self.x - (self.y - (self.y & 1)) / 2, self.y)
-
-    def distancia(self, casilla):
-        """Calcula la distancia a otra casilla"""
-        q1, r1 = self.axial()
-        q2, r2 = casilla.axial()
-        return round((abs(q1 - q2) + abs(q1 + r1 - q2 - r2) + abs(r1 - r2)) / 2)
+        return texto_ayuda
 
 class Escenario:
-    ORIGEN_X = 2 * Casilla.DIM_X # (ANCHURA * ANCHURA_JUEGO - MAPA_DIM_X * Casilla.DIM_X) / 2
-    ORIGEN_Y = ALTURA * ALTURA_JUEGO - MAPA_DIM_Y * Casilla.DIM_Y
+    """Panel del mapa: dibuja las casillas de la partida y los medios de la casilla pulsada"""
+    ORIGEN_X = 2 * Hexagono.DIM_X # (ANCHURA * ANCHURA_JUEGO - MAPA_DIM_X * Hexagono.DIM_X) / 2
+    ORIGEN_Y = ALTURA * ALTURA_JUEGO - MAPA_DIM_Y * Hexagono.DIM_Y
     ORIGEN = pygame.Vector2(ORIGEN_X, ORIGEN_Y)
     FUENTE  = 24
 
     def __init__(self, panel):
         self.panel = panel
         self.cambio = False
+        self.fondo = panel.lienzo.copy() # Fondo ya teselado, para restaurar zonas sin volver a renderizar el panel
 
         # Calcular las dimensiones de las casillas
-        hex_vert = pygame.math.Vector2.from_polar((Casilla.RADIO * Casilla.BORDE, 90))
+        hex_vert = pygame.math.Vector2.from_polar((Hexagono.RADIO * Hexagono.BORDE, 90))
         self.hex_vertices = [hex_vert.rotate(60 * i) for i in range(6)]
 
+        # Todas las casillas comparten geometría, así que se dibujan pegando teselas pre-renderizadas
+        # (ver tesela). Dejamos margen alrededor del hexágono para los bordes gruesos.
+        tx = math.ceil(max(abs(v.x) for v in self.hex_vertices)) + 3
+        ty = math.ceil(max(abs(v.y) for v in self.hex_vertices)) + 3
+        self.centro_tesela = (tx, ty)
+        self.dim_tesela    = (2 * tx + 1, 2 * ty + 1)
+        self.teselas       = {}
+        self.version       = 0 # Aumenta con cada renderizado completo (ver Hexagono.ayuda)
+
         # Array de casillas
-        self.casillas = [[Casilla(self, x, y) for y in range(MAPA_DIM_Y)] for x in range(MAPA_DIM_X)]
+        self.hexagonos = [[Hexagono(self, casilla) for casilla in columna] for columna in g_partida.tablero.casillas]
+        for x, columna in enumerate(self.hexagonos):
+            for y, hexagono in enumerate(columna):
+                for vecino in (h for col in self.hexagonos[max(x - 1, 0):x + 2] for h in col[max(y - 1, 0):y + 2]):
+                    if vecino is not hexagono and vecino.rect.colliderect(hexagono.rect):
+                        hexagono.vecinos.append(vecino)
+                hexagono.vecinos.sort(key = lambda h: (h.casilla.x, h.casilla.y)) # Mismo orden que al renderizar todo
+        self.controles = {} # Texto y botones de acción de cada medio, se crean al mostrarlos por primera vez
         self.resetear()
 
-        # Panel de acción
-        w = self.panel.dim[0]
+        # Panel de acción, a la derecha del mapa y del indicador de turno del J2
+        w, h = self.panel.dim
+        x = math.ceil(Escenario.ORIGEN_X + Hexagono.DIM_X * (MAPA_DIM_X + 0.25)) + 11
+        self.rect_acciones = pygame.Rect(x, 0, w - x, h)
         self.texto = Texto('Medios', (0.9 * w, 0), self.FUENTE, alineado_h = 'c', subrayado = True, surface = self.panel.lienzo)
 
-    def semillear(self):
-        """Cambiar la seleccion de celdas aleatorias que tienen supremacia inicial (OJO: resetea las celdas!)"""
-        # Resetear los valores de superioridad
-        for col in self.casillas:
-            for casilla in col:
-                casilla.resetear()
-
-        # Generar nuevas casillas aleatorias con supremacia
-        supremacia = int(MAPA_DIM_J * MAPA_DIM_Y * SUP_INICIAL)
-        for j in range(2):
-            casillas = [c for col in self.casillas for c in col if c.jugador == g_jugadores[j]]
-            for casilla in random.sample(casillas, supremacia):
-                casilla.sup *= MULT_SUPREMACIA
-                casilla.colorear()
-
-        # Reajustar los colores de las casillas
-        for col in self.casillas:
-            for casilla in col:
-                casilla.colorear()
-
-        # Fuerza un re-renderizado
+    def hexagono(self, casilla):
+        """Devolver la representación gráfica de una casilla de la partida"""
+        return self.hexagonos[casilla.x][casilla.y]
+
+    def seleccionada(self):
+        """Devolver la casilla de la partida actualmente pulsada, si la hay"""
+        return self.casilla_pulsa.casilla if self.casilla_pulsa else None
+
+    def controles_medio(self, medio):
+        """Devolver el texto y los botones de acción de un medio, creándolos si hace falta"""
+        if medio in self.controles:
+            return self.controles[medio]
+        texto = Texto(medio.NOMBRE, (0, 0), 16, alineado_h = 'd', surface = self.panel.lienzo)
+        botones = []
+        if isinstance(medio, MedioAereo):
+            x, y = self.panel.pos
+            botones = [
+                Boton((0,0), texto="D", anchura=20, origen=(x,y), info=lambda: g_ayuda.cambiar('Desplegar'), surface=self.panel.lienzo, accion=self.situar_on, args=(medio,), partida=True),
+                Boton((0,0), texto="R", anchura=20, origen=(x,y), info=lambda: g_ayuda.cambiar('Retornar'),  surface=self.panel.lienzo, accion=medio.aterrizar, partida=True),
+                Boton((0,0), texto="A", anchura=20, origen=(x,y), info=lambda: g_ayuda.cambiar('Atacar'),    surface=self.panel.lienzo, accion=self.atacar_on, args=(medio,), partida=True)
+            ]
+        self.controles[medio] = (texto, botones)
+        return self.controles[medio]
+
+    def tesela(self, clave):
+        """
+            Devolver la tesela de una casilla, renderizándola la primera vez que se pide.
+            La clave es (relleno, color de infraestructura, alcance, seleccionada, pulsada, color de selección).
+        """
+        if clave in self.teselas:
+            return self.teselas[clave]
+        relleno, color_infra, alcance, sel, pul, color_borde = clave
+        tesela = pygame.Surface(self.dim_tesela, pygame.SRCALPHA)
+        verts = [pygame.Vector2(self.centro_tesela) + v for v in self.hex_vertices]
+        pygame.draw.polygon(tesela, relleno, verts)
+        if color_infra:
+            pygame.draw.polygon(tesela, color_infra, verts, 4)
+        if alcance:
+            pygame.draw.polygon(tesela, MAPA_COLOR_BORDE3, verts, 1)
+        if sel:
+            pygame.draw.polygon(tesela, color_borde, verts, 2)
+        if pul:
+            pygame.draw.polygon(tesela, color_borde, verts, 4)
+        self.teselas[clave] = tesela
+        return tesela
+
+    def ensuciar(self, hexagono, acciones = False):
+        """Marcar una casilla (y opcionalmente el panel de acciones) para volver a dibujarla en el siguiente fotograma"""
+        self.sucias.add(hexagono)
+        self.acciones_sucias = self.acciones_sucias or acciones
+        hexagono.version += 1
+
+    def mover_medio(self, medio, destruido = False):
+        """Un medio ha aparecido, se ha movido o ha sido destruido: marcar las casillas afectadas"""
+        anterior = self.posiciones.pop(medio, None)
+        if anterior:
+            self.ensuciar(anterior)
+        if destruido:
+            self.controles.pop(medio, None)
+        else:
+            self.posiciones[medio] = self.hexagono(medio.casilla)
+        self.ensuciar(self.hexagono(medio.casilla), acciones = True)
+
+    def situar_on(self, medio):
+        """Comenzar a situar un medio en el mapa"""
+        if not medio.validar_despliegue():
+            return
+        self.situando = medio
+        autonomias = medio.autonomias().tolist()
+        for x, col in enumerate(self.hexagonos):
+            for y, hexagono in enumerate(col):
+                hexagono.auto = autonomias[x][y]
+        self.cambio = True
+
+    def situar_off(self):
+        """Terminar de situar un medio en el mapa"""
+        self.situando = None
+        for col in self.hexagonos:
+            for hexagono in col:
+                hexagono.auto = -1
+        self.cambio = True
+
+    def atacar_on(self, medio):
+        """Comenzar a atacar con un medio"""
+        if not medio.validar_ataque():
+            return
+        self.atacando = medio
+        alcanzables = (g_partida.tablero.distancias_desde(medio.casilla) <= medio.radio_ataque()).tolist()
+        for x, col in enumerate(self.hexagonos):
+            for y, hexagono in enumerate(col):
+                hexagono.auto = 1 if alcanzables[x][y] else -1
+        self.cambio = True
+
+    def atacar_off(self):
+        """Terminar de atacar con un medio"""
+        self.atacando = None
+        for col in self.hexagonos:
+            for hexagono in col:
+                hexagono.auto = -1
         self.cambio = True
 
     def actualizar_casillas(self, despulsar = True):
@@ -1082,7 +956,7 @@ class Escenario:
 
         # Aproximar la casilla en la que estamos, para evitar testearlas todas
         pos_vec = pygame.Vector2(g_raton)
-        d = (pos_vec - self.ORIGEN).elementwise() / Casilla.DIM
+        d = (pos_vec - self.ORIGEN).elementwise() / Hexagono.DIM
         x1 = max(round(d.x) - 1, 0)
         x2 = min(round(d.x) + 1, MAPA_DIM_X - 1)
         y1 = max(round(d.y) - 1, 0)
@@ -1091,7 +965,7 @@ class Escenario:
         # Realizar chequeo
         for x in range(x1, x2 + 1):
             for y in range(y1, y2 + 1):
-                casilla = self.casillas[x][y]
+                casilla = self.hexagonos[x][y]
                 if not casilla.raton(pos_vec):
                     continue
 
@@ -1123,86 +997,127 @@ class Escenario:
             # Detectar cambios en los botones de acción
             accionado = False
             if self.casilla_pulsa:
-                avos = [medio for medio in self.casilla_pulsa.medios() if isinstance(medio, MedioAereo)]
+                avos = self.casilla_pulsa.casilla.aereos()
                 for avo in avos:
-                    for boton in avo.botones:
+                    for boton in self.controles_medio(avo)[1]:
                         accionado = accionado or boton.actualizar()
                         if boton.selec:
                             g_ayuda.mostrar()
-            self.cambio = self.cambio or accionado
-
-            # Detectar cambios en casillas seleccionadas o pulsadas
-            self.actualizar_casillas(not accionado)
-
-        # Si ha habido algún cambio en el contenido del escenario, renderizarlo de nuevo
-        if self.cambio:
-            self.renderizar()
+            self.acciones_sucias = self.acciones_sucias or accionado
+
+            # Detectar cambios en casillas seleccionadas o pulsadas (si el ratón está quieto no puede haberlos)
+            if g_click or g_raton != self.raton:
+                self.raton = g_raton
+                self.actualizar_casillas(not accionado)
+
+        # Si ha habido algún cambio en el contenido del escenario, renderizarlo de nuevo.
+        # Los cambios que afectan a todo el mapa lo renderizan entero, el resto sólo las casillas afectadas.
+        with g_perfil.etapa('renderizado'):
+            if self.cambio:
+                self.renderizar()
+            else:
+                if self.sucias:
+                    self.renderizar_casillas()
+                if self.acciones_sucias:
+                    self.renderizar_acciones()
         self.cambio = False
 
     def renderizar(self):
-        """Generar gráficos del escenario de nuevo. Sólo ejecutar cuando algo haya cambiado."""
+        """Generar todos los gráficos del escenario de nuevo. Sólo ejecutar cuando algo haya cambiado en todo el mapa."""
+        self.version += 1
+        redibujar(self.panel.rect)
         # Panel de fondo e indicador de turno
-        self.panel.renderizar()
-        if g_jugador:
-            color = MAPA_COLOR_J1_F if g_jugador.indice == 0 else MAPA_COLOR_J2_F
-            x = Escenario.ORIGEN_X + Casilla.DIM_X * ((MAPA_DIM_X + 1.25) * g_jugador.indice - 1)
-            y = Escenario.ORIGEN_Y + MAPA_DIM_Y * Casilla.DIM_Y / 2 - 50
+        self.panel.lienzo.blit(self.fondo, (0, 0))
+        jugador = g_partida.jugador
+        if jugador:
+            color = MAPA_COLOR_J1_F if jugador.indice == 0 else MAPA_COLOR_J2_F
+            x = Escenario.ORIGEN_X + Hexagono.DIM_X * ((MAPA_DIM_X + 1.25) * jugador.indice - 1)
+            y = Escenario.ORIGEN_Y + MAPA_DIM_Y * Hexagono.DIM_Y / 2 - 50
             rect = (x, y, 10, 100)
             pygame.draw.rect(self.panel.lienzo, color, rect, 0, 5)
             pygame.draw.rect(self.panel.lienzo, '#000000', rect, 1, 5)
 
-        # Mapa de celdas
-        for columna in self.casillas:
-            for casilla in columna:
-                casilla.dibujar(self.panel.lienzo)
+        # Mapa de celdas, clasificando todas a la vez según su superioridad aérea
+        estados = g_partida.tablero.estados().tolist()
+        for x, columna in enumerate(self.hexagonos):
+            for y, hexagono in enumerate(columna):
+                hexagono.dibujar(self.panel.lienzo, estados[x][y])
+        self.dibujar_acciones()
+        self.sucias = set()
+        self.acciones_sucias = False
 
-        # Panel de acciones con los medios
+    def renderizar_casillas(self):
+        """
+            Volver a dibujar sólo las casillas marcadas (ver ensuciar). Se restaura el fondo en el
+            rectángulo de cada una y se redibujan, recortados a él, los hexágonos que lo invaden.
+        """
+        lienzo = self.panel.lienzo
+        for hexagono in self.sucias:
+            redibujar(hexagono.rect.move(self.panel.pos))
+            lienzo.set_clip(hexagono.rect)
+            lienzo.blit(self.fondo, hexagono.rect, hexagono.rect)
+            for vecino in hexagono.vecinos:
+                vecino.dibujar(lienzo, vecino.casilla.estado())
+        lienzo.set_clip(None)
+        self.sucias = set()
+
+    def renderizar_acciones(self):
+        """Volver a dibujar sólo el panel de acciones con los medios de la casilla pulsada"""
+        lienzo = self.panel.lienzo
+        redibujar(self.rect_acciones.move(self.panel.pos))
+        lienzo.set_clip(self.rect_acciones)
+        lienzo.blit(self.fondo, self.rect_acciones, self.rect_acciones)
+        self.dibujar_acciones()
+        lienzo.set_clip(None)
+        self.acciones_sucias = False
+
+    def dibujar_acciones(self):
+        """Dibujar el panel de acciones con los medios de la casilla pulsada"""
+        jugador = g_partida.jugador
         self.texto.dibujar()
-        if not self.casilla_pulsa:
+        if not self.casilla_pulsa or not jugador:
             return
         w = self.panel.dim[0]
         dy = g_fuentes[self.FUENTE].get_linesize()
         x0, y0 = (0.9 * w, dy)
         x, y = x0, y0
-        for medio in self.casilla_pulsa.medios():
-            medio.texto.mover((x, y), 'd')
-            medio.texto.dibujar()
-            if isinstance(medio, MedioAereo):
-                for boton in medio.botones:
-                    boton.situar(x, y)
-                    boton.dibujar()
-                    x += 1.25 * boton.panel.dim[0]
-                    dy = 1.25 * boton.panel.dim[1]
+        for medio in self.casilla_pulsa.casilla.medios():
+            texto, botones = self.controles_medio(medio)
+            texto.mover((x, y), 'd')
+            texto.dibujar()
+            for boton in botones:
+                boton.situar(x, y)
+                boton.dibujar()
+                x += 1.25 * boton.panel.dim[0]
+                dy = 1.25 * boton.panel.dim[1]
             y += dy
             x = x0
 
     def dibujar(self):
-        """Dibujar todo el contenido del escenario en pantalla. Ejecutar cada fotograma."""
+        """Dibujar todo el contenido del escenario en pantalla (ver componer)"""
         self.panel.dibujar()
-        if self.casilla_sobre:
-            self.casilla_sobre.ayuda()
-
-    def cosechar(self):
-        """Adquirir crédito adicional debido a las casillas con superioridad aérea"""
-        return sum(casilla.cosechar() for columna in self.casillas for casilla in columna)
-
-    def puntuar(self, jugador):
-        """Calcular puntos AIRGAME totales del jugador"""
-        return sum(casilla.puntuar(jugador) for columna in self.casillas for casilla in columna)
 
     def resetear(self):
-        """Resetear los contenidos de todas las celdas"""
-        for col in self.casillas:
-            for casilla in col:
-                casilla.resetear()
-        self.semillear()
-        self.casilla_sobre = None # Casilla actualmente seleccionada con el raton
-        self.casilla_pulsa = None # Casilla actualmente pulsada por el raton
+        """Resetear el estado gráfico de todas las celdas"""
+        for col in self.hexagonos:
+            for hexagono in col:
+                hexagono.resetear()
+        self.controles       = {}
+        self.posiciones      = {}    # Última casilla en la que se ha dibujado cada medio, para marcarla al moverlo
+        self.sucias          = set() # Casillas que hay que volver a dibujar (ver renderizar_casillas)
+        self.acciones_sucias = False # Si hay que volver a dibujar el panel de acciones
+        self.situando        = None  # Medio aéreo que se está situando en el mapa ("Desplegar")
+        self.atacando        = None  # Medio aéreo para el que se está escogiendo objetivo ("Atacar")
+        self.casilla_sobre   = None  # Casilla actualmente seleccionada con el raton
+        self.casilla_pulsa   = None  # Casilla actualmente pulsada por el raton
+        self.raton           = None  # Posición del ratón la última vez que se buscó la casilla bajo él
+        self.cambio          = True  # Si hay que volver a renderizar el mapa completo
 
 class Informacion:
     TAMANO_TEXTO   = 14        # Tamaño de la fuente empleada en el panel
     TAMANO_TITULO  = 24        # Tamaño de la fuente de los títulos grandes
     MENSAJE_LIMITE = 12        # Limite de mensajes de error (o similares) en pantalla
+    HISTORIAL      = 500       # Mensajes que se guardan para consultarlos con la rueda del ratón
     COLOR_ERROR    = '#c00000' # Color del texto "Error"
     COLOR_INFO     = '#0000c0' # Color del texto "Info"
     COLOR_DINERO   = '#c0c000' # Color del texto "Dinero"
@@ -1218,18 +1133,28 @@ class Informacion:
         x, y, w, h    = self.panel.rect
         self.renders  = {}   # Textos generales, títulos, etc
         self.textos   = []   # Textos específicos añadidos por otras funciones
-        self.mensajes = []   # Mensajes informativos (errores, info, etc)
-        self.fps      = None # Indicador de fps, para llevar un control
-        self.cambio   = False
+        self.historial      = collections.deque(maxlen = self.HISTORIAL) # Mensajes (color, cabecera, texto), del más reciente al más antiguo
+        self.desplazamiento = 0     # Número de mensajes recientes que no se ven por haber desplazado la lista hacia atrás
+        self.fps            = None  # Indicador de fps, para llevar un control
+        self.pensando       = None  # Indicador de que la IA está pensando su decisión en segundo plano
+        self.cambio         = False # Hay que renderizar el panel completo
+        self.cambio_lista   = False # Basta con renderizar la lista de mensajes
+        self.fondo          = None  # Copia del panel vacío, para renderizar sólo la lista de mensajes
+
+        # Lista de mensajes: una superficie con las filas ya renderizadas que se desplaza al llegar uno nuevo
+        self.dy = g_fuentes[self.TAMANO_TEXTO].get_linesize() - 1
+        dy0 = g_fuentes[self.TAMANO_TITULO].get_linesize()
+        self.rect_lista = pygame.Rect(self.ANCHURA + 20, dy0, w - self.ANCHURA - 20, self.MENSAJE_LIMITE * self.dy + 1)
+        self.lista = pygame.Surface(self.rect_lista.size, pygame.SRCALPHA)
 
         # Creamos (y colocamos) los botones de acciones
         self.botones = [
-            Boton((0,0), texto="Jugar",     anchura=80, surface=self.panel.lienzo, origen=(x,y), accion=siguiente_jugador),
-            Boton((0,0), texto="Mover",     anchura=80, surface=self.panel.lienzo, origen=(x,y), accion=siguiente_paso),
+            Boton((0,0), texto="Jugar",     anchura=80, surface=self.panel.lienzo, origen=(x,y), accion=g_partida.siguiente_jugador, partida=True),
+            Boton((0,0), texto="Mover",     anchura=80, surface=self.panel.lienzo, origen=(x,y), accion=g_partida.siguiente_paso, partida=True),
             Boton((0,0), texto="Música",    anchura=80, surface=self.panel.lienzo, origen=(x,y), accion=cambiar_musica),
             Boton((0,0), texto="Reglas",    anchura=80, surface=self.panel.lienzo, origen=(x,y), accion=g_reglas.mostrar, audio_pul='puerta_abre'),
             Boton((0,0), texto="Reiniciar", anchura=80, surface=self.panel.lienzo, origen=(x,y), accion=resetear),
-            Boton((0,0), texto="Terminar",  anchura=80, surface=self.panel.lienzo, origen=(x,y), accion=terminar),
+            Boton((0,0), texto="Terminar",  anchura=80, surface=self.panel.lienzo, origen=(x,y), accion=g_partida.terminar, partida=True),
             Boton((0,0), texto="Salir",     anchura=80, surface=self.panel.lienzo, origen=(x,y), accion=salir)
         ]
         for i, b in enumerate(reversed(self.botones)):
@@ -1237,10 +1162,11 @@ class Informacion:
 
         # Pre-renderizamos los textos que vamos a usar, para optimizar
         self.renders['nombres']  = Texto("Fase:\nTurno:", (w - 150, 0), 16, negrita = True, surface = self.panel.lienzo)
-        self.renders['valores']  = Texto(f"{g_fase}\nJugador 0", (w - 100, 0), 16, surface = self.panel.lienzo)
+        self.renders['valores']  = Texto(f"{g_partida.fase}\nJugador 0", (w - 100, 0), 16, surface = self.panel.lienzo)
         self.renders['mensajes'] = Texto('Mensajes', (self.ANCHURA + 20, 0), self.TAMANO_TITULO, subrayado = True, surface = self.panel.lienzo)
         self.renders['info']     = Texto('Información', (10, 0), self.TAMANO_TITULO, subrayado = True, surface = self.panel.lienzo)
         self.fps = Texto(f"{g_reloj.get_fps():.2f} fps", (x + w - 80, y + h - 20), 14, alineado_h = 'd')
+        self.pensando = Texto('', (x + w - 235, y + h - 20), 14, cursiva = True)
         self.resetear()
 
     def escribir(self, texto, pos, tamaño = 14, color = '#000000', negrita = False):
@@ -1256,13 +1182,13 @@ class Informacion:
 
     def añadir_mensaje(self, tipo, texto):
         """Añadir un mensaje al panel y renderizarlo"""
-
-        if g_jugador and g_jugador.ia:
+        jugador = g_partida.jugador
+        if jugador and jugador.ia:
             return
 
         # Configurar texto
-        if g_jugador:
-            texto = f'[J{g_jugador.indice + 1}] {texto}'
+        if jugador:
+            texto = f'[J{jugador.indice + 1}] {texto}'
         color = {
             'error':  self.COLOR_ERROR,
             'info':   self.COLOR_INFO,
@@ -1271,23 +1197,48 @@ class Informacion:
             'medio':  self.COLOR_MEDIO,
             'report': self.COLOR_REPORTE
         }[tipo]
-        cabecera = tipo.capitalize() + ':'
-        imagen1 = Texto(cabecera, (0, 0), self.TAMANO_TEXTO, surface = self.panel.lienzo, color = color, negrita = True)
-        imagen2 = Texto(texto,    (0, 0), self.TAMANO_TEXTO, surface = self.panel.lienzo)
+        mensaje = (color, tipo.capitalize() + ':', texto)
+        self.historial.appendleft(mensaje)
 
-        # Insertar nuevo mensaje en la lista, y eliminar los últimos si pasan del límite
-        self.mensajes.insert(0, imagen2)
-        self.mensajes.insert(0, imagen1)
-        del self.mensajes[2 * self.MENSAJE_LIMITE:]
-
-        # Recolocar textos correctamente para que se vayan moviendo para abajo
-        dy0 = g_fuentes[self.TAMANO_TITULO].get_linesize()
-        dy = g_fuentes[self.TAMANO_TEXTO].get_linesize() - 1
-        for i, texto in enumerate(self.mensajes):
-            texto.mover((self.ANCHURA + 20 + 50 * (i % 2), dy0 + (i // 2) * dy))
+        # Si se está consultando el historial, la lista se queda donde está
+        if self.desplazamiento:
+            self.desplazamiento = min(self.desplazamiento + 1, len(self.historial) - self.MENSAJE_LIMITE)
+            return
 
-        # Indicar que ha habido un cambio este fotograma, para renderizar el panel de nuevo
-        self.cambio = True
+        # Desplazar las filas hacia abajo (la última desaparece) y escribir el mensaje nuevo arriba.
+        # Las filas se solapan un píxel con la siguiente, que siempre se escribe encima: por eso
+        # hay que volver a escribir la segunda fila, y recortar la última.
+        w, dy, n = self.rect_lista.w, self.dy, self.MENSAJE_LIMITE
+        self.lista.scroll(0, dy)
+        self.lista.fill((0, 0, 0, 0), (0, 0, w, 2 * dy))
+        self.escribir_fila(mensaje, 0)
+        if len(self.historial) > 1:
+            self.escribir_fila(self.historial[1], dy, (0, 0, w, dy))
+        if len(self.historial) > n:
+            self.lista.fill((0, 0, 0, 0), (0, n * dy, w, dy))
+            self.escribir_fila(self.historial[n - 1], n * dy, (0, dy, w, 1))
+        self.cambio_lista = True
+
+    def escribir_fila(self, mensaje, y, area = None):
+        """Escribir un mensaje (cabecera de color y texto) en la lista de mensajes, opcionalmente sólo una parte"""
+        color, cabecera, texto = mensaje
+        self.lista.blit(g_textos.renderizar(cabecera, self.TAMANO_TEXTO, color, negrita = True), (0, y), area)
+        self.lista.blit(g_textos.renderizar(texto, self.TAMANO_TEXTO, COLOR_TEXTO), (50, y), area)
+
+    def componer_lista(self):
+        """Escribir de nuevo todas las filas visibles de la lista de mensajes"""
+        self.lista.fill((0, 0, 0, 0))
+        visibles = itertools.islice(self.historial, self.desplazamiento, self.desplazamiento + self.MENSAJE_LIMITE)
+        for i, mensaje in enumerate(visibles):
+            self.escribir_fila(mensaje, i * self.dy)
+        self.cambio_lista = True
+
+    def desplazar(self, n):
+        """Desplazar la lista de mensajes n posiciones hacia los más antiguos (o hacia los recientes si n < 0)"""
+        desplazamiento = entre(self.desplazamiento + n, 0, max(len(self.historial) - self.MENSAJE_LIMITE, 0))
+        if desplazamiento != self.desplazamiento:
+            self.desplazamiento = desplazamiento
+            self.componer_lista()
 
     def error(self, texto):
         """Guardar un mensaje especial de error (una única línea)"""
@@ -1315,45 +1266,75 @@ class Informacion:
 
     def actualizar(self):
         """Actualizar los contenidos del panel. Llamar cada fotograma."""
+        if g_rueda and self.rect_lista.move(self.panel.pos).collidepoint(g_raton):
+            self.desplazar(g_rueda)
         for boton in self.botones:
             self.cambio = self.cambio or boton.actualizar()
         if self.cambio:
             self.renderizar()
+        elif self.cambio_lista:
+            self.renderizar_lista()
         self.fps.editar(f"{g_reloj.get_fps():.2f} fps")
+        if g_partida.pensando():
+            self.pensando.editar(f"J{g_partida.jugador.indice + 1} pensando" + '.' * (int(3 * time.perf_counter()) % 4))
+        else:
+            self.pensando.editar('')
         self.cambio = False
+        self.cambio_lista = False
 
     def actualizar_texto(self):
         """Actualizar un texto (o todos) y renderizarlo de nuevo"""
-        indice = g_jugador.indice + 1 if g_jugador else -1
-        if g_fase != 'Principal':
+        indice = g_partida.jugador.indice + 1 if g_partida.jugador else -1
+        if g_partida.fase != 'Principal':
             self.renders['nombres'].editar("Fase:\nTurno:")
-            self.renders['valores'].editar(f"{g_fase}\nJugador {indice}")
+            self.renders['valores'].editar(f"{g_partida.fase}\nJugador {indice}")
         else:
             self.renders['nombres'].editar("Fase:\nTurno:\nPaso:")
-            self.renders['valores'].editar(f"{g_fase}\nJugador {indice}\n{g_paso}")
+            self.renders['valores'].editar(f"{g_partida.fase}\nJugador {indice}\n{g_partida.paso}")
+        self.cambio = True
 
     def renderizar(self):
         """Renderizar el panel de información. Sólo hay que hacerlo cada vez que su contenido cambie."""
+        redibujar(self.panel.rect)
         self.panel.renderizar()
+        self.fondo = self.panel.lienzo.copy()
         for texto in self.renders.values():
             texto.dibujar()
-        for texto in self.mensajes:
+        self.panel.lienzo.blit(self.lista, self.rect_lista)
+        for texto in self.textos:
             texto.dibujar()
+        for boton in self.botones:
+            boton.dibujar()
+
+    def renderizar_lista(self):
+        """Renderizar sólo la zona de la lista de mensajes, sobre la copia del panel vacío"""
+        lienzo = self.panel.lienzo
+        redibujar(self.rect_lista.move(self.panel.pos))
+        lienzo.set_clip(self.rect_lista)
+        lienzo.blit(self.fondo, self.rect_lista, self.rect_lista)
+        for texto in self.renders.values():
+            texto.dibujar()
+        lienzo.blit(self.lista, self.rect_lista)
         for texto in self.textos:
             texto.dibujar()
         for boton in self.botones:
             boton.dibujar()
+        lienzo.set_clip(None)
 
     def dibujar(self):
-        """Dibujar el panel en pantalla. Hay que hacerlo cada fotograma."""
+        """Dibujar el panel en pantalla (ver componer)"""
         self.panel.dibujar()
         self.fps.dibujar()
+        self.pensando.dibujar()
 
     def resetear(self):
         """Reiniciar los contenidos del panel informativo"""
-        self.cambio   = False
-        self.textos   = []
-        self.mensajes = []
+        self.cambio         = False
+        self.cambio_lista   = False
+        self.textos         = []
+        self.desplazamiento = 0
+        self.historial.clear()
+        self.lista.fill((0, 0, 0, 0))
         self.actualizar_texto()
         for boton in self.botones:
             boton.resetear()
@@ -1535,6 +1516,7 @@ class Reglamento:
     def renderizar(self):
         """Renderizar el contenido del reglamento. Hay que llamarlo cada vez que cambie (e.g. al paginar)."""
         x, y, w, h = self.panel.rect
+        redibujar(self.panel.rect)
         self.panel.renderizar()
         self.textos[0].dibujar()
         self.textos[1].dibujar(self.pagina)
@@ -1573,223 +1555,21 @@ class Reglamento:
 
     def mostrar(self):
         """Mostrar las reglas en pantalla"""
+        if not self.visible:
+            redibujar()
         self.visible = True
 
     def ocultar(self):
         """Ocultar el panel de reglas en pantalla"""
+        if self.visible:
+            redibujar()
         self.visible = False
 
     def dibujar(self):
-        """Dibujar el reglamento en pantalla. Hay que llamarlo cada fotograma."""
+        """Dibujar el reglamento en pantalla (ver componer)"""
         if self.visible:
             self.panel.dibujar()
 
-class Jugador:
-    """Representa a cada uno de los jugadores"""
-    MAX_INTELIGENCIA = 5
-
-    jugadores = 0
-
-    def __init__(self, ia):
-        self.indice  = self.jugadores # Índice numérico del jugador (0, 1)
-        self.ia      = ia             # Si el jugador es IA o no
-        self.modelos = { nombre: AMPL(nombre) for nombre in (AMPL_COMPRA, AMPL_POSICION, AMPL_MOVIMIENTO, AMPL_ATAQUE) }
-        type(self).jugadores += 1
-        self.resetear()
-
-    def resetear(self):
-        """Reiniciar el estado del jugador"""
-        self.medios           = []              # Lista de medios de ataque (aéreos o antiaéreos) adquiridos (y no destruidos)
-        self.infraestructuras = []              # Lista de infraestructuras construidas
-        self.reporte          = []              # Lista de acciones hechas por el adversario en el turno anterior
-        self.credito          = CREDITO_INICIAL # Crédito disponible (en M$) para gastar en la tienda
-        self.cosechado        = 0               # Crédito obtenido en el último turno
-        self.preparado        = False           # Ha concluído su fase de preparación
-        self.situando         = None            # Ha pulsado "Desplegar" o "Aterrizar" y está situando esta aeronave
-        self.atacando         = None            # Ha pulsado "Atacar" y está escogiendo objetivo para esta aeronave
-        self.inteligencia     = 0               # Nivel de inteligencia actualmente contratado
-        self.situar_off()
-        self.atacar_off()
-        for modelo in self.modelos.values():
-            modelo.resetear()
-
-    def comprar(self, producto, casilla = None):
-        """Adquirir un medio de ataque (aéreo o antiaéreo) y añadirlo al inventario"""
-        if not self.pagar(producto.PRECIO):
-            return
-        if not issubclass(producto, MedioAtaque):
-            return
-        if not casilla:
-            casilla = g_escenario.casilla_pulsa
-        self.medios.append(producto(self, casilla))
-        g_info.dinero(f'Has adquirido un {producto.NOMBRE} en la casilla {casilla.id()}')
-        g_escenario.cambio = True
-
-    def contratar(self):
-        """Contratar inteligencia, que proporciona información adicional al comienzo de cada turno"""
-        if self.inteligencia == self.MAX_INTELIGENCIA:
-            emitir_error('Ya tienes el máximo nivel de inteligencia')
-        elif not self.pagar(Inteligencia.PRECIO):
-            return
-        else:
-            self.inteligencia += 1
-            g_info.info(f'Contrada inteligencia de nivel {self.inteligencia}')
-
-    def construir(self, producto, casilla = None):
-        """Construir o mejorar una infraestructura en el mapa"""
-        if not casilla:
-            casilla = g_escenario.casilla_pulsa
-        infra = casilla.infraestructura
-        if infra:
-            if type(infra) is not producto: # Infraestructura de otro tipo -> Error
-                emitir_error('Ya hay una infraestructura de otro tipo en esta casilla')
-            elif g_fase != 'Preparación':   # Infraestructura del mismo tipo -> Mejorar
-                infra.mejorar()
-            else:                           # No se puede mejorar en fase de preparación
-                emitir_error('No se pueden mejorar infraestructuras en fase de preparación')
-        else:                               # No hay infraestructura -> Construir
-            if g_fase == 'Preparación':
-                cantidad = sum(1 for infra in self.infraestructuras if type(infra) is producto)
-                if cantidad >= producto.CANTIDAD:
-                    emitir_error(f"Ya has construido todas las {producto.NOMBRE.lower()} iniciales")
-                    return
-            elif not self.pagar(producto.PRECIO):
-                return
-            infra = casilla.construir(producto)
-            self.infraestructuras.append(infra)
-            reproducir_sonido('construir', 'efectos')
-            g_info.medio(f'Has construido una {producto.NOMBRE} en la casilla {casilla.id()}')
-            g_escenario.cambio = True
-
-    def pagar(self, cantidad):
-        """Desembolsar una cierta cantidad, si hay crédito disponible"""
-        if self.credito < cantidad:
-            emitir_error('No tienes crédito suficiente!')
-            return False
-        reproducir_sonido('pagar', 'efectos')
-        self.credito -= cantidad
-        g_tienda.actualizar_textos()
-        return True
-
-    def cobrar(self, cantidad):
-        """Obtener una cierta cantidad de crédito"""
-        self.credito += cantidad
-
-    def cosechar(self):
-        """Adquirir crédito adicional debido a la superioridad aérea y las infraestructuras"""
-        self.cosechado = g_escenario.cosechar()
-        for infra in self.infraestructuras:
-            self.cosechado += infra.cosechar()
-        g_info.dinero(f"Has cosechado {self.cosechado}M€")
-        if self.cosechado:
-            reproducir_sonido('cobrar', 'efectos')
-            g_tienda.actualizar_textos()
-
-    def puntuar(self):
-        """Recontar todos los puntos AIRGAME obtenidos en la partida"""
-        puntos = g_escenario.puntuar(self)
-        for infra in self.infraestructuras:
-            puntos += infra.puntuar()
-        for medio in self.medios:
-            puntos += medio.puntuar()
-        g_info.info(f'El jugador {self.indice + 1} ha obtenido {puntos} puntos AIRGAME')
-        return puntos
-
-    def preparar(self):
-        """Realizar automáticamente la fase de preparación. Esta función está simplemente para facilitar el testeo."""
-        for producto in Tienda.INFRAESTRUCTURAS:
-            casillas = [casilla for columna in g_escenario.casillas for casilla in columna if casilla.hay_supremacia() and not casilla.infraestructura]
-            for casilla in random.sample(casillas, producto.CANTIDAD):
-                self.construir(producto, casilla)
-        self.preparado = True
-
-    def situar_on(self, medio):
-        """Comenzar a situar un medio en el mapa"""
-        self.situando = medio
-        if not g_escenario:
-            return
-        for col in g_escenario.casillas:
-            for casilla in col:
-                casilla.auto = medio.autonomia(casilla)
-
-    def situar_off(self):
-        """Terminar de situar un medio en el mapa"""
-        self.situando = None
-        if not g_escenario:
-            return
-        for col in g_escenario.casillas:
-            for casilla in col:
-                casilla.auto = -1
-
-    def atacar_on(self, medio):
-        """Comenzar a atacar con un medio"""
-        self.atacando = medio
-        if not g_escenario:
-            return
-        for col in g_escenario.casillas:
-            for casilla in col:
-                casilla.auto = 1 if medio.casilla.distancia(casilla) <= medio.radio_ataque() else -1
-
-    def atacar_off(self):
-        """Terminar de atacar con un medio"""
-        self.atacando = None
-        if not g_escenario:
-            return
-        for col in g_escenario.casillas:
-            for casilla in col:
-                casilla.auto = -1
-
-    def reportar(self, msg):
-        """
-            Añadir un mensaje informativo acerca de una acción llevada a cabo
-            por el adversario, que será reportada al jugador en el turno siguiente
-        """
-        self.reporte.append(msg)
-
-    def validar_reporte(self):
-        """Ejecutar una vez vistos los reportes"""
-        self.reporte = []
-
-    def adversario(self):
-        """Devolver el adversario de este jugador"""
-        return g_jugadores[self.indice ^ 1]
-
-    def ia_compra(self):
-        """Decidir qué recursos adquirir en el turno de la IA"""
-
-        # Configurar modelo de AMPL y resolverlo
-        modelo = self.modelos['compra']
-        modelo.parametro('P', [self.credito])
-        modelo.parametro('S', [round(random.random()) for _ in range(29)])
-        modelo.ejecutar()
-
-        # Comprar productos resultantes
-        compras = [var[1] for var in modelo.variable('X')]
-        productos = [AvionCaza, AvionAtaque, AvionTransporte, Helicoptero, Dron, Radar, Bateria, Ciudad, Base]
-        for compra, producto in zip(compras, productos):
-            if compra == 0:
-                continue
-            if issubclass(producto, MedioAtaque):
-                self.comprar(producto, self.ia_posicion(True))
-            elif issubclass(producto, Infraestructura):
-                self.construir(producto, self.ia_posicion(False))
-
-    def ia_posicion(self, medio):
-        """Dónde colocar los recursos adquiridos en este turno de la IA"""
-        if medio:
-            casillas = [c for col in g_escenario.casillas for c in col if c.hay_superioridad(self)]
-        else:
-            casillas = [c for col in g_escenario.casillas for c in col if c.hay_supremacia(self) and not c.infraestructura]
-        return random.sample(casillas, 1)[0]
-
-    def ia_movimiento(self):
-        """Decidir dónde desplegar un medio en el turno de la IA"""
-        pass
-
-    def ia_ataque(self):
-        """Decidir qué ataque llevar a cabo en el turno de la IA"""
-        pass
-
 class Tienda:
     """Contiene todos los productos que se pueden adquirir y se encarga de su funcionalidad y renderizado"""
     BOTON_SEP = 5
@@ -1799,6 +1579,7 @@ class Tienda:
 
     def __init__(self, panel):
         self.panel = panel
+        self.sucia = True # Hay que recalcular qué botones están bloqueados, visibles, etc (ver ensuciar)
 
         # Crear los botones de medios
         self.botones = {}
@@ -1816,8 +1597,8 @@ class Tienda:
 
         # El botón de la capital es especial
         self.botones[Capital] = Boton(
-            (x, y), texto="Capital", info=Capital.info, indice=0, accion=lambda: g_jugador.construir(Capital, g_escenario.casilla_pulsa),
-            audio_pul=None, anchura=2 * dx + self.BOTON_SEP, textura=None, negrita=True, color='#ffffff', color_selec='#ffffff', color_pulsado='#ffffff'
+            (x, y), texto="Capital", info=lambda: self.info(Capital), indice=0, accion=lambda: g_partida.jugador.construir(Capital, g_escenario.seleccionada()),
+            audio_pul=None, partida=True, anchura=2 * dx + self.BOTON_SEP, textura=None, negrita=True, color='#ffffff', color_selec='#ffffff', color_pulsado='#ffffff'
         )
 
         # Pre-renderizar textos, para optimizar
@@ -1831,30 +1612,75 @@ class Tienda:
         accion = None
         args = ()
         if producto is Inteligencia:
-            accion = lambda: g_jugador.contratar()
+            accion = lambda: g_partida.jugador.contratar()
         elif issubclass(producto, MedioAtaque):
-            accion = lambda p: g_jugador.comprar(p)
+            accion = lambda p: g_partida.jugador.comprar(p, g_escenario.seleccionada())
             args = (producto,)
         elif issubclass(producto, Infraestructura):
-            accion = lambda: g_jugador.construir(producto, g_escenario.casilla_pulsa)
-        return Boton((0, 0), imagen=producto.ICONO, info=producto.info, indice=0, accion=accion, args=args, audio_pul=None)
+            accion = lambda: g_partida.jugador.construir(producto, g_escenario.seleccionada())
+        return Boton((0, 0), imagen=g_iconos[producto.__name__], info=lambda: self.info(producto), indice=0, accion=accion, args=args, audio_pul=None, partida=True)
+
+    def info(self, producto):
+        """Mostrar la información de un producto (ayuda del ratón y panel inferior)"""
+
+        # Información breve en la ayuda del ratón
+        texto_ayuda = producto.NOMBRE
+        if producto.PRECIO:
+            texto_ayuda += f" ({producto.PRECIO}M)"
+        if producto.PRECIO_MEJORA:
+            casilla = g_escenario.seleccionada()
+            if casilla and casilla.infraestructura:
+                infra = casilla.infraestructura
+                if type(infra) is producto and infra.jugador == g_partida.jugador:
+                    texto_ayuda = f"Mejorar {producto.NOMBRE} ({producto.PRECIO_MEJORA}M)"
+        g_ayuda.cambiar(texto_ayuda)
+
+        # Texto informativo extenso en el panel inferior
+        y0 = g_fuentes[Informacion.TAMANO_TITULO].get_linesize()
+        y1 = g_fuentes[Informacion.TAMANO_TEXTO].get_linesize()
+        g_info.borrar()
+        g_info.escribir("Descripción:", (10, y0), negrita = True)
+        g_info.escribir(producto.DESC, (120, y0))
+        nombres = ""
+        valores = ""
+        if producto.PRECIO:        nombres += "\nPrecio:";        valores += f"\n{producto.PRECIO}"
+        if producto.PRECIO_MEJORA: nombres += "\nPrecio mejora:"; valores += f"\n{producto.PRECIO_MEJORA}"
+        if producto.VELOCIDAD:     nombres += "\nVelocidad:";     valores += f"\n{producto.VELOCIDAD}"
+        if producto.AUTONOMIA:     nombres += "\nAutonomía:";     valores += f"\n{producto.AUTONOMIA}"
+        if producto.ALCANCE:       nombres += "\nAlcance:";       valores += f"\n{producto.ALCANCE}"
+        if producto.HUELLA:        nombres += "\nHuella:";        valores += f"\n{producto.HUELLA}"
+        if producto.DIST_AIRE:     nombres += "\nAire-aire:";     valores += f"\n{producto.DIST_AIRE}"
+        if producto.DIST_SUP:      nombres += "\nAire-sup:";      valores += f"\n{producto.DIST_SUP}"
+        if producto.VIGILANCIA:    nombres += "\nVigilancia:";    valores += f"\n{producto.VIGILANCIA}"
+        if producto.RADIOVIG:      nombres += "\nRadio-vigil.:";  valores += f"\n{producto.RADIOVIG}"
+        if producto.SUPAEREA:      nombres += "\nSup.-aerea:";    valores += f"\n{producto.SUPAEREA}"
+        g_info.escribir(nombres, ( 10, y0 + 1 * y1), negrita = True)
+        g_info.escribir(valores, (120, y0 + 1 * y1))
 
     def actualizar_textos(self):
         """Actualizar los textos de la tienda. Llamar sólo cuando ha habido cambios relevantes."""
-        self.textos['dinero'].editar(f"Dinero: {g_jugador.credito}")
+        if g_partida.jugador:
+            self.textos['dinero'].editar(f"Dinero: {g_partida.jugador.credito}")
 
-    def actualizar(self):
-        """Actualizar estado del contenido de la tienda"""
-        casilla = g_escenario.casilla_pulsa
+    def ensuciar(self):
+        """Marcar el estado de los botones para recalcularlo, tras un cambio en la partida o en la casilla pulsada"""
+        self.sucia = True
+
+    def recalcular(self):
+        """Recalcular qué botones están bloqueados (y por qué), visibles, y cuántos productos tiene el jugador"""
+        jugador = g_partida.jugador
+        fase, paso = g_partida.fase, g_partida.paso
+        casilla = g_escenario.seleccionada()
+        cantidades = collections.Counter(type(producto) for producto in jugador.medios + jugador.infraestructuras)
 
-        # Actualizar botones de medios
+        # Botones de medios
         for medio in self.MEDIOS:
             boton = self.botones[medio]
 
             # Condiciones para que el botón es activo
-            if g_fase != 'Principal':
+            if fase != 'Principal':
                 boton.bloquear('Sólo se pueden adquirir medios en la fase principal')
-            elif g_paso != 'Recursos':
+            elif paso != 'Recursos':
                 boton.bloquear('Sólo se pueden adquirir medios en el paso de recursos')
             elif issubclass(medio, MedioAereo) and (not casilla or not casilla.es_base()):
                 boton.bloquear('Los medios aéreos han de ser colocados en bases aéreas')
@@ -1862,43 +1688,46 @@ class Tienda:
                 boton.bloquear('Los medios antiaéreos han de ser colocados en casillas con superioridad aérea')
             else:
                 boton.desbloquear()
+            boton.indexar(cantidades[medio])
 
-            # Actualizar botón y ayuda
-            boton.indexar(sum(1 for producto in g_jugador.medios if type(producto) is medio))
-            boton.actualizar()
-            if boton.selec:
-                g_ayuda.mostrar()
-
-        # Actualizar botones de infraestructuras
+        # Botones de infraestructuras
         for infra in self.INFRAESTRUCTURAS:
             boton = self.botones[infra]
 
             # La capital sólo puede colocarse en la fase de preparación
-            if g_fase != 'Preparación' and infra is Capital:
+            if fase != 'Preparación' and infra is Capital:
                 boton.ocultar()
             else:
                 boton.mostrar()
 
             # Condiciones para que el botón esté activo
-            if g_fase != 'Preparación' and g_fase != 'Principal':
+            if fase != 'Preparación' and fase != 'Principal':
                 boton.bloquear('Sólo se pueden construir infraestructuras en las fases de preparación y principal')
-            elif g_fase == 'Principal' and g_paso != 'Recursos':
+            elif fase == 'Principal' and paso != 'Recursos':
                 boton.bloquear('Sólo se pueden construir infraestructuras en el paso de recursos')
             elif not casilla or not casilla.infraestructura and not casilla.hay_supremacia():
                 boton.bloquear('Sólo se pueden construir infraestructuras en casillas con supremacía aérea')
             else:
                 boton.desbloquear()
+            boton.indexar(cantidades[infra])
+
+        self.sucia = False
+
+    def actualizar(self):
+        """Actualizar estado del contenido de la tienda"""
+        # El estado de los botones sólo cambia con la partida (ver ensuciar)
+        if self.sucia:
+            self.recalcular()
 
-            # Actualizar botón y ayuda
-            boton.indexar(sum(1 for producto in g_jugador.infraestructuras if type(producto) is infra))
+        # Actualizar botones y ayuda
+        selec = False
+        for boton in self.botones.values():
             boton.actualizar()
             if boton.selec:
                 g_ayuda.mostrar()
+                selec = True
 
         # Si no hay ningún botón seleccionado, borramos el texto informativo
-        selec = False
-        for boton in self.botones.values():
-            selec = selec or boton.selec
         if not selec:
             g_info.borrar()
 
@@ -1915,6 +1744,7 @@ class Tienda:
         for producto, boton in self.botones.items():
             boton.resetear()
         self.actualizar_textos()
+        self.sucia = True
 
 # < -------------------------------------------------------------------------- >
 #                             CLASES DE LA INTERFAZ
@@ -1987,7 +1817,7 @@ class Boton:
     def __init__(
             self, pos, origen=(0,0), texto=None, tamaño=BOTON_TAMANO_LETRA, imagen=None, textura='gotele',
             info=None, indice=None, accion=None, args=(), surface=g_pantalla, audio_sel='boton_sel', audio_pul='boton_pul',
-            anchura=None, altura=None, bloqueado=False, block_razon=None, visible=True, negrita=False,
+            anchura=None, altura=None, bloqueado=False, block_razon=None, visible=True, negrita=False, partida=False,
             color=BOTON_COLOR_NORMAL, color_selec=BOTON_COLOR_SOBRE, color_pulsado=BOTON_COLOR_PULSA
         ):
         if not texto and not imagen:
@@ -2008,6 +1838,7 @@ class Boton:
         self.block_orig    = bloqueado     # Un botón bloqueado no puede usarse. Copia del valor original, que puede cambiar.
         self.block_razon   = block_razon   # Razón por la cual el botón está bloqueado
         self.visible       = visible       # Un botón no visible no se actualiza ni dibuja
+        self.partida       = partida       # Si la acción cambia la partida (no puede usarse mientras la IA piensa)
         self.selec         = False         # Verdadero si el ratón está encima del botón
         self.pulsado       = False         # Verdadero si el botón está siendo pulsado
         self.color         = color         # Color normal del botón
@@ -2019,10 +1850,7 @@ class Boton:
             if not tamaño in TEXTO_TAMANOS:
                 tamaño = BOTON_TAMANO_LETRA
             self.texto = texto
-            negrita_original = g_fuentes[tamaño].bold
-            g_fuentes[tamaño].bold = negrita
-            self.imagen = g_fuentes[tamaño].render(texto, True, (0, 0, 0))
-            g_fuentes[tamaño].bold = negrita_original
+            self.imagen = g_textos.renderizar(texto, tamaño, (0, 0, 0), negrita = negrita)
         else:
             self.imagen = imagen
         x, y = self.tamaño = self.imagen.get_size()
@@ -2063,10 +1891,14 @@ class Boton:
 
     def mostrar(self):
         """Hacer el botón visible"""
+        if not self.visible:
+            redibujar(self.panel.rect.move(self.panel.origen))
         self.visible = True
 
     def ocultar(self):
         """Hacer el botón invisible (y, por ende, desactivado)"""
+        if self.visible:
+            redibujar(self.panel.rect.move(self.panel.origen))
         self.visible = False
 
     def indexar(self, indice):
@@ -2096,8 +1928,10 @@ class Boton:
             reproducir_sonido(self.audio_sel, 'interfaz')
         if ha_pulsado and self.audio_pul:
             reproducir_sonido(self.audio_pul, 'interfaz')
-        if self.pulsado and self.block:
-            emitir_error(self.block_razon)
+        # Mientras la IA piensa en segundo plano lee la partida, así que no puede cambiar
+        bloqueado = self.block or self.partida and g_partida.pensando()
+        if self.pulsado and bloqueado:
+            emitir_error(self.block_razon if self.block else 'Espera a que la IA termine de pensar')
 
         # Actualizar color y renderizar boton
         if cambio:
@@ -2114,7 +1948,7 @@ class Boton:
             self.info()
 
         # Ejecutar acción si está pulsado
-        if ha_pulsado and self.accion and not self.block:
+        if ha_pulsado and self.accion and not bloqueado:
             self.accion(*self.args)
 
         # Devolver si ha habido cambio de estado
@@ -2122,6 +1956,7 @@ class Boton:
 
     def renderizar(self):
         """Volver a renderizar el contenido del boton. Solo hace falta hacerlo cuando ha cambiado."""
+        redibujar(self.panel.rect.move(self.panel.origen))
         self.panel.renderizar()
         self.panel.lienzo.blit(self.imagen, ((self.anchura - self.tamaño[0]) / 2, (self.altura - self.tamaño[1]) / 2))
         if not self.indice:
@@ -2260,32 +2095,7 @@ class Texto:
         self.max_ancho = max_ancho
         if not self.max_ancho:
             max_ancho = 1000000
-        fuente = self.fuente()
-
-        # Inicializar lista de palabras y líneas para preparar el algoritmo
-        palabras = self.texto.split(' ')
-        self.lineas = []
-        linea_actual = ""
-
-        # Iterar palabras y componer listado de líneas
-        for palabra in palabras:
-            if '\n' in palabra:
-                sub_palabras = palabra.split('\n')
-                for sub_palabra in sub_palabras[:-1]:
-                    if fuente.size(linea_actual + sub_palabra)[0] <= max_ancho:
-                        linea_actual += sub_palabra + " "
-                    else:
-                        self.lineas.append(linea_actual)
-                        linea_actual = sub_palabra + " "
-                    self.lineas.append(linea_actual)
-                    linea_actual = ""
-                linea_actual = sub_palabras[-1] + " "
-            elif fuente.size(linea_actual + palabra)[0] <= max_ancho:
-                linea_actual += palabra + " "
-            else:
-                self.lineas.append(linea_actual)
-                linea_actual = palabra + " "
-        self.lineas.append(linea_actual)
+        self.lineas = list(partir_lineas(self.texto, self.fuente(), max_ancho))
 
         # Opcionalmente, reparginar y renderizar el texto de nuevo, ya que las líneas han cambiado
         if actualizar:
@@ -2302,16 +2112,19 @@ class Texto:
 
     def fuente(self):
         """Obtener la fuente apropriada"""
-        fuente = g_fuentes_mono[self.tamaño] if self.mono else g_fuentes[self.tamaño]
-        fuente.underline = self.subrayado
-        fuente.bold      = self.negrita
-        fuente.italic    = self.cursiva
-        return fuente
+        return fuente_estilo(self.tamaño, bool(self.negrita), bool(self.cursiva), bool(self.subrayado), bool(self.mono))
 
     def renderizar(self):
         """Renderizar la superficie del texto. Sólo hacer cuando haya un cambio."""
-        fuente = self.fuente()
-        self.imagenes = [fuente.render(linea, True, self.color) for linea in self.lineas]
+        directo = self.surface is g_pantalla and self.visible # Dibujado directamente en pantalla: marcar zona antigua y nueva
+        if directo and self.imagenes:
+            redibujar(self.rect())
+        self.imagenes = [
+            g_textos.renderizar(linea, self.tamaño, self.color, self.negrita, self.cursiva, self.subrayado, self.mono)
+            for linea in self.lineas
+        ]
+        if directo:
+            redibujar(self.rect())
 
     def actualizar(self):
         """Actualizar el texto. Debe llamarse cada vez que haya un cambio (de texto, de fuente, etc)"""
@@ -2327,19 +2140,28 @@ class Texto:
         """No dibujar el texto en pantalla"""
         self.visible = False
 
-    def dibujar(self, pagina = 0):
-        """Dibujar el texto en pantalla. Hacer todos los fotogramas."""
-        if not self.visible:
-            return
-        fuente = self.fuente()
-        salto = fuente.get_linesize()
+    def colocar(self, pagina = 0):
+        """Líneas pre-renderizadas de la página, con la posición de cada una en la superficie base"""
+        salto = self.fuente().get_linesize()
         imagenes = self.imagenes[self.max_alto * pagina : self.max_alto * (pagina + 1)] if self.max_alto else self.imagenes
         for i, imagen in enumerate(imagenes):
             x, y = self.pos
             dx, dy = imagen.get_size()
             x -= (dx if self.alineado_h == 'd' else dx / 2 if self.alineado_h == 'c' else 0)
             y -= (dy if self.alineado_v == 'b' else dy / 2 if self.alineado_v == 'c' else 0)
-            self.surface.blit(imagen, (x, y + i * salto))
+            yield imagen, (x, y + i * salto)
+
+    def rect(self, pagina = 0):
+        """Rectángulo que ocupa el texto en la superficie base"""
+        rects = [imagen.get_rect(topleft = pos) for imagen, pos in self.colocar(pagina)]
+        return rects[0].unionall(rects[1:]) if rects else pygame.Rect(self.pos, (0, 0))
+
+    def dibujar(self, pagina = 0):
+        """Dibujar el texto en pantalla. Hacer todos los fotogramas."""
+        if not self.visible:
+            return
+        for imagen, pos in self.colocar(pagina):
+            self.surface.blit(imagen, pos)
 
 class Ayuda:
     """Representa un pequeño recuadro de ayuda on texto que se muestra al
@@ -2349,15 +2171,46 @@ class Ayuda:
     COLOR_BORDE = "#000000"
     COLOR_TEXTO = "#000000"
     TAMANO_TEXTO = 16
+    RECUADROS    = 64 # Recuadros ya renderizados que se guardan, por su texto
 
     def __init__(self, texto):
-        self.texto = Texto(texto, (0, 0), self.TAMANO_TEXTO, self.COLOR_TEXTO)
-        self.visible = False
+        self.texto     = None                      # Texto de la ayuda
+        self.imagen    = None                      # Recuadro (fondo, borde y texto) ya renderizado
+        self.recuadros = collections.OrderedDict() # Recuadros renderizados por texto, del menos al más reciente
+        self.visible   = False
+        self.dibujado  = None                      # Recuadro y posición con los que se dibujó en el último fotograma
+        self.cambiar(texto)
 
     def cambiar(self, texto):
         """Modificar el texto de la ayuda"""
-        if self.texto != texto:
-            self.texto.editar(texto)
+        if self.texto == texto:
+            return
+        self.texto = texto
+        self.imagen = self.recuadros.get(texto)
+        if self.imagen is None:
+            self.imagen = self.recuadros[texto] = self.renderizar()
+            if len(self.recuadros) > self.RECUADROS:
+                self.recuadros.popitem(last = False)
+        else:
+            self.recuadros.move_to_end(texto)
+
+    def renderizar(self):
+        """
+            Renderizar el recuadro: el fondo y el borde ajustados a las líneas de texto, que
+            se escriben 2 píxeles a la derecha y 1 hacia arriba (pueden sobresalir del fondo)
+        """
+        fuente = fuente_estilo(self.TAMANO_TEXTO)
+        salto = fuente.get_linesize()
+        lineas = [g_textos.renderizar(linea, self.TAMANO_TEXTO, self.COLOR_TEXTO) for linea in partir_lineas(self.texto, fuente, 1000000)]
+        anchura = max(linea.get_width() for linea in lineas)
+        altura = sum(linea.get_height() for linea in lineas)
+        alto = max(altura + 1, (len(lineas) - 1) * salto + lineas[-1].get_height())
+        imagen = pygame.Surface((anchura + 2, alto), pygame.SRCALPHA)
+        pygame.draw.rect(imagen, self.COLOR_FONDO, (0, 1, anchura, altura))
+        pygame.draw.rect(imagen, self.COLOR_BORDE, (0, 1, anchura, altura), 1)
+        for i, linea in enumerate(lineas):
+            imagen.blit(linea, (2, i * salto))
+        return imagen
 
     def mostrar(self):
         """Hacer el recuadro de ayuda visible"""
@@ -2367,79 +2220,19 @@ class Ayuda:
         """Dejar de mostrar el recuadro de ayuda"""
         self.visible = False
 
-    def dibujar(self):
-        """Dibujar el recuadro de ayuda en pantalla"""
-        if not self.visible:
-            return
-        x, y = g_raton[0] - 80, g_raton[1] + 20
-        lineas = self.texto.imagenes
-        anchura = max(linea.get_width() for linea in lineas)
-        altura = sum(linea.get_height() for linea in lineas)
-        pygame.draw.rect(g_pantalla, self.COLOR_FONDO, (x, y, anchura, altura))
-        pygame.draw.rect(g_pantalla, self.COLOR_BORDE, (x, y, anchura, altura), 1)
-        self.texto.mover((x + 2, y - 1))
-        self.texto.dibujar()
-
-class AMPL:
-    """
-        Representa un modelo de programación lineal dedicado a decidir el
-        movimiento de la IA del juego
-    """
-
-    VARIABLE_SOLUCION = 'X' # Variable del modelo que contiene la solución buscada
-
-    def __init__(self, tipo, solver = 'cbc'):
-        self.fichero_modelo = tipo + '.mod'
-        self.fichero_datos  = tipo + '.dat'
-        self.ampl           = amplpy.AMPL()
-        self.solver         = solver
-        self.solucion       = None
-        self.cargar()
-
-    def cargar(self):
-        """Cargar los ficheros del modelo, sólo hace falta hacerlo una vez"""
-        self.ampl.read(self.fichero_modelo)
-        self.ampl.read_data(self.fichero_datos)
-
-    def resetear(self):
-        """Reiniciar los datos del modelo para preparar la siguiente ejecución"""
-        self.ampl.reset()
-        self.solucion = None
-
-    def configurar(self):
-        "Establecer las opciones del solver"
-        self.ampl.set_option('solver', self.solver)
-
-    def resolver(self):
-        """Resolver el problema con el solver escogido"""
-        self.ampl.solve()
-        if self.ampl.solve_result != 'solved':
-            self.solucion = None
-            return False
-        else:
-            self.solucion = self.variable(self.VARIABLE_SOLUCION)
-            return True
-
-    def variable(self, nombre = VARIABLE_SOLUCION):
-        """Leer el valor de una variable"""
-        try:
-            return self.ampl.get_variable(nombre).get_values().to_list()
-        except:
-            return None
-
-    def parametro(self, nombre, valor):
-        """Cambiar el valor de un parámetro del modelo"""
-        try:
-            self.ampl.get_parameter(nombre).set_values(valor)
-            return True
-        except:
-            return False
+    def actualizar(self):
+        """Colocar el recuadro de ayuda junto al ratón, marcando la zona si ha cambiado desde el fotograma anterior"""
+        dibujado = (self.imagen, (g_raton[0] - 80, g_raton[1] + 19)) if self.visible else None
+        if dibujado != self.dibujado:
+            for recuadro in (self.dibujado, dibujado):
+                if recuadro:
+                    redibujar(recuadro[0].get_rect(topleft = recuadro[1]))
+            self.dibujado = dibujado
 
-    def ejecutar(self):
-        """Ejecutar el modelo"""
-        self.resetear()
-        self.configurar()
-        self.resolver()
+    def dibujar(self):
+        """Dibujar el recuadro de ayuda en pantalla, donde se colocó (ver actualizar)"""
+        if self.dibujado:
+            g_pantalla.blit(*self.dibujado)
 
 # < -------------------------------------------------------------------------- >
 #                         FUNCIONES AUXILIARES INTERFAZ
@@ -2453,6 +2246,61 @@ def entre(n, a, b):
     """Mete el numero n en el intervalo [a, b]"""
     return min(max(a, n), b)
 
+def redibujar(rect = None):
+    """Marcar una zona de la pantalla (o toda ella) para actualizarla al final del fotograma (ver siguiente_fotograma)"""
+    g_zonas.append(pygame.Rect(rect).inflate(2, 2) if rect is not None else g_pantalla.get_rect())
+
+@functools.lru_cache(maxsize = 8192)
+def ancho_palabra(fuente, palabra):
+    """Anchura en píxeles de una palabra con la fuente dada. Cada palabra se mide una sola vez."""
+    return fuente.size(palabra)[0]
+
+@functools.lru_cache(maxsize = 512)
+def partir_lineas(texto, fuente, max_ancho):
+    """
+    Dividir el texto en líneas que no superen la anchura máxima, respetando los saltos de
+    línea. La anchura de cada línea se estima sumando la de sus palabras y espacios, y sólo
+    se mide la línea completa cuando la estimación queda cerca del límite (el interletrado
+    y la negrita hacen que no coincidan exactamente), así que el coste es lineal. El
+    resultado se memoriza: volver a partir el mismo texto con la misma fuente no cuesta nada.
+    """
+    espacio = ancho_palabra(fuente, ' ')
+    margen = max_ancho // 10 + 4 # Error máximo de la estimación
+    lineas = []
+    linea_actual, ancho_actual = "", 0
+
+    def cabe(palabra, ancho):
+        """Si la palabra (de la anchura dada) cabe en la línea actual"""
+        estimacion = ancho_actual + ancho
+        if abs(estimacion - max_ancho) > margen:
+            return estimacion <= max_ancho
+        return fuente.size(linea_actual + palabra)[0] <= max_ancho
+
+    for palabra in texto.split(' '):
+        if '\n' in palabra:
+            sub_palabras = palabra.split('\n')
+            for sub_palabra in sub_palabras[:-1]:
+                if cabe(sub_palabra, ancho_palabra(fuente, sub_palabra)):
+                    linea_actual += sub_palabra + " "
+                else:
+                    lineas.append(linea_actual)
+                    linea_actual = sub_palabra + " "
+                lineas.append(linea_actual)
+                linea_actual, ancho_actual = "", 0
+            linea_actual = sub_palabras[-1] + " "
+            ancho_actual = ancho_palabra(fuente, sub_palabras[-1]) + espacio
+        else:
+            ancho = ancho_palabra(fuente, palabra)
+            if cabe(palabra, ancho):
+                linea_actual += palabra + " "
+                ancho_actual += ancho + espacio
+            else:
+                lineas.append(linea_actual)
+                linea_actual = palabra + " "
+                ancho_actual = ancho + espacio
+    lineas.append(linea_actual)
+    return tuple(lineas)
+
 def cambiar_musica():
     """Mutear o no la música de fondo"""
     if g_config['musica']:
@@ -2468,10 +2316,6 @@ def emitir_error(texto = None):
         g_info.error(texto)
     reproducir_sonido('error', 'interfaz')
 
-def emitir_fin():
-    """Mensaje de error a emitir cuando la partida ya ha concluido"""
-    emitir_error('La partida ya ha terminado, pulsa "Reiniciar" para comenzar otra')
-
 # < -------------------------------------------------------------------------- >
 #                       ACTUALIZACION DEL ESTADO DEL JUEGO
 # < -------------------------------------------------------------------------- >
@@ -2480,84 +2324,59 @@ def actualizar_fondo():
     """Dibujar el fondo (primera capa del display)"""
     g_pantalla.fill(COLOR_FONDO)
 
+def componer(zonas):
+    """
+        Dibujar de nuevo sólo las zonas de la pantalla que han cambiado (ver redibujar). En cada
+        una se recorta la pantalla a ella y se dibujan el fondo y, por orden, las capas que la tocan;
+        el resto de la pantalla se queda como estaba en el fotograma anterior.
+    """
+    pantalla = g_pantalla.get_rect()
+    if any(zona.contains(pantalla) for zona in zonas):
+        zonas = [pantalla]
+    for zona in zonas:
+        g_pantalla.set_clip(zona)
+        actualizar_fondo()
+        if g_fase == 'Pantallazo':
+            dibujar_pantallazo()
+        elif g_fase == 'Reglas':
+            g_reglas.dibujar()
+        else:
+            dibujar_interfaz(zona)
+        g_perfil.dibujar()
+    g_pantalla.set_clip(None)
+
 def siguiente_fotograma():
     """Avanzar fotograma"""
-    pygame.display.flip()   # Renderizar fotograma en pantalla y cambiar buffer
-    g_reloj.tick(FPS)       # Avanzar reloj y limitar frecuencia de fotogramas
-
-def siguiente_jugador():
-    """Cambiar de turno"""
-    global g_jugador, g_adversario
-    if g_fase == 'Final':
-        emitir_fin()
-        return
-    if not g_jugador:
-        g_jugador = g_jugadores[0]
-        g_adversario = g_jugadores[1]
-    elif verificar_turno():
-        g_jugador, g_adversario = g_adversario, g_jugador
-    else:
-        return
-    g_info.info(f"Turno del jugador {g_jugador.indice + 1}")
-    g_info.actualizar_texto()
-    g_tienda.actualizar_textos()
-    g_escenario.renderizar()
-    if g_paso:
-        resetear_paso()
+    with g_perfil.etapa('pantalla'):
+        if g_zonas:
+            pygame.display.update(g_zonas) # Llevar a pantalla sólo las zonas que han cambiado
+            g_zonas.clear()
+    with g_perfil.etapa('reloj'):
+        g_reloj.tick(FPS)                  # Avanzar reloj y limitar frecuencia de fotogramas
+
+def leer_eventos(esperar):
+    """
+        Eventos pendientes de la interfaz. Si el fotograma anterior no tuvo actividad
+        (ni entrada del usuario ni cambios en el motor), se bloquea hasta que llegue
+        un evento o pase ESPERA_INACTIVO, para no consumir CPU con la partida parada.
+    """
+    eventos = []
+    if esperar:
+        with g_perfil.etapa('espera'):
+            evento = pygame.event.wait(ESPERA_INACTIVO)
+        if evento.type != pygame.NOEVENT:
+            eventos.append(evento)
+    eventos.extend(pygame.event.get())
+    return eventos
 
 def siguiente_fase():
-    """Avanzar a la siguiente fase del juego"""
+    """Avanzar a la siguiente fase de la interfaz. Al llegar a la partida, ésta comienza."""
     global g_fase
     indice = g_fases.index(g_fase)
     if indice < len(g_fases) - 1:
-        cambiar_fase(g_fases[indice + 1])
-    else:
-        resetear_fase()
-
-def cambiar_fase(nombre):
-    """Cambiar a otra fase del juego"""
-    global g_fase
-    if nombre in g_fases:
-        g_fase = nombre
-        if g_fase not in ['Pantallazo', 'Reglas']:
-            g_info.info(f'Iniciada fase "{nombre}"')
-            g_info.actualizar_texto()
-        return True
-    return False
-
-def resetear_fase():
-    """Volver a la primera fase del juego"""
-    cambiar_fase('Preparación')
-
-def siguiente_paso(manual = True):
-    """Avanzar al siguiente paso del turno"""
-    if g_fase == 'Final':
-        emitir_fin()
-        return
-    if g_fase != 'Principal':
-        emitir_error('Sólo la fase principal tiene pasos')
-        return
-    global g_paso
-    indice = g_pasos.index(g_paso)
-    if indice < len(g_pasos) - 1:
-        cambiar_paso(g_pasos[indice + 1])
-    elif manual:
-        emitir_error('Ya no hay más pasos, juega para cambiar de turno')
-
-def cambiar_paso(nombre):
-    """Cambiar a otro paso del turno"""
-    global g_paso, g_paso_listo
-    if nombre in g_pasos:
-        g_paso = nombre
-        g_info.info(f'Iniciado paso "{nombre}"')
-        g_info.actualizar_texto()
-        g_paso_listo = False
-        return True
-    return False
-
-def resetear_paso():
-    """Volver al primer paso del turno"""
-    cambiar_paso('Reporte')
+        g_fase = g_fases[indice + 1]
+        if g_fase == 'Partida':
+            g_partida.comenzar()
 
 def actualizar_variables():
     """Actualizacion de variables en cada fotograma"""
@@ -2569,190 +2388,61 @@ def actualizar_interfaz():
     """Actualizar los paneles y el contenido del escenario, tienda e información"""
     # Actualizar estado sólo si el escenario es visible
     if not g_reglas.visible:
-        if g_fase != 'Final':
-            g_escenario.actualizar()
-            g_tienda.actualizar()
-        g_info.actualizar()
-
-    # Dibujar contenido de los paneles
-    g_escenario.dibujar()
-    g_tienda.dibujar()
-    g_info.dibujar()
+        if g_partida.fase != 'Final':
+            with g_perfil.etapa('escenario'):
+                g_escenario.actualizar()
+            with g_perfil.etapa('tienda'):
+                g_tienda.actualizar()
+        with g_perfil.etapa('informacion'):
+            g_info.actualizar()
 
     # Paneles adicionales opcionales
-    if g_fase != 'Final':
-        g_ayuda.dibujar()
+    if g_escenario.casilla_sobre:
+        g_escenario.casilla_sobre.ayuda()
+    if g_partida.fase == 'Final':
+        g_ayuda.ocultar()
+    g_ayuda.actualizar()
     if g_reglas.visible:
         actualizar_fase_reglas()
 
-def actualizar_fase_pantallazo():
+def dibujar_interfaz(zona):
+    """Dibujar los paneles de la partida que tocan una zona de la pantalla, y encima los adicionales (ver componer)"""
+    for contenido in (g_escenario, g_tienda, g_info):
+        if contenido.panel.rect.colliderect(zona):
+            contenido.dibujar()
+    g_ayuda.dibujar()
+    g_reglas.dibujar()
+
+def dibujar_pantallazo():
     """Dibujar pantallazo inicial"""
     x = (g_pantalla.get_width() - g_pantallazo.get_width()) / 2
     y = (g_pantalla.get_height() - g_pantallazo.get_height()) / 2
     g_pantalla.blit(g_pantallazo, (x, y))
 
 def actualizar_fase_reglas():
-    """Dibujar pantallazo reglas"""
+    """Actualizar el pantallazo de reglas"""
     g_reglas.mostrar()
     g_reglas.actualizar()
-    g_reglas.dibujar()
-
-def actualizar_fase_preparacion():
-    """Actualizar estado en la fase preparatoria"""
-    if not g_jugador:
-        siguiente_jugador()
-
-    # Saltar la fase preparatoria, para testear
-    if SALTAR_PREPARACION or g_jugador.ia:
-        g_jugador.preparar()
-        siguiente_jugador()
-        return
-
-    # Actualizar paneles y contenido del escenario, tienda e información
-    actualizar_interfaz()
-
-def actualizar_fase_principal():
-    """Actualizar estado en la fase de turnos"""
-    # Comenzamos el primer paso si acabamos de iniciar la fase
-    if not g_paso:
-        cambiar_paso('Reporte')
-    if not g_jugador:
-        siguiente_jugador()
-
-    # Actualizar paneles y contenido del escenario, tienda e información
-    actualizar_interfaz()
 
-    # Actualizar paso específico del turno, si hace falta
-    if g_paso_listo:
-        return
-    if g_paso == 'Reporte':
-        actualizar_paso_reporte()
-    elif g_paso == 'Inteligencia':
-        actualizar_paso_inteligencia()
-    elif g_paso == 'Ingresos':
-        actualizar_paso_ingresos()
-    elif g_paso == 'Recursos':
-        actualizar_paso_recursos()
-    elif g_paso == 'Despliegue':
-        actualizar_paso_despliegue()
-
-def actualizar_fase_final():
-    """Actualizar estado en la fase final (partida terminada)"""
+def actualizar_fase_partida():
+    """Ejecutar la lógica automática de la partida (preparación, pasos del turno...) y actualizar la interfaz"""
+    with g_perfil.etapa('ia' if g_partida.jugador and g_partida.jugador.ia else 'motor'):
+        g_partida.actualizar()
     actualizar_interfaz()
 
-def actualizar_paso_reporte():
-    """Desarrollar el paso de reporte. El jugador recibe un reporte
-    informativo del movimiento del adversario."""
-    global g_paso_listo
-    for reporte in set(g_jugador.reporte):
-        g_info.reporte(reporte)
-    g_jugador.validar_reporte()
-    g_paso_listo = True
-
-def actualizar_paso_inteligencia():
-    """Desarrollar el paso de inteligencia. El jugador recibe información adicional
-    en función del nivel de inteligencia que haya adquirido."""
-    global g_paso_listo
-    if g_jugador.inteligencia >= 1:
-        g_info.intel(f'I1: Tu adversario ha cosechado {g_adversario.cosechado}M€')
-    if g_jugador.inteligencia >= 2:
-        nivel_capital  = [str(infra.nivel) for infra in g_adversario.infraestructuras if type(infra) is Capital][0]
-        nivel_ciudades = ', '.join([str(infra.nivel) for infra in g_adversario.infraestructuras if type(infra) is Ciudad])
-        nivel_bases    = ', '.join([str(infra.nivel) for infra in g_adversario.infraestructuras if type(infra) is Base])
-        g_info.intel(f'I2: Infraestructuras adversarias: Capital ({nivel_capital}), Ciudades ({nivel_ciudades}), Bases ({nivel_bases}).')
-    if g_jugador.inteligencia >= 3:
-        medios_aereos      = sum(1 for medio in g_adversario.medios if isinstance(medio, MedioAereo))
-        medios_desplegados = sum(1 for medio in g_adversario.medios if isinstance(medio, MedioAereo) and medio.desplegado)
-        medios_antiaereos  = sum(1 for medio in g_adversario.medios if isinstance(medio, MedioAntiaereo))
-        g_info.intel(f'I3: Medios adversarios: Aéreos ({medios_aereos}, {medios_desplegados} desplegados), Anti-aéreos ({medios_antiaereos})')
-    if g_jugador.inteligencia >= 4:
-        if len(g_adversario.medios) == 0:
-            g_info.intel('I4: Tu adversario no tiene medios')
-        else:
-            medio = random.sample(g_adversario.medios, 1)[0]
-            estado = '' if isinstance(medio, MedioAntiaereo) else ' desplegado' if medio.desplegado else ' estacionado'
-            g_info.intel(f'I4: Tu adversario tiene un {medio.NOMBRE}{estado} en la casilla {medio.casilla.id()}')
-    if g_jugador.inteligencia >= 5:
-        g_info.intel(f'I5: Tu adversario tiene inteligencia de nivel {g_adversario.inteligencia}')
-    g_paso_listo = True
-
-def actualizar_paso_ingresos():
-    """Desarrollar el paso de ingresos. El jugador cosecha crédito adicional gracias
-    a las casillas en las que tenga superioridad / supremacia aérea, así como sus ciudades."""
-    global g_paso_listo
-    g_jugador.cosechar()
-    g_paso_listo = True
-
-def actualizar_paso_recursos():
-    """Desarrollar el paso de recursos. El jugador invierte crédito en adquirir medios
-    aéreos, antiaéreos o estratégicos - como inteligencia o infraestructuras.
-    Sólo hay que hacer algo automáticamente en el caso del jugador IA"""
-    if not g_jugador.ia:
-        return
-    global g_paso_listo
-    g_jugador.ia_compra()
-    g_paso_listo = True
-
-def actualizar_paso_despliegue():
-    """Desarrollar el paso de despliegue y ataque. El jugador moviliza aeronaves en alguna casilla.
-    Sólo hay que hacer algo automáticamente en el caso del jugador IA"""
-    if not g_jugador.ia:
-        return
-    global g_paso_listo
-    g_jugador.ia_movimiento()
-    g_jugador.ia_ataque()
-    g_paso_listo = True
-
-def verificar_turno():
-    """Comprobar que el jugador ha realizado un turno válido y podemos pasar al siguiente"""
-    if g_fase == "Preparación":
-        # Verificar que se han construido las infraestructuras iniciales necesarias
-        cantidades = { Capital: 0, Ciudad: 0, Base: 0 }
-        for infra in g_jugador.infraestructuras:
-            cantidades[type(infra)] += 1
-        if cantidades[Capital] < Capital.CANTIDAD or cantidades[Ciudad] < Ciudad.CANTIDAD or cantidades[Base] < Base.CANTIDAD:
-            emitir_error(f"Necesitas {Capital.CANTIDAD} capital, {Ciudad.CANTIDAD} ciudades y {Base.CANTIDAD} bases aéreas.")
-            return False
-        g_jugador.preparado = True
-    elif g_fase == 'Principal':
-        # Actualizar los medios aéreos del jugador (turnos, aterrizajes automáticos...)
-        for medio in g_jugador.medios:
-            if isinstance(medio, MedioAereo):
-                medio.actualizar()
-        # Llevar a cabo vigilancias de los medios del adversario
-        for medio in g_adversario.medios:
-            medio.vigilar()
-    return True
-
 def resetear():
     """
         Resetear la partida por completo.
         Tenemos que reinicializar todos los objetos del juego.
         El orden puede ser importante.
     """
-    global g_jugador
-    for jugador in g_jugadores:
-        jugador.resetear()
+    g_partida.resetear()
     g_reglas.resetear()
     g_escenario.resetear()
     g_tienda.resetear()
     g_info.resetear()
-    resetear_fase()
-    g_jugador = None
-    siguiente_jugador()
-
-def terminar():
-    """Terminar la partida, realizar el conteo de puntos y determinar el ganador"""
-    if g_fase == 'Final':
-        emitir_fin()
-        return
-    cambiar_fase('Final')
-    g_info.info('Partida terminada')
-    puntos = [jugador.puntuar() for jugador in g_jugadores]
-    if puntos[0] == puntos[1]:
-        g_info.info('¡Los jugadores han empatado!')
-    else:
-        g_info.info(f'¡Victoria para el jugador {puntos.index(max(puntos)) + 1}!')
+    g_partida.comenzar()
+    redibujar()
 
 def salir():
     pygame.event.post(pygame.event.Event(pygame.QUIT))
@@ -2761,6 +2451,13 @@ def salir():
 #                           INICIALIZACIÓN DEL JUEGO
 # < -------------------------------------------------------------------------- >
 
+# Mostrar el pantallazo cuanto antes, y cargar el resto de recursos mientras se ve
+actualizar_fondo()
+dibujar_pantallazo()
+pygame.display.flip()
+cronometrar('Pantallazo mostrado')
+precargar_recursos()
+
 # Comenzar musica
 pygame.mixer.music.set_volume(MUSICA_VOLUMEN if MUSICA_REPRODUCIR else 0)
 pygame.mixer.music.play(-1)
@@ -2774,23 +2471,24 @@ paneles = {
 }
 
 # Inicializar variables globales para que estén disponibles
-g_fase       = None  # Fase actual del juego
-g_paso       = None  # Paso actual de la fase principal
-g_paso_listo = False # Indica que el paso ha concluido
-g_jugador    = None  # Jugador actual
-g_adversario = None  # Jugador contrincante
+g_fase       = None  # Fase actual de la interfaz
+g_partida    = None  # Estado de la partida (motor del juego)
 g_reglas     = None  # Paginador de reglas
 g_escenario  = None  # Casillas del mapa y su contenido
 g_info       = None  # Panel informativo inferior
 g_tienda     = None  # Tienda de productos
 
-# Fases y pasos del juego. Los pasos son las distintas etapas en las que se divide un turno.
-g_fases = ['Pantallazo', 'Reglas', 'Preparación', 'Principal', 'Final']
-g_pasos = ['Reporte', 'Inteligencia', 'Ingresos', 'Recursos', 'Despliegue']
-cambiar_fase('Pantallazo')
+# Fases de la interfaz. Tras el pantallazo y las reglas comienza la partida, que
+# tiene sus propias fases y pasos (ver Partida.FASES y Partida.PASOS en el motor).
+g_fases = ['Pantallazo', 'Reglas', 'Partida']
+g_fase  = 'Pantallazo'
 
-# Jugadores de la partida
-g_jugadores  = [Jugador(False), Jugador(not MULTIJUGADOR)]
+# Decisiones de la IA de sesiones anteriores
+if GUARDAR_DECISIONES:
+    g_decisiones.cargar(FICHERO_DECISIONES)
+
+# Partida, con sus jugadores y tablero
+g_partida = Partida(ia = (False, not MULTIJUGADOR), vista = VistaPygame(), saltar_preparacion = SALTAR_PREPARACION, asincrona = True)
 
 # Principales partes de la interfaz (no cambiar estas líneas de orden!)
 g_reglas    = Reglamento()
@@ -2807,43 +2505,84 @@ g_config = {
 g_ayuda = Ayuda('')
 g_raton = pygame.mouse.get_pos()
 g_click = False
+g_rueda = 0
+g_activo = True # Si en el último fotograma hubo entrada del usuario o cambios en la partida
+fase_dibujada = None # Fase de la interfaz dibujada en el último fotograma
+cronometrar('Interfaz creada')
 
 # < -------------------------------------------------------------------------- >
 #                          BUCLE PRINCIPAL DEL JUEGO
 # < -------------------------------------------------------------------------- >
 
 while True:
+    g_perfil.comenzar()
+
     # Escanear eventos (pulsaciones de teclas, movimientos de ratón, etc)
     cerrar = False
     g_click = False
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            cerrar = True
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            g_click = True
+    g_rueda = 0
+    with g_perfil.etapa('eventos'):
+        eventos = leer_eventos(not g_activo)
+        for event in eventos:
+            if event.type == pygame.QUIT:
+                cerrar = True
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                g_click = True
+            elif event.type == pygame.MOUSEWHEEL:
+                g_rueda += event.y
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                redibujar()
+            elif event.type == pygame.KEYDOWN and event.key == TECLA_PERFIL:
+                g_perfil.alternar()
+            elif event.type == pygame.KEYDOWN and event.key == TECLA_PERFIL_CSV:
+                g_perfil.guardar(FICHERO_PERFIL)
     if cerrar:
+        g_partida.cancelar()
+        if GUARDAR_REPETICION and g_partida.grabacion:
+            g_partida.grabacion.guardar(FICHERO_REPETICION)
+        if GUARDAR_PERFIL:
+            g_perfil.guardar(FICHERO_PERFIL)
+        if GUARDAR_DECISIONES:
+            try:
+                os.makedirs(CARPETA_CACHE, exist_ok=True)
+                g_decisiones.guardar(FICHERO_DECISIONES)
+            except OSError:
+                pass # Simplemente se volverán a calcular en la siguiente sesión
+        if INFORME_AMPL:
+            for linea in g_modelos.informe():
+                print(f'[AMPL] {linea}')
         pygame.quit()
         break
 
-    actualizar_variables() # Inicializar estado
-    actualizar_fondo()     # Colorear fondo
+    with g_perfil.etapa('variables'):
+        actualizar_variables()            # Inicializar estado
+        precargado = cargar_precargados() # Crear los recursos leídos en segundo plano, uno por fotograma
+    firma = g_partida.firma()
+    g_partida.vista.actividad = False
+
+    # Al cambiar de fase de la interfaz cambia toda la pantalla
+    if g_fase != fase_dibujada:
+        fase_dibujada = g_fase
+        redibujar()
 
     # Ejecutar cada fase del juego
     if g_fase == 'Pantallazo':            # Pantallazo inicial
-        actualizar_fase_pantallazo()
         if g_click:
             siguiente_fase()
     elif g_fase == 'Reglas':              # Pantallazo de reglas
         actualizar_fase_reglas()
         if not g_reglas.visible:
             siguiente_fase()
-    elif g_fase == 'Preparación':         # Fase preparativa inicial
-        actualizar_fase_preparacion()
-        if sum(1 for jugador in g_jugadores if jugador.preparado) == 2:
-            siguiente_fase()
-    elif g_fase == 'Principal':           # Fase central del juego
-        actualizar_fase_principal()
-    else:
-        actualizar_fase_final()           # Partida terminada
-
-    siguiente_fotograma()
\ No newline at end of file
+    else:                                 # Partida (preparación, turnos y final)
+        actualizar_fase_partida()
+    g_perfil.actualizar(paneles['escenario'].rect.move(10, 10).topleft)
+
+    # Dibujar sólo lo que ha cambiado
+    with g_perfil.etapa('dibujo'):
+        componer(g_zonas)
+
+    # Sin entrada ni cambios en la partida, el siguiente fotograma puede esperar a que pase algo
+    # (mientras la IA piensa no, para aplicar su decisión en cuanto esté lista, ni mientras se precargan recursos)
+    g_activo = bool(eventos) or g_partida.vista.actividad or g_partida.firma() != firma or g_partida.pensando() or precargado
+    siguiente_fotograma()
+    g_perfil.terminar()
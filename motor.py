@@ -0,0 +1,2564 @@
+# Motor de reglas del juego de estrategia que acompaña al Trabajo de Fin de Grado
+# A.A. Daniel García Cañada (2025)
+#
+# Este módulo contiene toda la lógica del juego (medios, casillas, jugadores,
+# fases y pasos) sin ninguna dependencia de PyGame. De esta manera se pueden
+# simular partidas completas sin pantalla, audio ni texto. La interfaz gráfica
+# (juego.py) es simplemente una vista sobre este motor.
+#
+# Indice del código:
+#   - Constantes:
+#       Parámetros generales que controlan las reglas del juego.
+#   - Clases de los medios:
+#       Medios aéreos, antiaéreos y estratégicos (infraestructuras).
+#   - Clases del mapa:
+#       Casillas y tablero, con su superioridad aérea.
+#   - Clases de la partida:
+#       Jugadores y estado general de la partida (fases, pasos, turnos).
+#   - Programación lineal:
+#       Modelos de AMPL empleados por la IA.
+#   - Repeticiones:
+#       Grabación de las órdenes de una partida para reproducirla sin interfaz.
+
+import concurrent.futures # Resultado de la IA pensando en segundo plano
+import copy        # Copias profundas del estado (fotogramas clave de las repeticiones)
+import collections # Diccionario ordenado para la caché de decisiones de la IA
+import functools   # Decoradores
+import hashlib     # Claves de la caché de decisiones de la IA
+import itertools   # Índices de los parámetros multidimensionales de AMPL
+import json        # Guardar y cargar repeticiones
+import math        # Operaciones y funciones matemáticas
+import numpy as np # Arrays para el estado del tablero y generador de números aleatorios
+import os          # Rutas de los ficheros de los modelos
+import re          # Separar las sentencias de los ficheros de datos de AMPL
+import sys         # Argumentos al reproducir una repetición desde la línea de comandos
+import threading   # La IA piensa en segundo plano sin bloquear la interfaz
+import time        # Medir la duración de las repeticiones
+import traceback   # Informar de los fallos de la IA pensando en segundo plano
+
+
+# < -------------------------------------------------------------------------- >
+#                            CONSTANTES GLOBALES
+# < -------------------------------------------------------------------------- >
+
+# Constantes generales del juego
+CREDITO_INICIAL = 500
+
+# Escenario
+MAPA_DIM_X = 25 # Anchura del mapa en casillas
+MAPA_DIM_Y = 15 # Altura del mapa en casillas
+MAPA_DIM_J = 11 # Número de columnas en propiedad inicial de cada jugador
+
+# Sistema de puntos y superioridad aerea
+COEF_SUP        = 20  # Coeficiente de sup aerea en una casilla normal
+SUP_INICIAL     = 0.1 # Proporción de casillas iniciales con supremacia (aleatorias)
+MULT_SUPREMACIA = 2   # Ratio entre superioridad y supremacia aerea
+
+# Modelos de programación lineal
+AMPL_COMPRA     = 'compra'      # Ficheros que contienen el modelo lineal para decidir qué comprar en cada turno
+AMPL_ATAQUE     = 'ataque_'     # Ídem para elegir los objetivos de los ataques, uno por medio aéreo que puede atacar
+AMPL_POSICION   = 'pos_'        # Ídem para decidir dónde colocar cada medio o infraestructura comprada
+AMPL_MOVIMIENTO = 'mov_'        # Prefijo de los modelos que deciden el despliegue, uno por medio aéreo (ver Medio.MODELO)
+CARPETA_AMPL    = os.path.join('ampl', 'originales ampl') # Localización de los ficheros de los modelos (.mod y .dat)
+
+# Cómo se resuelve cada modelo: 'ampl' (intérprete de AMPL y solver) o 'nativo' (resolución exacta
+# en NumPy, sólo para los modelos que la tienen, ver RESOLUTORES_NATIVOS). Por defecto, 'ampl'.
+AMPL_RESOLUCION = {
+    AMPL_COMPRA: 'nativo',
+    **{AMPL_MOVIMIENTO + medio: 'nativo' for medio in ('caza', 'ataque', 'transporte', 'heli', 'dron')},
+    **{AMPL_ATAQUE + medio: 'nativo' for medio in ('caza', 'ataque', 'heli', 'dron')},
+    **{AMPL_POSICION + medio: 'nativo' for medio in ('caza', 'ataque', 'transporte', 'heli', 'dron', 'radar', 'bateria', 'ciudad', 'base')},
+}
+DECISIONES_MAXIMO = 4096 # Soluciones de los modelos que se recuerdan, por sus parámetros (ver CacheDecisiones)
+
+# Repeticiones
+REPETICION_INTERVALO = 10 # Turnos entre fotogramas clave (copias completas del estado) de una repetición
+
+# < -------------------------------------------------------------------------- >
+#                            FUNCIONES AUXILIARES
+# < -------------------------------------------------------------------------- >
+
+def orden(metodo):
+    """
+        Decorador para las acciones que cambian el estado de la partida (comprar, desplegar,
+        pasar turno...). Si la acción no se ejecuta dentro de otra, se añade a la grabación.
+    """
+    @functools.wraps(metodo)
+    def envoltorio(self, *args):
+        partida = self if isinstance(self, Partida) else self.partida
+        grabar = partida.grabacion is not None and partida.profundidad == 0
+        if grabar:
+            registro = partida.grabacion.codificar(self, metodo.__name__, args)
+        partida.profundidad += 1
+        try:
+            resultado = metodo(self, *args)
+        finally:
+            partida.profundidad -= 1
+        if grabar:
+            partida.grabacion.registrar(registro, partida)
+        return resultado
+    return envoltorio
+
+def orden_automatica(metodo):
+    """
+        Como orden, pero para la lógica automática que se ejecuta cada fotograma (Partida.actualizar).
+        Sólo se graba si ha cambiado algo, para que la grabación no crezca con cada fotograma.
+    """
+    @functools.wraps(metodo)
+    def envoltorio(self, *args):
+        grabar = self.grabacion is not None and self.profundidad == 0
+        firma = self.firma()
+        self.profundidad += 1
+        try:
+            resultado = metodo(self, *args)
+        finally:
+            self.profundidad -= 1
+        if grabar and self.firma() != firma:
+            self.grabacion.registrar(self.grabacion.codificar(self, metodo.__name__, args), self)
+        return resultado
+    return envoltorio
+
+# < -------------------------------------------------------------------------- >
+#                             CLASES DE LOS MEDIOS
+# < -------------------------------------------------------------------------- >
+
+class Medio:
+    """Clase genérica que representa cualquier medio militar"""
+    NOMBRE        = None # Nombre del medio
+    DESC          = None # Breve descripción informativa
+    PRECIO        = None # Precio de compra (M€)
+    PRECIO_MEJORA = None # Precio de mejora - sólo para infraestructuras (M€)
+    VELOCIDAD     = None # Velocidad de avance de un medio aéreo (casillas por turno)
+    AUTONOMIA     = None # Tiempo que puede permanecer fuera de la base un medio aéreo (turnos)
+    ALCANCE       = None # Distancia de la base que puede recorrer un medio aéreo (turnos)
+    HUELLA        = None # Probabilidad de ser captado por una vigilancia (%)
+    DIST_AIRE     = None # Distancia a la que puede derribar un medio aéreo (casillas)
+    DIST_SUP      = None # Distancia a la que puede derribar un medio anti-aéreo (casillas)
+    VIGILANCIA    = None # Probabilidad de captar un medio aéreo con radar (%)
+    RADIOVIG      = None # Distancia a la que puede vigilar otros medios aéreos (casillas)
+    SUPAEREA      = None # Peso del medio a la hora de aportar superioridad aérea (puntos)
+    MODELO        = None # Sufijo del nombre de los modelos de AMPL de la IA para este medio (p. ej. mov_caza)
+
+    def __init__(self, jugador, casilla = None):
+        self.jugador = jugador
+        self.casilla = casilla
+        self.partida = jugador.partida
+
+    def actualizar(self):
+        """
+            Prototipo de función que realiza la lógica interna de cada medio
+            Cada tipo de medio debería implementar la suya propia
+        """
+        pass
+
+class MedioAtaque(Medio):
+    """Representa cualquier medio con la capacidad de atacar, ya sea aéreo o anti-aéreo"""
+    ESCALA = 50.0 # Kilómetros por casilla, para convertir los datos
+
+    def __init__(self, jugador, casilla):
+        super().__init__(jugador, casilla)
+        self.ataque_aire = self.DIST_AIRE and self.DIST_AIRE > 0 # Tiene la capacidad de atacar a medios aéreos
+        self.ataque_sup  = self.DIST_SUP  and self.DIST_SUP  > 0 # Tiene la capacidad de atacar a medios en superficie
+        self.vigilancia  = self.RADIOVIG  and self.RADIOVIG  > 0 # Tiene la capacidad de vigilar su entorno
+
+    def radio_ataque(self):
+        """Calcular el radio de ataque en casillas"""
+        # El medio no tiene la capacidad de atacar
+        if not self.ataque_aire and not self.ataque_sup:
+            return -1
+
+        # El medio es de ataque aéreo (p. ej. Caza)
+        if self.ataque_aire:
+            return math.ceil(self.DIST_AIRE / self.ESCALA)
+
+        # El medio es de ataque superficie (p. ej. Helicóptero)
+        if self.ataque_sup:
+            return math.ceil(self.DIST_SUP / self.ESCALA)
+
+    def radio_vigilancia(self):
+        """Calcular el radio de vigilancia en casillas"""
+        if not self.vigilancia:
+            return -1
+        return math.ceil(self.RADIOVIG / self.ESCALA)
+
+    def destruir(self, manual, verdugo):
+        """
+            Destruir el medio como consecuencia de un ataque.
+            El ataque manual es el efectuado por aeronaves. El automático es el efectuado por medios antiaéreos.
+        """
+
+        # Si se trata de un medio aéreo, ejercer puntos de superioridad
+        if isinstance(self, MedioAereo):
+            self.casilla.ejercer(self.sup)
+
+        # Reportar información (ahora o después) a ambos jugadores
+        mensaje = f"Derribado {self.NOMBRE} enemigo con {verdugo.NOMBRE} en casilla {self.casilla.id()}"
+        if manual:
+            self.partida.mensaje('medio', mensaje)
+        else:
+            verdugo.jugador.reportar(mensaje)
+        self.jugador.reportar(f"Tu {self.NOMBRE} fue derribado en la casilla {self.casilla.id()}")
+
+        # Eliminar medio del juego
+        self.partida.tablero.retirar(self)
+        self.jugador.medios.remove(self)
+        for medio in self.jugador.adversario().medios:
+            if isinstance(medio, MedioAereo) and medio.detectado(self):
+                medio.detectores.remove(self)
+        self.partida.evento('destruir', self)
+
+    def puntuar(self):
+        """Devolver los puntos AIRGAME otorgados por este medio"""
+        return self.SUPAEREA
+
+class MedioEstrategico(Medio):
+    """Representa cualquier medio estratégico (inteligencia, infraestructuras)"""
+
+class MedioAereo(MedioAtaque):
+    """Representa cualquier medio aéreo"""
+
+    def __init__(self, jugador, casilla):
+        super().__init__(jugador, casilla)
+        self.base = self.casilla
+        self.detectores = [] # Lista de medios que han detectado a este medio
+        self.resetear()
+
+    def resetear(self):
+        """Inicializar los valores del medio"""
+        self.casilla    = self.base # La casilla en la que este medio está actualmente
+        self.desplegado = False     # Si este medio está actualmente desplegado
+        self.turnos     = 0         # Número de turnos desde que este medio fue desplegado
+        self.atacado    = False     # Si este medio ha atacado ya en este turno
+        self.sup        = 0         # Puntos de superioridad acumulados
+
+    def alcance(self):
+        """Calcular el alcance en casillas"""
+        return  math.ceil((self.ALCANCE / 200) - 2)
+
+    def autonomia(self, casilla = None):
+        """
+            Calcular la autonomía en turnos, que depende de la distancia a la base.
+            Si no se pasa una casilla, se toma la casilla actual.
+        """
+        distancia = self.base.distancia(casilla or self.casilla)
+        alcance = self.alcance()
+        if distancia > alcance:
+            return -1
+        return math.ceil(self.AUTONOMIA * (1 - distancia / alcance))
+
+    def autonomias(self):
+        """Autonomía en turnos para todas las casillas del mapa a la vez (-1 si están fuera de alcance)"""
+        distancias = self.partida.tablero.distancias_desde(self.base)
+        alcance = self.alcance()
+        autonomias = np.ceil(self.AUTONOMIA * (1 - distancias / alcance)).astype(int)
+        return np.where(distancias > alcance, -1, autonomias)
+
+    def validar_despliegue(self):
+        """Comprobar si el medio puede desplegarse en este momento, sea cual sea la casilla"""
+        if self.partida.paso != 'Despliegue':
+            self.partida.error('Sólo se pueden desplegar medios aéreos en el paso de despliegue')
+            return False
+        if self.desplegado:
+            self.partida.error(f'Este {self.NOMBRE} ya está desplegado')
+            return False
+        if len(self.base.infraestructura.avos_desplegados()) >= self.base.infraestructura.nivel:
+            self.partida.error(f'Ya no puedes desplegar más medios desde esta base')
+            return False
+        return True
+
+    @orden
+    def desplegar(self, casilla):
+        """Desplegar el medio aéreo en la casilla. Devuelve si se ha podido desplegar."""
+        # Realizar chequeos para asegurarnos de que el despliegue es posible
+        if not self.validar_despliegue():
+            return False
+
+        # Chequeamos que la casilla es correcta
+        radio = self.alcance()
+        if self.casilla.distancia(casilla) > radio:
+            self.partida.error(f'Este medio tiene un alcance de {radio} casillas')
+            return False
+
+        # Realizamos el despliegue
+        self.partida.tablero.retirar(self)
+        self.desplegado = True
+        self.casilla = casilla
+        self.partida.tablero.registrar(self)
+        self.partida.mensaje('medio', f"{self.NOMBRE} desplegado en casilla {casilla.id()} (límite {self.autonomia()} turnos)")
+        self.partida.evento('medio', self)
+        return True
+
+    @orden
+    def aterrizar(self, auto = False):
+        """Retornar el medio aéreo a la base de origen"""
+        # Chequeos para asegurar que es posible aterrizar el medio
+        if self.partida.paso != 'Despliegue' and not auto:
+            self.partida.error('Sólo se pueden retornar medios aéreos en el paso de despliegue')
+            return False
+        if not self.desplegado:
+            self.partida.error(f'Este {self.NOMBRE} no está desplegado')
+            return False
+        if self.turnos == 0 and not auto:
+            self.partida.error('No puedes desplegar y aterrizar un medio en el mismo turno')
+            return False
+
+        # Aterrizar el avión (ejercer puntos de superioridad, resetear variables...)
+        self.partida.tablero.retirar(self)
+        self.desplegado = False
+        self.casilla.ejercer(self.sup)
+        self.partida.mensaje('medio', f"{self.NOMBRE} retornado{' automáticamente' if auto else ''}")
+        self.resetear()
+        self.partida.tablero.registrar(self)
+        self.partida.evento('medio', self)
+        return True
+
+    def validar_ataque(self):
+        """Comprobar si el medio puede atacar en este momento, sea cual sea la casilla"""
+        if not self.ataque_aire and not self.ataque_sup:
+            self.partida.error('Este medio no tiene capacidad de ataque')
+            return False
+        if self.partida.paso != 'Despliegue':
+            self.partida.error('Sólo se puede atacar con medios aéreos en el paso de despliegue')
+            return False
+        if not self.desplegado:
+            self.partida.error(f'Este {self.NOMBRE} no está desplegado')
+            return False
+        if self.atacado:
+            self.partida.error('Ya has atacado con este medio este turno')
+            return False
+        return True
+
+    @orden
+    def atacar(self, casilla):
+        """Usar el medio aéreo para atacar otra casilla. Devuelve si el ataque se ha llevado a cabo."""
+        # Chequeos para asegurar que el ataque es posible
+        if not self.validar_ataque():
+            return False
+
+        # Chequeamos que la casilla es correcta
+        radio = self.radio_ataque()
+        if self.casilla.distancia(casilla) > radio:
+            self.partida.error(f'Este medio tiene un radio de ataque de {radio} casillas')
+            return False
+
+        # Realizamos el ataque
+        self.atacado = True
+        adversario = self.jugador.adversario()
+        if self.ataque_aire:
+            medios = casilla.aereos(adversario, desplegados = True)
+        else:
+            medios = casilla.antiaereos(adversario)
+        if len(medios) == 0:
+            self.partida.mensaje('medio', f"Ataque fallido con {self.NOMBRE} en casilla {casilla.id()}")
+            adversario.reportar(f"Ataque adversario fallido a la casilla {casilla.id()}")
+            return True
+        for medio in medios:
+            medio.destruir(True, self)
+        return True
+
+    def detectar(self, medio):
+        """Hemos sido detectados por el medio"""
+        self.detectores.append(medio)
+        medio.jugador.reportar(f"Detectado {self.NOMBRE} enemigo en la casilla {self.casilla.id()}")
+        if type(medio) is Bateria:
+            self.destruir(False, medio)
+
+    def detectado(self, medio):
+        """Determinar si hemos sido detectados por el medio"""
+        return medio in self.detectores
+
+    def vigilado(self, medio):
+        """Determinar si estamos dentro del radio de vigilancia del medio"""
+        return self.casilla.distancia(medio.casilla) <= medio.radio_vigilancia()
+
+    def visible(self):
+        """
+            Devuelve si el medio es actualmente visible por el adversario porque
+            está dentro del radio de vigilancia de un medio que ya lo ha detectado
+        """
+        return sum(1 for medio in self.detectores if self.vigilado(medio)) > 0
+
+    def actualizar(self):
+        """Ejecutar lógica del medio aéreo"""
+        self.atacado = False
+        if self.desplegado:
+            if self.turnos < self.autonomia():
+                self.turnos += 1
+                self.sup += self.SUPAEREA
+            else:
+                self.aterrizar(True)
+
+class MedioAntiaereo(MedioAtaque):
+    """Representa cualquier medio anti-aéreo"""
+
+class AvionCaza(MedioAereo):
+    """Representa un avión de caza"""
+    NOMBRE     = "Avo. Caza"
+    DESC       = 'Único medio aéreo que puede atacar otros medios aéreos. El otro medio que puede hacerlo es la batería antiaérea.'
+    PRECIO     = 67
+    VELOCIDAD  = 2301
+    AUTONOMIA  = 1.42
+    ALCANCE    = 3269
+    HUELLA     = 13.12
+    DIST_AIRE  = 160
+    DIST_SUP   = 0
+    VIGILANCIA = 0
+    RADIOVIG   = 0
+    SUPAEREA   = 10
+    MODELO     = 'caza'
+
+class AvionAtaque(MedioAereo):
+    """Representa un avión de ataque"""
+    NOMBRE     = "Avo. Ataque"
+    DESC       = 'Medio aéreo capaz de atacar medios anti aéreos.'
+    PRECIO     = 142
+    VELOCIDAD  = 1363
+    AUTONOMIA  = 4.44
+    ALCANCE    = 6057
+    HUELLA     = 46
+    DIST_AIRE  = 0
+    DIST_SUP   = 1122.98
+    VIGILANCIA = 0
+    RADIOVIG   = 0
+    SUPAEREA   = 6
+    MODELO     = 'ataque'
+
+class AvionTransporte(MedioAereo):
+    """Representa un avión de transporte"""
+    NOMBRE     = "Avo. Transporte"
+    DESC       = 'Medio aéreo con más alcance.'
+    PRECIO     = 101
+    VELOCIDAD  = 785
+    AUTONOMIA  = 10.94
+    ALCANCE    = 8588
+    HUELLA     = 100
+    DIST_AIRE  = 0
+    DIST_SUP   = 0
+    VIGILANCIA = 0
+    RADIOVIG   = 0
+    SUPAEREA   = 3
+    MODELO     = 'transporte'
+
+class Helicoptero(MedioAereo):
+    """Representa un helicóptero"""
+    NOMBRE     = "Helicóptero"
+    DESC       = 'Único medio aéreo capaz de aterrizar en una casilla que no sea una base. Además es capaz de atacar medios anti aéreos.'
+    PRECIO     = 24
+    VELOCIDAD  = 290
+    AUTONOMIA  = 2
+    ALCANCE    = 597
+    HUELLA     = 20
+    DIST_AIRE  = 0
+    DIST_SUP   = 51
+    VIGILANCIA = 0
+    RADIOVIG   = 0
+    SUPAEREA   = 4
+    MODELO     = 'heli'
+
+class Dron(MedioAereo):
+    """Representa un dron"""
+    NOMBRE     = "Dron"
+    DESC       = 'Único medio aéreo con capacidad de vigilancia y con mayor autonomía, además es capaz de atacar medios anti aéreos.'
+    PRECIO     = 17
+    VELOCIDAD  = 450
+    AUTONOMIA  = 8
+    ALCANCE    = 3414
+    HUELLA     = 16.39
+    DIST_AIRE  = 0
+    DIST_SUP   = 51
+    VIGILANCIA = 32.78
+    RADIOVIG   = 230
+    SUPAEREA   = 2
+    MODELO     = 'dron'
+
+class Radar(MedioAntiaereo):
+    """Representa un radar"""
+    NOMBRE     = "Radar"
+    DESC       = 'Medio antiaéreo con el mayor alcance de vigilancia.'
+    PRECIO     = 48
+    DIST_AIRE  = 0
+    DIST_SUP   = 0
+    VIGILANCIA = 90
+    RADIOVIG   = 360
+    SUPAEREA   = 0
+    MODELO     = 'radar'
+
+class Bateria(MedioAntiaereo):
+    """Representa una batería anti-aérea"""
+    NOMBRE     = "Batería"
+    DESC       = 'Único medio antiaéreo con capacidad de vigilancia.'
+    PRECIO     = 206
+    DIST_AIRE  = 0
+    DIST_SUP   = 0
+    VIGILANCIA = 60
+    RADIOVIG   = 160
+    SUPAEREA   = 0
+    MODELO     = 'bateria'
+
+class Inteligencia(MedioEstrategico):
+    """Clase genérica para representar inteligencia"""
+    NOMBRE     = "Inteligencia"
+    PRECIO     = 50
+    DESC       = 'Medio estratégico que permite obtener diversa información sobre el adversario.'
+
+class Infraestructura(MedioEstrategico):
+    """Clase genérica que representa una infraestructura"""
+    INC     = 5   # Incremento del coeficiente de superioridad por cada nivel extra
+    BONUS   = 0   # Crédito (en M) otorgado al jugador por turno y nivel
+    NIVELES = 9   # Maximo nivel de una infraestructura
+    PRECIO  = 200 # Precio de construcción
+
+    def __init__(self, jugador, casilla):
+        super().__init__(jugador, casilla)
+        self.nivel = 1
+
+    @property
+    def nivel(self):
+        """Nivel de la infraestructura, guardado en el tablero junto al resto del estado de la casilla"""
+        return int(self.casilla.tablero.nivel[self.casilla.x, self.casilla.y])
+
+    @nivel.setter
+    def nivel(self, valor):
+        self.casilla.tablero.nivel[self.casilla.x, self.casilla.y] = valor
+
+    def destruir(self):
+        """Eliminar la infraestructura"""
+        self.casilla.infraestructura = None
+        if self in self.jugador.infraestructuras:
+            self.jugador.infraestructuras.remove(self)
+        self.partida.evento('casilla', self.casilla)
+
+    def mejorar(self):
+        """Mejorar el nivel y las propiedades de la infraestructura"""
+        if self.nivel == self.NIVELES:
+            self.partida.error(f'Esta {self.NOMBRE} ya está al máximo nivel')
+            return
+        if self.jugador.pagar(self.PRECIO_MEJORA):
+            self.nivel += 1
+            self.partida.sonido('construir')
+            self.partida.mensaje('medio', f'Has mejorado tu {self.NOMBRE} de la casilla {self.casilla.id()} a nivel {self.nivel}')
+            self.partida.evento('casilla', self.casilla)
+
+    def cosechar(self):
+        """Obtener el bonus económico que otorga la infraestructura"""
+        cantidad = self.BONUS * self.nivel
+        self.jugador.cobrar(cantidad)
+        return cantidad
+
+    def puntuar(self):
+        """Obtener los puntos AIRGAME correspondientes"""
+        return self.PUNTOS
+
+class Ciudad(Infraestructura):
+    """Infraestructura que otorga recursos al jugador"""
+    NOMBRE        = "Ciudad"
+    DESC          = "Infraestructura que cosecha recursos cada turno."
+    PRECIO_MEJORA = 100
+    SUP           = 40
+    BONUS         = 10
+    CANTIDAD      = 2
+    COLOR         = "#000000"
+    PUNTOS        = 30
+    MODELO        = 'ciudad'
+
+class Base(Infraestructura):
+    """Infraestructura que permite desplegar medios aéreos"""
+    NOMBRE        = "Base aérea"
+    DESC          = "Infraestructura que permite desplegar medios aéreos."
+    PRECIO_MEJORA = 150
+    SUP           = 60
+    CANTIDAD      = 3
+    COLOR         = "#00b050"
+    PUNTOS        = 50
+    MODELO        = 'base'
+
+    def avos(self):
+        """Devuelve la lista de medios aéreos del jugador correspondientes a esta base, estén donde estén"""
+        return [medio for medio in self.jugador.medios if isinstance(medio, MedioAereo) and medio.base is self.casilla]
+
+    def avos_desplegados(self):
+        """Devueve la lista de medios aéreos desplegados desde esta base (los que cuentan para su nivel)"""
+        return [medio for medio in self.avos() if medio.desplegado]
+
+class Capital(Ciudad):
+    """Ciudad principal del jugador. Además, perderla implica perder la partida."""
+    NOMBRE        = "Capital"
+    DESC          = "Ciudad principal del jugador. Conquistarla implica ganar la partida."
+    PRECIO        = None
+    PRECIO_MEJORA = None
+    SUP           = 100
+    CANTIDAD      = 1
+    COLOR         = "#c09200"
+
+# < -------------------------------------------------------------------------- >
+#                               CLASES DEL MAPA
+# < -------------------------------------------------------------------------- >
+
+class Casilla:
+    """
+        Representa una casilla del mapa: su superioridad aérea, infraestructura y medios.
+        El estado se guarda en los arrays del tablero, la casilla es sólo una vista sobre ellos.
+    """
+    BONUS    = 1 # Crédito otorgado al jugador con superioridad aérea en la casilla por turno
+    BONUS_F  = 2 # Ídem, pero con supremacía aérea
+    PUNTOS   = 1 # Puntos AIRGAME otorgados al final de la partida por una casilla con superioridad aérea
+    PUNTOS_F = 3 # Puntos AIRGAME otorgados al final de la partida por una casilla con supremacía aérea
+
+    def __init__(self, tablero, x, y):
+        self.tablero = tablero
+        self.partida = tablero.partida
+        self.x = x
+        self.y = y
+        self.indice = x * MAPA_DIM_Y + y # Posición de la casilla en los arrays aplanados del tablero
+
+    @property
+    def sup(self):
+        """Coeficiente de superioridad aérea actual (positivo para J1, negativo para J2)"""
+        return int(self.tablero.sup[self.x, self.y])
+
+    @sup.setter
+    def sup(self, valor):
+        self.tablero.sup[self.x, self.y] = valor
+        self.tablero.controlar(self.x, self.y)
+
+    @property
+    def supCas(self):
+        """Coeficiente de superioridad aérea necesario para dominar la casilla"""
+        return int(self.tablero.supCas[self.x, self.y])
+
+    @property
+    def infraestructura(self):
+        """Infraestructura construida en esta casilla, si la hay"""
+        return self.tablero.infraestructuras[self.x, self.y]
+
+    @infraestructura.setter
+    def infraestructura(self, infra):
+        tablero, x, y = self.tablero, self.x, self.y
+        tablero.infraestructuras[x, y] = infra
+        tablero.tipo[x, y]             = Tablero.TIPOS.index(type(infra)) if infra else 0
+        tablero.propietario[x, y]      = infra.jugador.indice if infra else -1
+        if not infra:
+            tablero.nivel[x, y] = 0
+
+    def id(self):
+        """Cadena de texto informativa que identifica a la casilla"""
+        return f"({self.x + 1}, {MAPA_DIM_Y - self.y})"
+
+    def recalcular(self):
+        """Determinar coeficiente de superioridad de casilla"""
+        infra = self.infraestructura
+        self.tablero.supCas[self.x, self.y] = infra.SUP + infra.INC * infra.nivel if infra else COEF_SUP
+        self.tablero.controlar(self.x, self.y)
+
+    def ejercer(self, puntos):
+        """Ejercer una cierta cantidad de superioridad aérea sobre la casilla"""
+        jugador, adversario = self.partida.jugador, self.partida.adversario
+
+        # Guardamos el estado previo de la casilla
+        hay_supre1 = self.hay_supremacia(adversario)
+        hay_super1 = self.hay_superioridad(adversario)
+
+        # Modificamos el coeficiente de superioridad aérea de la casilla
+        self.sup += puntos if jugador.indice == 0 else -puntos
+
+        # Guardamos el estado posterior de la casilla
+        hay_supre2 = self.hay_supremacia(adversario)
+        hay_super2 = self.hay_superioridad(adversario)
+
+        # Reportamos cambios en el estado de la casilla
+        if hay_supre1 and not hay_supre2:
+            adversario.reportar(f'Has perdido la supremacía aérea en la casilla {self.id()}!')
+        if hay_super1 and not hay_super2:
+            adversario.reportar(f'Has perdido la superioridad aérea en la casilla {self.id()}!')
+        self.partida.evento('casilla', self)
+
+    def construir(self, tipo):
+        """Construir una infraestructura en esta casilla"""
+        infra = tipo(self.partida.jugador, self)
+        self.infraestructura = infra
+        self.recalcular()
+        self.sup = round((self.sup / abs(self.sup)) * self.supCas)
+        self.partida.evento('casilla', self)
+        return infra
+
+    def destruir(self):
+        """Destruir la infraestructura de la casilla"""
+        if self.infraestructura:
+            self.infraestructura.destruir()
+
+    def hay_superioridad(self, jugador = None):
+        """Detecta si el jugador actual tiene superioridad aérea en la casilla"""
+        if not jugador:
+            jugador = self.partida.jugador
+        return self.tablero.signo(jugador) * self.sup >= self.supCas
+
+    def hay_supremacia(self, jugador = None):
+        """Detecta si el jugador actual tiene supremacia aérea en la casilla"""
+        if not jugador:
+            jugador = self.partida.jugador
+        return self.tablero.signo(jugador) * self.sup >= MULT_SUPREMACIA * self.supCas
+
+    def es_base(self):
+        """Detecta si el jugador actual tiene una base aérea en la casilla"""
+        tablero = self.tablero
+        return tablero.tipo[self.x, self.y] == Tablero.TIPOS.index(Base) and tablero.propietario[self.x, self.y] == self.partida.jugador.indice
+
+    def medios(self, jugador = None):
+        """Devuelve la lista de medios que el jugador actual tiene en esta casilla (desplegados o no)"""
+        return self.tablero.medios_en(self, jugador or self.partida.jugador, Tablero.CATEGORIAS)
+
+    def aereos(self, jugador = None, desplegados = False):
+        """Devuelve la lista de medios aéreos del jugador actual en esta casilla (o sólo los desplegados)"""
+        categorias = ('desplegados',) if desplegados else ('desplegados', 'estacionados')
+        return self.tablero.medios_en(self, jugador or self.partida.jugador, categorias)
+
+    def antiaereos(self, jugador = None):
+        """Devuelve la lista de medios antiaéreos del jugador actual en esta casilla"""
+        return self.tablero.medios_en(self, jugador or self.partida.jugador, ('antiaereos',))
+
+    def estado(self):
+        """
+            Clasificar la casilla según quién domina su espacio aéreo:
+            2 / 1 = supremacía / superioridad de J1, 0 = igualdad, -1 / -2 = superioridad / supremacía de J2
+        """
+        sup, supCas = self.sup, self.supCas
+        if sup <= -MULT_SUPREMACIA * supCas:
+            return -2
+        elif sup <= -supCas:
+            return -1
+        elif sup < supCas:
+            return 0
+        elif sup < MULT_SUPREMACIA * supCas:
+            return 1
+        else:
+            return 2
+
+    def axial(self):
+        """Calcula la coordenadas axiales de la casilla (lugar de cartesianas)"""
+        return (self.x - (self.y - (self.y & 1)) / 2, self.y)
+
+    def distancia(self, casilla):
+        """Distancia a otra casilla, consultada en la tabla precalculada del tablero"""
+        return int(self.tablero.distancias[self.indice, casilla.indice])
+
+class Tablero:
+    """
+        Representa el mapa de casillas hexagonales de la partida.
+        El estado de todas las casillas se guarda en arrays de NumPy de dimensión
+        (MAPA_DIM_X, MAPA_DIM_Y), de manera que las operaciones sobre el mapa
+        completo (sembrar, cosechar, puntuar, colorear...) son una sola pasada.
+    """
+    TIPOS      = [None, Ciudad, Base, Capital]                    # Tipos de infraestructura, su índice es el que se guarda en el array 'tipo'
+    CATEGORIAS = ('desplegados', 'estacionados', 'antiaereos')    # Categorías del índice de medios por casilla
+
+    def __init__(self, partida):
+        self.partida = partida
+        dim = (MAPA_DIM_X, MAPA_DIM_Y)
+        self.sup              = np.zeros(dim, dtype = np.int32)     # Coeficiente de superioridad aérea (positivo para J1, negativo para J2)
+        self.supCas           = np.zeros(dim, dtype = np.int32)     # Coeficiente de superioridad de cada casilla
+        self.tipo             = np.zeros(dim, dtype = np.int8)      # Tipo de infraestructura (índice en TIPOS, 0 si no hay)
+        self.propietario      = np.zeros(dim, dtype = np.int8)      # Índice del jugador dueño de la infraestructura (-1 si no hay)
+        self.nivel            = np.zeros(dim, dtype = np.int8)      # Nivel de la infraestructura (0 si no hay)
+        self.infraestructuras = np.full(dim, None, dtype = object)  # Objetos de las infraestructuras
+        self.superiores       = np.zeros((2,) + dim, dtype = bool)  # Casillas con superioridad aérea de cada jugador (ver controlar)
+        self.supremas         = np.zeros((2,) + dim, dtype = bool)  # Ídem con supremacía aérea
+        self.casillas = [[Casilla(self, x, y) for y in range(MAPA_DIM_Y)] for x in range(MAPA_DIM_X)]
+
+        # Distancias entre todos los pares de casillas, indexadas por Casilla.indice.
+        # Sólo dependen de las dimensiones del mapa, así que se calculan una vez.
+        x, y = np.indices(dim)
+        cubicas = self.cubicas(x.ravel(), y.ravel())
+        self.distancias = self.distancia_cubica(cubicas[:, None, :], cubicas[None, :, :]).astype(np.int16)
+        self.vaciar()
+
+    @staticmethod
+    def cubicas(x, y):
+        """Coordenadas cúbicas (q, r, s) de las casillas con coordenadas cartesianas x, y (arrays)"""
+        x, y = np.asarray(x), np.asarray(y)
+        q = x - (y - (y & 1)) // 2
+        return np.stack([q, y, -q - y], axis = -1)
+
+    @staticmethod
+    def distancia_cubica(c1, c2):
+        """Distancia hexagonal entre coordenadas cúbicas (arrays con la última dimensión de tamaño 3)"""
+        return np.abs(c1 - c2).sum(axis = -1) // 2
+
+    def distancias_desde(self, casilla):
+        """Distancia desde una casilla a todas las demás, con la forma del mapa (MAPA_DIM_X, MAPA_DIM_Y)"""
+        return self.distancias[casilla.indice].reshape(MAPA_DIM_X, MAPA_DIM_Y)
+
+    def casilla(self, indice):
+        """Casilla correspondiente a una posición de los arrays aplanados del tablero (ver Casilla.indice)"""
+        x, y = divmod(int(indice), MAPA_DIM_Y)
+        return self.casillas[x][y]
+
+    def vaciar(self):
+        """Eliminar todas las infraestructuras y devolver la superioridad aérea a su valor inicial"""
+        self.infraestructuras.fill(None)
+        self.indice_medios = [{categoria: {} for categoria in self.CATEGORIAS} for _ in range(2)]
+        self.tipo.fill(0)
+        self.propietario.fill(-1)
+        self.nivel.fill(0)
+        self.supCas.fill(COEF_SUP)
+
+        # Cada jugador empieza con superioridad aérea en sus columnas
+        self.sup.fill(0)
+        self.sup[:MAPA_DIM_J] = self.supCas[:MAPA_DIM_J]
+        self.sup[MAPA_DIM_X - MAPA_DIM_J:] = -self.supCas[MAPA_DIM_X - MAPA_DIM_J:]
+        self.controlar()
+
+    def semillear(self):
+        """Cambiar la seleccion de celdas aleatorias que tienen supremacia inicial (OJO: resetea las celdas!)"""
+        # Resetear los valores de superioridad
+        self.vaciar()
+
+        # Generar nuevas casillas aleatorias con supremacia
+        supremacia = int(MAPA_DIM_J * MAPA_DIM_Y * SUP_INICIAL)
+        for jugador in self.partida.jugadores:
+            indices = np.flatnonzero(self.superioridad(jugador))
+            elegidas = self.partida.aleatorio.choice(indices, supremacia, replace = False)
+            self.sup.flat[elegidas] *= MULT_SUPREMACIA
+            self.controlar()
+
+        # Fuerza un re-renderizado
+        self.partida.evento('mapa')
+
+    def categoria(self, medio):
+        """Categoría del índice de medios a la que pertenece un medio según su estado actual"""
+        if isinstance(medio, MedioAntiaereo):
+            return 'antiaereos'
+        return 'desplegados' if medio.desplegado else 'estacionados'
+
+    def registrar(self, medio):
+        """
+            Añadir un medio al índice de medios por casilla, en la casilla y categoría que le
+            corresponden ahora mismo. Hay que llamarla después de cada cambio de casilla o estado.
+        """
+        casillas = self.indice_medios[medio.jugador.indice][self.categoria(medio)]
+        casillas.setdefault(medio.casilla.indice, []).append(medio)
+
+    def retirar(self, medio):
+        """Eliminar un medio del índice de medios por casilla. Hay que llamarla antes de moverlo o destruirlo."""
+        casillas = self.indice_medios[medio.jugador.indice][self.categoria(medio)]
+        medios = casillas[medio.casilla.indice]
+        medios.remove(medio)
+        if not medios:
+            del casillas[medio.casilla.indice]
+
+    def medios_en(self, casilla, jugador, categorias):
+        """Medios del jugador en una casilla, de las categorías indicadas (ver CATEGORIAS)"""
+        indice = self.indice_medios[jugador.indice]
+        return [medio for categoria in categorias for medio in indice[categoria].get(casilla.indice, ())]
+
+    def signo(self, jugador):
+        """Signo con el que el jugador suma superioridad aérea (+1 para J1, -1 para J2)"""
+        return 1 - 2 * jugador.indice
+
+    def controlar(self, x = slice(None), y = slice(None)):
+        """
+            Actualizar qué casillas dominan los jugadores, en una casilla o en todo el mapa. Hay que
+            llamarla después de cada cambio de sup o supCas; así las casillas candidatas de cada jugador
+            (ver superioridad y supremacia) están siempre al día sin volver a calcularlas en todo el mapa.
+        """
+        sup, supCas = self.sup[x, y], self.supCas[x, y]
+        for indice, signo in enumerate((1, -1)):
+            self.superiores[indice, x, y] = signo * sup >= supCas
+            self.supremas[indice, x, y]   = signo * sup >= MULT_SUPREMACIA * supCas
+
+    def superioridad(self, jugador):
+        """Máscara de las casillas en las que el jugador tiene superioridad aérea (sólo lectura, ver controlar)"""
+        return self.superiores[jugador.indice]
+
+    def supremacia(self, jugador):
+        """Máscara de las casillas en las que el jugador tiene supremacía aérea (sólo lectura, ver controlar)"""
+        return self.supremas[jugador.indice]
+
+    def estados(self):
+        """Estado de todas las casillas a la vez (ver Casilla.estado)"""
+        sup, supCas = self.sup, self.supCas
+        condiciones = [sup <= -MULT_SUPREMACIA * supCas, sup <= -supCas, sup < supCas, sup < MULT_SUPREMACIA * supCas]
+        return np.select(condiciones, [-2, -1, 0, 1], 2)
+
+    def seleccionar(self, mascara):
+        """Lista de casillas seleccionadas por una máscara, en el mismo orden que recorriendo las columnas"""
+        return [self.casillas[x][y] for x, y in zip(*np.nonzero(mascara))]
+
+    def cosechar(self, jugador):
+        """Adquirir crédito adicional debido a las casillas con superioridad aérea"""
+        supremacia = self.supremacia(jugador)
+        superioridad = self.superioridad(jugador) & ~supremacia
+        cantidad = int(Casilla.BONUS_F * np.count_nonzero(supremacia) + Casilla.BONUS * np.count_nonzero(superioridad))
+        jugador.cobrar(cantidad)
+        return cantidad
+
+    def puntuar(self, jugador):
+        """Calcular puntos AIRGAME totales del jugador"""
+        supremacia = self.supremacia(jugador)
+        superioridad = self.superioridad(jugador) & ~supremacia
+        return int(Casilla.PUNTOS_F * np.count_nonzero(supremacia) + Casilla.PUNTOS * np.count_nonzero(superioridad))
+
+    def resetear(self):
+        """Resetear los contenidos de todas las celdas"""
+        self.vaciar()
+        self.semillear()
+
+# < -------------------------------------------------------------------------- >
+#                             CLASES DE LA PARTIDA
+# < -------------------------------------------------------------------------- >
+
+class Vista:
+    """
+        Interfaz a través de la cual el motor comunica lo que ocurre en la partida.
+        Por defecto no hace nada, de manera que la partida puede jugarse sin pantalla
+        ni audio. La interfaz gráfica la redefine para mostrar mensajes, sonidos, etc.
+    """
+
+    def mensaje(self, tipo, texto):
+        """Mostrar un mensaje al jugador (tipos: error, info, dinero, intel, medio, report)"""
+        pass
+
+    def sonido(self, nombre):
+        """Reproducir un efecto de sonido"""
+        pass
+
+    def evento(self, nombre, objeto = None):
+        """
+            Notificar un cambio en el estado de la partida, p. ej. para volver a renderizar.
+            Eventos: fase, paso, turno, credito, mapa, casilla, medio, destruir.
+        """
+        pass
+
+class Jugador:
+    """Representa a cada uno de los jugadores"""
+    MAX_INTELIGENCIA = 5
+    INICIALES = [Ciudad, Base, Capital] # Infraestructuras construidas en la fase de preparación
+    COMPRAS = [AvionCaza, AvionAtaque, AvionTransporte, Helicoptero, Dron, Radar, Bateria, Ciudad, Base] # Acciones del modelo de compra
+    RADIO_RADARES   = 4 # Radio (casillas) en el que los modelos de la IA cuentan radares
+    RADIO_BATERIAS  = 2 # Ídem para las baterías antiaéreas
+    RADIO_INFRAS    = 4 # Ídem para las ciudades y bases aéreas propias (modelos de posición)
+    RADIO_OBJETIVOS = {AvionAtaque: 11, Dron: 1, Helicoptero: 1} # Ídem para bases y ciudades enemigas en los de despliegue, según el medio
+    OBJETIVOS_AIRE  = [AvionCaza, AvionAtaque, AvionTransporte, Helicoptero, Dron] # Medios de los condicionantes de ataque_caza
+
+    def __init__(self, partida, indice, ia):
+        self.partida = partida # Partida a la que pertenece el jugador
+        self.indice  = indice  # Índice numérico del jugador (0, 1)
+        self.ia      = ia      # Si el jugador es IA o no
+        self.resetear()
+
+    def resetear(self):
+        """Reiniciar el estado del jugador"""
+        self.medios           = []              # Lista de medios de ataque (aéreos o antiaéreos) adquiridos (y no destruidos)
+        self.infraestructuras = []              # Lista de infraestructuras construidas
+        self.reporte          = []              # Lista de acciones hechas por el adversario en el turno anterior
+        self.credito          = CREDITO_INICIAL # Crédito disponible (en M$) para gastar en la tienda
+        self.cosechado        = 0               # Crédito obtenido en el último turno
+        self.preparado        = False           # Ha concluído su fase de preparación
+        self.inteligencia     = 0               # Nivel de inteligencia actualmente contratado
+
+    def modelo(self, nombre):
+        """Modelo de AMPL de la IA, compartido con el resto de jugadores y partidas (ver ModelosAMPL)"""
+        return g_modelos.modelo(nombre)
+
+    @orden
+    def comprar(self, producto, casilla):
+        """Adquirir un medio de ataque (aéreo o antiaéreo) y añadirlo al inventario"""
+        if not self.pagar(producto.PRECIO):
+            return
+        if not issubclass(producto, MedioAtaque):
+            return
+        medio = producto(self, casilla)
+        self.medios.append(medio)
+        self.partida.tablero.registrar(medio)
+        self.partida.mensaje('dinero', f'Has adquirido un {producto.NOMBRE} en la casilla {casilla.id()}')
+        self.partida.evento('medio', medio)
+
+    @orden
+    def contratar(self):
+        """Contratar inteligencia, que proporciona información adicional al comienzo de cada turno"""
+        if self.inteligencia == self.MAX_INTELIGENCIA:
+            self.partida.error('Ya tienes el máximo nivel de inteligencia')
+        elif not self.pagar(Inteligencia.PRECIO):
+            return
+        else:
+            self.inteligencia += 1
+            self.partida.mensaje('info', f'Contrada inteligencia de nivel {self.inteligencia}')
+
+    @orden
+    def construir(self, producto, casilla):
+        """Construir o mejorar una infraestructura en el mapa"""
+        fase = self.partida.fase
+        infra = casilla.infraestructura
+        if infra:
+            if type(infra) is not producto: # Infraestructura de otro tipo -> Error
+                self.partida.error('Ya hay una infraestructura de otro tipo en esta casilla')
+            elif fase != 'Preparación':     # Infraestructura del mismo tipo -> Mejorar
+                infra.mejorar()
+            else:                           # No se puede mejorar en fase de preparación
+                self.partida.error('No se pueden mejorar infraestructuras en fase de preparación')
+        else:                               # No hay infraestructura -> Construir
+            if fase == 'Preparación':
+                cantidad = sum(1 for infra in self.infraestructuras if type(infra) is producto)
+                if cantidad >= producto.CANTIDAD:
+                    self.partida.error(f"Ya has construido todas las {producto.NOMBRE.lower()} iniciales")
+                    return
+            elif not self.pagar(producto.PRECIO):
+                return
+            infra = casilla.construir(producto)
+            self.infraestructuras.append(infra)
+            self.partida.sonido('construir')
+            self.partida.mensaje('medio', f'Has construido una {producto.NOMBRE} en la casilla {casilla.id()}')
+
+    def pagar(self, cantidad):
+        """Desembolsar una cierta cantidad, si hay crédito disponible"""
+        if self.credito < cantidad:
+            self.partida.error('No tienes crédito suficiente!')
+            return False
+        self.partida.sonido('pagar')
+        self.credito -= cantidad
+        self.partida.evento('credito')
+        return True
+
+    def cobrar(self, cantidad):
+        """Obtener una cierta cantidad de crédito"""
+        self.credito += cantidad
+
+    def cosechar(self):
+        """Adquirir crédito adicional debido a la superioridad aérea y las infraestructuras"""
+        self.cosechado = self.partida.tablero.cosechar(self)
+        for infra in self.infraestructuras:
+            self.cosechado += infra.cosechar()
+        self.partida.mensaje('dinero', f"Has cosechado {self.cosechado}M€")
+        if self.cosechado:
+            self.partida.sonido('cobrar')
+            self.partida.evento('credito')
+
+    def puntuar(self):
+        """Recontar todos los puntos AIRGAME obtenidos en la partida"""
+        puntos = self.partida.tablero.puntuar(self)
+        for infra in self.infraestructuras:
+            puntos += infra.puntuar()
+        for medio in self.medios:
+            puntos += medio.puntuar()
+        self.partida.mensaje('info', f'El jugador {self.indice + 1} ha obtenido {puntos} puntos AIRGAME')
+        return puntos
+
+    @orden
+    def preparar(self):
+        """Realizar automáticamente la fase de preparación. Esta función está simplemente para facilitar el testeo."""
+        tablero = self.partida.tablero
+        for producto in self.INICIALES:
+            casillas = tablero.seleccionar(tablero.supremacia(self) & (tablero.tipo == 0))
+            for indice in self.partida.aleatorio.choice(len(casillas), producto.CANTIDAD, replace = False):
+                self.construir(producto, casillas[indice])
+        self.preparado = True
+
+    def reportar(self, msg):
+        """
+            Añadir un mensaje informativo acerca de una acción llevada a cabo
+            por el adversario, que será reportada al jugador en el turno siguiente
+        """
+        self.reporte.append(msg)
+
+    def validar_reporte(self):
+        """Ejecutar una vez vistos los reportes"""
+        self.reporte = []
+
+    def adversario(self):
+        """Devolver el adversario de este jugador"""
+        return self.partida.jugadores[self.indice ^ 1]
+
+    def planificar_compra(self, credito, aleatorio):
+        """
+            Decidir qué recursos adquirir en el turno de la IA. No modifica la partida, así que
+            puede ejecutarse en segundo plano (ver Partida.pensar); las compras las hace ia_compra.
+        """
+        modelo = self.modelo(AMPL_COMPRA)
+        with modelo.cerrojo:
+            modelo.parametro('P', [credito])
+            modelo.parametro('S', aleatorio.integers(0, 2, 29).tolist())
+            modelo.ejecutar()
+            return [var[1] for var in modelo.solucion]
+
+    def ia_compra(self, compras):
+        """Adquirir los recursos decididos por la IA (ver planificar_compra), colocándolos todos de una vez"""
+        productos = [producto for compra, producto in zip(compras, self.COMPRAS) if compra]
+        for producto, casilla in zip(productos, self.ia_posiciones(productos)):
+            if casilla is None:
+                continue
+            if issubclass(producto, MedioAtaque):
+                self.comprar(producto, casilla)
+            elif issubclass(producto, Infraestructura):
+                self.construir(producto, casilla)
+
+    def ia_posiciones(self, productos):
+        """
+            Dónde colocar todos los recursos adquiridos en este turno de la IA, de una vez. Los medios aéreos
+            van a bases propias, los antiaéreos a casillas con superioridad aérea propia y las infraestructuras
+            a casillas libres con supremacía aérea propia (ver Tablero.controlar). Los recuentos de los
+            condicionantes de los modelos pos_* se calculan una vez para todo el mapa y se actualizan con
+            cada producto colocado. Devuelve una casilla por producto (None si no tiene candidatas).
+        """
+        tablero = self.partida.tablero
+        tipos = tablero.tipo.ravel()
+        propias = tablero.propietario.ravel() == self.indice
+
+        def cerca(casillas, radio):
+            """Cuántas de las casillas dadas hay a una distancia no mayor que el radio de cada casilla"""
+            return (tablero.distancias[:, casillas] <= radio).sum(axis = 1)
+
+        # Recuentos de los condicionantes en todas las casillas
+        radares  = cerca([medio.casilla.indice for medio in self.medios if type(medio) is Radar], self.RADIO_RADARES)
+        baterias = cerca([medio.casilla.indice for medio in self.medios if type(medio) is Bateria], self.RADIO_BATERIAS)
+        bases    = cerca(np.flatnonzero(propias & (tipos == Tablero.TIPOS.index(Base))), self.RADIO_INFRAS)
+        ciudades = cerca(np.flatnonzero(propias & np.isin(tipos, [Tablero.TIPOS.index(Ciudad), Tablero.TIPOS.index(Capital)])), self.RADIO_INFRAS)
+        libres   = tablero.supremacia(self).ravel() & (tipos == 0)
+        niveles  = {infra.casilla.indice: infra.nivel for infra in self.infraestructuras if type(infra) is Base}
+        aereos   = collections.Counter((medio.base.indice, type(medio)) for medio in self.medios if isinstance(medio, MedioAereo))
+        en_base  = collections.Counter(medio.base.indice for medio in self.medios if isinstance(medio, MedioAereo))
+
+        posiciones = []
+        for producto in productos:
+            if issubclass(producto, MedioAereo):
+                candidatas = np.array(sorted(niveles), dtype = int)
+                avos   = np.array([en_base[base] + 1 for base in candidatas])  # Medios de la base si se coloca aquí
+                nivel  = np.array([niveles[base] for base in candidatas])
+                condiciones = {
+                    'C1': avos <= nivel,     # Todos los medios de la base podrían estar desplegados a la vez
+                    'C2': avos <= nivel + 1, # Ídem salvo uno
+                    'C3': np.array([aereos[(base, producto)] == 0 for base in candidatas], dtype = bool), # Aún no hay ninguno de este tipo
+                }
+            else:
+                if issubclass(producto, MedioAntiaereo):
+                    candidatas, vecinas = np.flatnonzero(tablero.superioridad(self)), bases + ciudades
+                else:
+                    candidatas, vecinas = np.flatnonzero(libres), bases if producto is Base else ciudades
+                condiciones = {
+                    'C1': vecinas[candidatas] == 1,
+                    'C2': vecinas[candidatas] >= 2,
+                    'C3': radares[candidatas] > 0,
+                    'C4': baterias[candidatas] > 0,
+                }
+            casilla = self.ia_posicion(producto, candidatas, condiciones) if len(candidatas) else None
+            posiciones.append(tablero.casilla(casilla) if casilla is not None else None)
+            if casilla is None:
+                continue
+
+            # Actualizar los recuentos con el producto recién colocado
+            if producto is Radar:
+                radares += tablero.distancias[casilla] <= self.RADIO_RADARES
+            elif producto is Bateria:
+                baterias += tablero.distancias[casilla] <= self.RADIO_BATERIAS
+            elif producto is Base:
+                bases += tablero.distancias[casilla] <= self.RADIO_INFRAS
+                libres[casilla] = False
+            elif producto is Ciudad:
+                ciudades += tablero.distancias[casilla] <= self.RADIO_INFRAS
+                libres[casilla] = False
+            else:
+                aereos[(casilla, producto)] += 1
+                en_base[casilla] += 1
+        return posiciones
+
+    def ia_posicion(self, producto, candidatas, condiciones):
+        """
+            Resolver el modelo pos_* del producto sobre sus casillas candidatas (ver PosicionNativo), con
+            los condicionantes de cada una. Las candidatas se barajan antes, para deshacer los empates al azar.
+        """
+        prioridad = self.partida.aleatorio.permutation(len(candidatas))
+        conjunto = 'B' if issubclass(producto, MedioAereo) else 'L'
+        modelo = self.modelo(AMPL_POSICION + producto.MODELO)
+        with modelo.cerrojo:
+            modelo.conjunto('C', list(condiciones))
+            modelo.conjunto(conjunto, candidatas[prioridad].tolist())
+            modelo.parametro('S', np.array([mascara[prioridad] for mascara in condiciones.values()], dtype = np.int8), 'C', conjunto)
+            modelo.ejecutar()
+            solucion = modelo.solucion or []
+        return next((casilla for casilla, valor in solucion if round(valor)), None)
+
+    def condiciones_despliegue(self, tipo):
+        """
+            Condicionantes de los modelos de despliegue (ver mov_*.dat) en todas las casillas a la vez,
+            como máscaras indexadas por Casilla.indice. C7 y C8 sólo los tienen algunos medios aéreos.
+        """
+        tablero, adversario = self.partida.tablero, self.adversario()
+        estados = tablero.signo(self) * tablero.estados().ravel() # Positivos si domina el jugador
+        enemigas = tablero.propietario.ravel() == adversario.indice
+        tipos = tablero.tipo.ravel()
+
+        def cerca(indices, radio):
+            """Casillas a una distancia no mayor que el radio de alguna de las casillas dadas"""
+            return (tablero.distancias[:, indices] <= radio).any(axis = 1)
+
+        radares  = [medio.casilla.indice for medio in adversario.medios if type(medio) is Radar]
+        baterias = [medio.casilla.indice for medio in adversario.medios if type(medio) is Bateria]
+        condiciones = {
+            'C1': estados == 0,  # Igualdad aérea
+            'C2': estados == -1, # Superioridad aérea enemiga
+            'C3': estados == -2, # Supremacía aérea enemiga
+            'C4': estados > 0,   # Superioridad aérea propia
+            'C5': cerca(radares, self.RADIO_RADARES),
+            'C6': cerca(baterias, self.RADIO_BATERIAS),
+        }
+        if tipo in self.RADIO_OBJETIVOS:
+            radio = self.RADIO_OBJETIVOS[tipo]
+            ciudades = [Tablero.TIPOS.index(Ciudad), Tablero.TIPOS.index(Capital)]
+            condiciones['C7'] = cerca(np.flatnonzero(enemigas & (tipos == Tablero.TIPOS.index(Base))), radio)
+            condiciones['C8'] = cerca(np.flatnonzero(enemigas & np.isin(tipos, ciudades)), radio)
+        return condiciones
+
+    def planificar_despliegue(self, aleatorio):
+        """
+            Decidir el paso de despliegue de la IA: dónde desplegar los medios aéreos y, desde las casillas
+            resultantes, qué atacar. No modifica la partida (ver Partida.pensar), devuelve ambas listas.
+        """
+        movimientos = self.planificar_movimiento()
+        return movimientos, self.planificar_ataque(movimientos)
+
+    def planificar_movimiento(self):
+        """
+            Decidir dónde desplegar los medios aéreos en el turno de la IA, resolviendo el modelo de cada
+            tipo de medio una sola vez para todos sus medios (ver MovimientoNativo). Devuelve los
+            despliegues como pares (medio, casilla), para ia_movimiento.
+        """
+        tablero = self.partida.tablero
+
+        # Cuántos medios más puede desplegar cada base (tantos como su nivel), y medios que salen de ellas
+        capacidad = {infra.casilla.indice: infra.nivel - len(infra.avos_desplegados()) for infra in self.infraestructuras if type(infra) is Base}
+        tipos = {}
+        for medio in self.medios:
+            if isinstance(medio, MedioAereo) and not medio.desplegado and capacidad.get(medio.base.indice, 0) > 0:
+                tipos.setdefault(type(medio), []).append(medio)
+
+        despliegues = []
+        for tipo, medios in tipos.items():
+            # Las bases se comparten entre tipos, así que algunas pueden haberse llenado ya
+            medios = [medio for medio in medios if capacidad[medio.base.indice] > 0]
+            if not medios:
+                continue
+
+            # Casillas candidatas: al alcance de alguna de las bases
+            alcance = medios[0].alcance()
+            bases = sorted({medio.base.indice for medio in medios})
+            origenes = np.array([medio.base.indice for medio in medios])
+            candidatas = np.flatnonzero((tablero.distancias[bases] <= alcance).any(axis = 0))
+            condiciones = self.condiciones_despliegue(tipo)
+
+            # Los parámetros van como arrays, indexados por los conjuntos que se indican
+            modelo = self.modelo(AMPL_MOVIMIENTO + tipo.MODELO)
+            with modelo.cerrojo:
+                modelo.conjunto('C', list(condiciones))
+                modelo.conjunto('A', list(range(len(medios))))
+                modelo.conjunto('L', candidatas.tolist())
+                modelo.conjunto('B', bases)
+                modelo.parametro('S', np.array([mascara[candidatas] for mascara in condiciones.values()], dtype = np.int8), 'C', 'L')
+                modelo.parametro('D', tablero.distancias[np.ix_(origenes, candidatas)], 'A', 'L')
+                modelo.parametro('N', origenes, 'A')
+                modelo.parametro('K', np.array([capacidad[base] for base in bases]), 'B')
+                modelo.parametro('R', [alcance])
+                modelo.ejecutar()
+                solucion = modelo.solucion or []
+
+            for (a, j), valor in solucion:
+                if round(valor):
+                    despliegues.append((medios[a], tablero.casilla(j)))
+                    capacidad[medios[a].base.indice] -= 1
+        return despliegues
+
+    def ia_movimiento(self, despliegues):
+        """Desplegar los medios aéreos decididos por la IA (ver planificar_movimiento)"""
+        for medio, casilla in despliegues:
+            medio.desplegar(casilla)
+
+    def objetivos(self):
+        """
+            Casillas que la IA puede atacar, sacadas del índice de medios del tablero en lugar de recorrer
+            el mapa: las que tienen medios aéreos enemigos desplegados y visibles, y las que tienen medios
+            antiaéreos enemigos. Devuelve dos diccionarios {Casilla.indice: medios}, ordenados por casilla.
+        """
+        indice = self.partida.tablero.indice_medios[self.adversario().indice]
+        aereos = {}
+        for casilla, medios in sorted(indice['desplegados'].items()):
+            visibles = [medio for medio in medios if medio.visible()]
+            if visibles:
+                aereos[casilla] = visibles
+        return aereos, dict(sorted(indice['antiaereos'].items()))
+
+    def condiciones_ataque(self, aire, casillas, medios):
+        """
+            Condicionantes de los modelos de ataque (ver ataque_*.dat) en las casillas objetivo dadas, con
+            los medios enemigos de cada una. Los medios que atacan medios aéreos miran qué medios aéreos hay
+            (ataque_caza), el resto qué infraestructura y qué medios antiaéreos (ataque_ataque, _heli, _dron).
+        """
+        tipos = [{type(medio) for medio in medios[casilla]} for casilla in casillas]
+        if aire:
+            return {f'C{i + 1}': [int(tipo in presentes) for presentes in tipos] for i, tipo in enumerate(self.OBJETIVOS_AIRE)}
+        infras = [type(self.partida.tablero.infraestructuras.flat[casilla]) for casilla in casillas]
+        return {
+            'C1': [int(infra is Base) for infra in infras],
+            'C2': [int(infra in (Ciudad, Capital)) for infra in infras],
+            'C3': [int(Radar in presentes) for presentes in tipos],
+            'C4': [int(Bateria in presentes) for presentes in tipos],
+        }
+
+    def planificar_ataque(self, movimientos):
+        """
+            Decidir qué ataques llevar a cabo en el turno de la IA, todos a la vez y una vez hechos los
+            despliegues planificados. Cada tipo de medio resuelve su modelo una sola vez para todos sus
+            medios (ver AtaqueNativo), empezando por los de menor radio de ataque. Un ataque sólo destruye
+            una categoría de medios de la casilla (ver MedioAereo.atacar): los aéreos desplegados si el medio
+            ataca medios aéreos, y los antiaéreos si no. Por eso cada casilla se ataca una sola vez por
+            categoría, y una casilla con medios de ambas puede recibir un ataque de cada una. Devuelve los
+            ataques como pares (medio, casilla), para ia_ataque.
+        """
+        tablero = self.partida.tablero
+        casillas = {medio: medio.casilla for medio in self.medios if isinstance(medio, MedioAereo) and medio.desplegado and not medio.atacado}
+        casillas.update(movimientos)
+        tipos = {}
+        for medio in casillas:
+            if medio.radio_ataque() >= 0:
+                tipos.setdefault(type(medio), []).append(medio)
+
+        aereos, antiaereos = self.objetivos()
+        atacadas = {True: set(), False: set()} # Casillas ya atacadas, según si el ataque es a medios aéreos
+        ataques = []
+        for tipo, medios in sorted(tipos.items(), key = lambda item: item[1][0].radio_ataque()):
+            aire, radio = medios[0].ataque_aire, medios[0].radio_ataque()
+            enemigos = aereos if aire else antiaereos
+
+            # Objetivos al alcance de alguno de los medios y que nadie ataca todavía con la misma categoría
+            objetivos = np.array([casilla for casilla in enemigos if casilla not in atacadas[aire]], dtype = int)
+            distancias = tablero.distancias[np.ix_([casillas[medio].indice for medio in medios], objetivos)]
+            alcanzados = (distancias <= radio).any(axis = 0)
+            if not alcanzados.any():
+                continue
+            objetivos, distancias = objetivos[alcanzados].tolist(), distancias[:, alcanzados]
+            condiciones = self.condiciones_ataque(aire, objetivos, enemigos)
+
+            # Los parámetros van como arrays, indexados por los conjuntos que se indican
+            modelo = self.modelo(AMPL_ATAQUE + tipo.MODELO)
+            with modelo.cerrojo:
+                modelo.conjunto('C', list(condiciones))
+                modelo.conjunto('A', list(range(len(medios))))
+                modelo.conjunto('L', objetivos)
+                modelo.parametro('S', np.array(list(condiciones.values()), dtype = np.int8), 'C', 'L')
+                modelo.parametro('D', distancias, 'A', 'L')
+                modelo.parametro('R', [radio])
+                modelo.ejecutar()
+                solucion = modelo.solucion or []
+
+            for (a, j), valor in solucion:
+                if round(valor):
+                    ataques.append((medios[a], tablero.casilla(j)))
+                    atacadas[aire].add(j)
+        return ataques
+
+    def ia_ataque(self, ataques):
+        """Llevar a cabo los ataques decididos por la IA (ver planificar_ataque)"""
+        for medio, casilla in ataques:
+            medio.atacar(casilla)
+
+class Partida:
+    """
+        Estado completo de una partida: jugadores, tablero, fase, paso y turno.
+        No depende de ninguna interfaz, todo lo que ocurre se comunica a través
+        de la vista, así que puede simularse sin pantalla (ver jugar_turno).
+    """
+    FASES = ['Preparación', 'Principal', 'Final']
+    PASOS = ['Reporte', 'Inteligencia', 'Ingresos', 'Recursos', 'Despliegue']
+    PENSANDO = object() # Resultado de pensar mientras la IA aún no ha terminado
+
+    def __init__(self, ia = (False, True), vista = None, saltar_preparacion = False, semilla = None, grabar = True, asincrona = False):
+        self.vista              = vista or Vista()   # Destinatario de mensajes, sonidos y eventos
+        self.saltar_preparacion = saltar_preparacion # Preparar automáticamente también a los jugadores humanos
+        self.semilla_fija       = semilla            # Semilla para todas las partidas (None para una nueva en cada una)
+        self.grabar             = grabar             # Grabar las órdenes de cada partida (ver Repeticion)
+        self.grabacion          = None               # Grabación de la partida actual
+        self.profundidad        = 0                  # Órdenes en ejecución, sólo se graban las de primer nivel (ver orden)
+        self.asincrona          = asincrona          # La IA piensa en segundo plano, sin bloquear actualizar (ver pensar)
+        self.pensamiento        = None               # Decisión de la IA en curso (concurrent.futures.Future)
+        self.jugadores          = [Jugador(self, indice, es_ia) for indice, es_ia in enumerate(ia)]
+        self.tablero            = Tablero(self)
+        self.resetear()
+
+    # Comunicación con la vista
+
+    def mensaje(self, tipo, texto):
+        """Enviar un mensaje a la vista"""
+        self.vista.mensaje(tipo, texto)
+
+    def error(self, texto):
+        """Enviar un mensaje y sonido de error a la vista"""
+        self.vista.mensaje('error', texto)
+        self.vista.sonido('error')
+
+    def sonido(self, nombre):
+        """Pedir a la vista que reproduzca un sonido"""
+        self.vista.sonido(nombre)
+
+    def evento(self, nombre, objeto = None):
+        """Notificar a la vista de un cambio en el estado"""
+        self.vista.evento(nombre, objeto)
+
+    def error_fin(self):
+        """Mensaje de error a emitir cuando la partida ya ha concluido"""
+        self.error('La partida ya ha terminado, pulsa "Reiniciar" para comenzar otra')
+
+    # Fases, pasos y turnos
+
+    def resetear(self):
+        """Devolver la partida a su estado inicial, antes de comenzar la preparación"""
+        self.cancelar()
+
+        # Toda la aleatoriedad de la partida sale de un único generador, así se puede reproducir
+        self.semilla   = self.semilla_fija if self.semilla_fija is not None else np.random.SeedSequence().entropy
+        self.aleatorio = np.random.default_rng(self.semilla)
+        self.grabacion = None
+
+        for jugador in self.jugadores:
+            jugador.resetear()
+        self.tablero.resetear()
+        self.fase       = None  # Fase actual del juego
+        self.paso       = None  # Paso actual de la fase principal
+        self.paso_listo = False # Indica que el paso ha concluido
+        self.jugador    = None  # Jugador actual
+        self.adversario = None  # Jugador contrincante
+        self.turno      = 0     # Número de cambios de turno desde el comienzo
+        if self.grabar:
+            self.grabacion = Repeticion(self.semilla, [jugador.ia for jugador in self.jugadores], self.saltar_preparacion)
+
+    def firma(self):
+        """Resumen del progreso de la partida, para saber si la lógica automática ha hecho algo"""
+        return (self.fase, self.paso, self.paso_listo, self.turno, tuple(jugador.preparado for jugador in self.jugadores))
+
+    def instantanea(self):
+        """
+            Copia completa del estado de la partida (fotograma clave), incluido el generador aleatorio.
+            La copia no tiene vista ni grabación, y comparte la tabla de distancias.
+        """
+        memo = self.compartidos()
+        memo[id(self.vista)] = None
+        memo[id(self.grabacion)] = None
+        memo[id(self.pensamiento)] = None
+        copia = copy.deepcopy(self, memo)
+        copia.asincrona = False
+        return copia
+
+    def compartidos(self):
+        """Objetos que las copias de la partida comparten con ella en lugar de copiarlos (memo de copy.deepcopy)"""
+        return { id(self.tablero.distancias): self.tablero.distancias }
+
+    @orden
+    def comenzar(self):
+        """Comenzar la partida por la fase de preparación"""
+        self.cambiar_fase(self.FASES[0])
+        self.siguiente_jugador()
+
+    @orden
+    def siguiente_jugador(self):
+        """Cambiar de turno"""
+        if self.fase == 'Final':
+            self.error_fin()
+            return False
+        if not self.jugador:
+            self.jugador, self.adversario = self.jugadores
+        elif self.verificar_turno():
+            self.cancelar()
+            self.jugador, self.adversario = self.adversario, self.jugador
+            self.turno += 1
+        else:
+            return False
+        self.mensaje('info', f"Turno del jugador {self.jugador.indice + 1}")
+        self.evento('turno')
+        if self.paso:
+            self.resetear_paso()
+        return True
+
+    @orden
+    def siguiente_fase(self):
+        """Avanzar a la siguiente fase del juego"""
+        indice = self.FASES.index(self.fase)
+        if indice < len(self.FASES) - 1:
+            self.cambiar_fase(self.FASES[indice + 1])
+        else:
+            self.resetear_fase()
+
+    @orden
+    def cambiar_fase(self, nombre):
+        """Cambiar a otra fase del juego"""
+        if nombre in self.FASES:
+            self.cancelar()
+            self.fase = nombre
+            self.mensaje('info', f'Iniciada fase "{nombre}"')
+            self.evento('fase')
+            return True
+        return False
+
+    def resetear_fase(self):
+        """Volver a la primera fase del juego"""
+        self.cambiar_fase(self.FASES[0])
+
+    @orden
+    def siguiente_paso(self, manual = True):
+        """Avanzar al siguiente paso del turno"""
+        if self.fase == 'Final':
+            self.error_fin()
+            return
+        if self.fase != 'Principal':
+            self.error('Sólo la fase principal tiene pasos')
+            return
+        indice = self.PASOS.index(self.paso)
+        if indice < len(self.PASOS) - 1:
+            self.cambiar_paso(self.PASOS[indice + 1])
+        elif manual:
+            self.error('Ya no hay más pasos, juega para cambiar de turno')
+
+    @orden
+    def cambiar_paso(self, nombre):
+        """Cambiar a otro paso del turno"""
+        if nombre in self.PASOS:
+            self.cancelar()
+            self.paso = nombre
+            self.mensaje('info', f'Iniciado paso "{nombre}"')
+            self.paso_listo = False
+            self.evento('paso')
+            return True
+        return False
+
+    def resetear_paso(self):
+        """Volver al primer paso del turno"""
+        self.cambiar_paso(self.PASOS[0])
+
+    def verificar_turno(self):
+        """Comprobar que el jugador ha realizado un turno válido y podemos pasar al siguiente"""
+        if self.fase == "Preparación":
+            # Verificar que se han construido las infraestructuras iniciales necesarias
+            cantidades = { Capital: 0, Ciudad: 0, Base: 0 }
+            for infra in self.jugador.infraestructuras:
+                cantidades[type(infra)] += 1
+            if cantidades[Capital] < Capital.CANTIDAD or cantidades[Ciudad] < Ciudad.CANTIDAD or cantidades[Base] < Base.CANTIDAD:
+                self.error(f"Necesitas {Capital.CANTIDAD} capital, {Ciudad.CANTIDAD} ciudades y {Base.CANTIDAD} bases aéreas.")
+                return False
+            self.jugador.preparado = True
+        elif self.fase == 'Principal':
+            # Actualizar los medios aéreos del jugador (turnos, aterrizajes automáticos...)
+            for medio in self.jugador.medios:
+                if isinstance(medio, MedioAereo):
+                    medio.actualizar()
+            # Llevar a cabo vigilancias de los medios del adversario
+            self.vigilar()
+        return True
+
+    def vigilar(self):
+        """
+            Vigilancia al final del turno: cada medio del adversario con capacidad de vigilancia
+            intenta detectar a los medios aéreos del jugador dentro de su radio que aún no haya
+            detectado. Se evalúan todos los pares vigilante-objetivo a la vez, con una sola tirada
+            del generador de la partida. Las detecciones se aplican en el mismo orden que si cada
+            vigilante escanease por turnos, así que una Batería que derriba un medio impide que
+            los siguientes vigilantes lo detecten.
+        """
+        vigilantes = [medio for medio in self.adversario.medios if medio.vigilancia]
+        objetivos  = [medio for medio in self.jugador.medios if isinstance(medio, MedioAereo)]
+        if not vigilantes or not objetivos:
+            return
+
+        # Pares vigilante-objetivo dentro del radio de vigilancia y sin detectar aún
+        filas = [vigilante.casilla.indice for vigilante in vigilantes]
+        columnas = [objetivo.casilla.indice for objetivo in objetivos]
+        radios = np.array([vigilante.radio_vigilancia() for vigilante in vigilantes])
+        candidatos = self.tablero.distancias[np.ix_(filas, columnas)] <= radios[:, None]
+        indices = {id(vigilante): i for i, vigilante in enumerate(vigilantes)}
+        for j, objetivo in enumerate(objetivos):
+            for detector in objetivo.detectores:
+                if id(detector) in indices:
+                    candidatos[indices[id(detector)], j] = False
+
+        # Probabilidad de detección de cada par y tirada conjunta
+        vigilancia = np.array([vigilante.VIGILANCIA for vigilante in vigilantes]) / 100.0
+        huella = np.array([objetivo.HUELLA for objetivo in objetivos]) / 100.0
+        detecciones = candidatos & (self.aleatorio.random(candidatos.shape) <= vigilancia[:, None] * huella[None, :])
+
+        # Aplicar detecciones por orden de vigilante (los objetivos derribados ya no cuentan)
+        derribados = set()
+        for i, j in zip(*np.nonzero(detecciones)):
+            if j in derribados:
+                continue
+            objetivos[j].detectar(vigilantes[i])
+            if type(vigilantes[i]) is Bateria:
+                derribados.add(j)
+
+    @orden
+    def terminar(self):
+        """Terminar la partida, realizar el conteo de puntos y determinar el ganador"""
+        if self.fase == 'Final':
+            self.error_fin()
+            return
+        self.cambiar_fase('Final')
+        self.mensaje('info', 'Partida terminada')
+        puntos = [jugador.puntuar() for jugador in self.jugadores]
+        if puntos[0] == puntos[1]:
+            self.mensaje('info', '¡Los jugadores han empatado!')
+        else:
+            self.mensaje('info', f'¡Victoria para el jugador {puntos.index(max(puntos)) + 1}!')
+
+    # Decisiones de la IA
+
+    def pensar(self, plan, *args, fallo = None):
+        """
+            Obtener una decisión de la IA, calculada por plan(*args, aleatorio). La primera llamada la
+            lanza; si la partida es asíncrona se calcula en segundo plano y, hasta que termine, se
+            devuelve PENSANDO, así que hay que volver a llamar en los siguientes fotogramas. El plan
+            no debe modificar la partida: el resultado lo aplica quien llama, todo de una vez.
+            Su aleatoriedad sale del paso y turno actuales, no del generador de la partida, para que
+            no dependa de cuándo termine de pensar o de si se cancela (ver cancelar).
+            Si el plan falla, se informa del error y se devuelve fallo (una decisión que no hace nada).
+        """
+        if self.pensamiento is None:
+            aleatorio = np.random.default_rng([self.semilla, self.turno, self.PASOS.index(self.paso) if self.paso else 0])
+            self.pensamiento = concurrent.futures.Future()
+            tarea = functools.partial(self.ejecutar_plan, self.pensamiento, plan, *args, aleatorio)
+            if self.asincrona:
+                threading.Thread(target = tarea, daemon = True).start()
+            else:
+                tarea()
+        if not self.pensamiento.done():
+            return self.PENSANDO
+        pensamiento, self.pensamiento = self.pensamiento, None
+        excepcion = pensamiento.exception()
+        if excepcion is not None:
+            traceback.print_exception(excepcion)
+            self.error(f'La IA no ha podido decidir: {excepcion}')
+            return fallo
+        return pensamiento.result()
+
+    @staticmethod
+    def ejecutar_plan(futuro, plan, *args):
+        """Calcular una decisión de la IA y guardarla en el futuro, salvo que se haya cancelado antes de empezar"""
+        if not futuro.set_running_or_notify_cancel():
+            return
+        try:
+            futuro.set_result(plan(*args))
+        except BaseException as excepcion:
+            futuro.set_exception(excepcion)
+
+    def pensando(self):
+        """Si la IA está calculando una decisión en segundo plano"""
+        return self.pensamiento is not None and not self.pensamiento.done()
+
+    def cancelar(self):
+        """Descartar la decisión de la IA en curso (al cambiar de paso, de turno o resetear la partida)"""
+        if self.pensamiento is not None:
+            self.pensamiento.cancel()
+            self.pensamiento = None
+
+    # Actualización automática del estado
+
+    @orden_automatica
+    def actualizar(self):
+        """Ejecutar la lógica automática de la fase actual. La interfaz lo llama cada fotograma."""
+        if self.fase == 'Preparación':
+            self.actualizar_fase_preparacion()
+        elif self.fase == 'Principal':
+            self.actualizar_fase_principal()
+
+    def actualizar_fase_preparacion(self):
+        """Actualizar estado en la fase preparatoria"""
+        if not self.jugador:
+            self.siguiente_jugador()
+
+        # Saltar la fase preparatoria, para testear
+        if (self.saltar_preparacion or self.jugador.ia) and not self.jugador.preparado:
+            self.jugador.preparar()
+            self.siguiente_jugador()
+
+        # Cuando ambos jugadores están listos, comienzan los turnos
+        if all(jugador.preparado for jugador in self.jugadores):
+            self.siguiente_fase()
+
+    def actualizar_fase_principal(self):
+        """Actualizar estado en la fase de turnos"""
+        # Comenzamos el primer paso si acabamos de iniciar la fase
+        if not self.paso:
+            self.cambiar_paso(self.PASOS[0])
+        if not self.jugador:
+            self.siguiente_jugador()
+
+        # Actualizar paso específico del turno, si hace falta
+        if self.paso_listo:
+            return
+        if self.paso == 'Reporte':
+            self.actualizar_paso_reporte()
+        elif self.paso == 'Inteligencia':
+            self.actualizar_paso_inteligencia()
+        elif self.paso == 'Ingresos':
+            self.actualizar_paso_ingresos()
+        elif self.paso == 'Recursos':
+            self.actualizar_paso_recursos()
+        elif self.paso == 'Despliegue':
+            self.actualizar_paso_despliegue()
+
+    def actualizar_paso_reporte(self):
+        """Desarrollar el paso de reporte. El jugador recibe un reporte
+        informativo del movimiento del adversario."""
+        for reporte in dict.fromkeys(self.jugador.reporte): # Sin repetidos, pero en orden
+            self.mensaje('report', reporte)
+        self.jugador.validar_reporte()
+        self.paso_listo = True
+
+    def actualizar_paso_inteligencia(self):
+        """Desarrollar el paso de inteligencia. El jugador recibe información adicional
+        en función del nivel de inteligencia que haya adquirido."""
+        jugador, adversario = self.jugador, self.adversario
+        if jugador.inteligencia >= 1:
+            self.mensaje('intel', f'I1: Tu adversario ha cosechado {adversario.cosechado}M€')
+        if jugador.inteligencia >= 2:
+            nivel_capital  = [str(infra.nivel) for infra in adversario.infraestructuras if type(infra) is Capital][0]
+            nivel_ciudades = ', '.join([str(infra.nivel) for infra in adversario.infraestructuras if type(infra) is Ciudad])
+            nivel_bases    = ', '.join([str(infra.nivel) for infra in adversario.infraestructuras if type(infra) is Base])
+            self.mensaje('intel', f'I2: Infraestructuras adversarias: Capital ({nivel_capital}), Ciudades ({nivel_ciudades}), Bases ({nivel_bases}).')
+        if jugador.inteligencia >= 3:
+            medios_aereos      = sum(1 for medio in adversario.medios if isinstance(medio, MedioAereo))
+            medios_desplegados = sum(1 for medio in adversario.medios if isinstance(medio, MedioAereo) and medio.desplegado)
+            medios_antiaereos  = sum(1 for medio in adversario.medios if isinstance(medio, MedioAntiaereo))
+            self.mensaje('intel', f'I3: Medios adversarios: Aéreos ({medios_aereos}, {medios_desplegados} desplegados), Anti-aéreos ({medios_antiaereos})')
+        if jugador.inteligencia >= 4:
+            if len(adversario.medios) == 0:
+                self.mensaje('intel', 'I4: Tu adversario no tiene medios')
+            else:
+                medio = adversario.medios[self.aleatorio.integers(len(adversario.medios))]
+                estado = '' if isinstance(medio, MedioAntiaereo) else ' desplegado' if medio.desplegado else ' estacionado'
+                self.mensaje('intel', f'I4: Tu adversario tiene un {medio.NOMBRE}{estado} en la casilla {medio.casilla.id()}')
+        if jugador.inteligencia >= 5:
+            self.mensaje('intel', f'I5: Tu adversario tiene inteligencia de nivel {adversario.inteligencia}')
+        self.paso_listo = True
+
+    def actualizar_paso_ingresos(self):
+        """Desarrollar el paso de ingresos. El jugador cosecha crédito adicional gracias
+        a las casillas en las que tenga superioridad / supremacia aérea, así como sus ciudades."""
+        self.jugador.cosechar()
+        self.paso_listo = True
+
+    def actualizar_paso_recursos(self):
+        """Desarrollar el paso de recursos. El jugador invierte crédito en adquirir medios
+        aéreos, antiaéreos o estratégicos - como inteligencia o infraestructuras.
+        Sólo hay que hacer algo automáticamente en el caso del jugador IA"""
+        if not self.jugador.ia:
+            return
+        compras = self.pensar(self.jugador.planificar_compra, self.jugador.credito, fallo = [])
+        if compras is self.PENSANDO:
+            return
+        self.jugador.ia_compra(compras)
+        self.paso_listo = True
+
+    def actualizar_paso_despliegue(self):
+        """Desarrollar el paso de despliegue y ataque. El jugador moviliza aeronaves en alguna casilla.
+        Sólo hay que hacer algo automáticamente en el caso del jugador IA"""
+        if not self.jugador.ia:
+            return
+        plan = self.pensar(self.jugador.planificar_despliegue, fallo = ([], []))
+        if plan is self.PENSANDO:
+            return
+        movimientos, ataques = plan
+        self.jugador.ia_movimiento(movimientos)
+        self.jugador.ia_ataque(ataques)
+        self.paso_listo = True
+
+    # Simulación sin interfaz
+
+    @orden
+    def jugar_turno(self):
+        """
+            Completar automáticamente el turno del jugador actual (todos sus pasos) y ceder
+            el turno al adversario. Pensado para simular partidas sin interfaz entre IAs.
+        """
+        if not self.fase:
+            self.comenzar()
+        if self.fase == 'Preparación':
+            if not self.jugador.preparado:
+                self.jugador.preparar()
+            self.siguiente_jugador()
+            if all(jugador.preparado for jugador in self.jugadores):
+                self.siguiente_fase()
+        elif self.fase == 'Principal':
+            self.actualizar_fase_principal()
+            while self.paso != self.PASOS[-1]:
+                self.siguiente_paso(False)
+                self.actualizar_fase_principal()
+            self.siguiente_jugador()
+
+    def simular(self, turnos):
+        """
+            Simular un número de turnos (de ambos jugadores) sin interfaz. No es una orden: cada
+            turno se graba por separado, para que la repetición pueda buscar dentro de la simulación.
+        """
+        for _ in range(turnos):
+            if self.fase == 'Final':
+                break
+            self.jugar_turno()
+
+# < -------------------------------------------------------------------------- >
+#                            PROGRAMACIÓN LINEAL
+# < -------------------------------------------------------------------------- >
+
+class AMPL:
+    """
+        Representa un modelo de programación lineal dedicado a decidir el
+        movimiento de la IA del juego. El modelo y sus datos fijos se cargan una
+        vez y se quedan en el intérprete: para cada ejecución sólo se envían los
+        parámetros que han cambiado desde la anterior, y se vuelve a resolver.
+    """
+
+    VARIABLE_SOLUCION = 'X' # Variable del modelo que contiene la solución buscada
+
+    # Opciones para que el solver parta de la solución anterior, si las admite (por defecto,
+    # AMPL ya le pasa los valores anteriores de las variables como punto de partida)
+    ARRANQUE_CALIENTE = {
+        'gurobi': ('gurobi_options', 'mipstart=1'),
+        'cplex':  ('cplex_options',  'mipstartvalue=1'),
+    }
+
+    def __init__(self, tipo, solver = 'cbc'):
+        inicio = time.perf_counter()
+        self.tipo              = tipo
+        self.fichero_modelo    = os.path.join(CARPETA_AMPL, tipo + '.mod')
+        self.fichero_datos     = os.path.join(CARPETA_AMPL, tipo + '.dat')
+        self.solver            = solver
+        self.solucion          = None
+        self.cerrojo           = threading.Lock()  # Sólo un hilo a la vez puede configurar y resolver el modelo
+        self.valores           = {}                # Último valor enviado de cada parámetro, para no repetirlo
+        self.cargas            = 0                 # Veces que se han cargado los ficheros del modelo
+        self.tiempo_carga      = 0                 # Segundos en arrancar el intérprete y cargar los ficheros, en total
+        self.actualizaciones   = 0                 # Parámetros enviados al modelo
+        self.omitidas          = 0                 # Parámetros no enviados por no haber cambiado
+        self.resoluciones      = 0                 # Veces que se ha resuelto el modelo
+        self.tiempo_resolucion = 0                 # Segundos resolviendo el modelo en total
+        self.ultima_resolucion = 0                 # Segundos que tardó la última resolución
+        self.version           = None              # Resumen del contenido de los ficheros del modelo (ver CacheDecisiones)
+        self.arrancar()
+        self.tiempo_carga     += time.perf_counter() - inicio
+        self.cargar()
+
+    def arrancar(self):
+        """
+            Arrancar el intérprete de AMPL. amplpy se importa aquí, y no al principio del módulo, para
+            que el motor funcione sin él cuando todos los modelos se resuelven de forma nativa.
+        """
+        import amplpy
+        self.ampl = amplpy.AMPL()
+
+    def cargar(self):
+        """Cargar los ficheros del modelo y configurar el solver, sólo hace falta hacerlo una vez"""
+        inicio = time.perf_counter()
+        self.ampl.read(self.fichero_modelo)
+        self.ampl.read_data(self.fichero_datos)
+        self.configurar()
+        self.versionar()
+        self.valores = {}
+        self.cargas += 1
+        self.tiempo_carga += time.perf_counter() - inicio
+
+    def resetear(self):
+        """Descartar los parámetros y la solución, volviendo a cargar el modelo desde los ficheros"""
+        self.ampl.reset()
+        self.solucion = None
+        self.cargar()
+
+    def versionar(self):
+        """
+            Resumir el contenido de los ficheros del modelo, que forma parte de la clave de la caché
+            de decisiones: si se editan, las soluciones guardadas con la versión anterior se descartan.
+        """
+        resumen = hashlib.sha1()
+        for fichero in (self.fichero_modelo, self.fichero_datos):
+            with open(fichero, 'rb') as f:
+                resumen.update(f.read())
+        self.version = resumen.hexdigest()
+        g_decisiones.versionar(self.tipo, self.version)
+
+    def configurar(self):
+        "Establecer las opciones del solver"
+        self.ampl.set_option('solver', self.solver)
+        if self.solver in self.ARRANQUE_CALIENTE:
+            self.ampl.set_option(*self.ARRANQUE_CALIENTE[self.solver])
+
+    def resolver(self):
+        """Resolver el problema con el solver escogido"""
+        inicio = time.perf_counter()
+        self.ampl.solve()
+        self.contar_resolucion(inicio)
+        if self.ampl.solve_result != 'solved':
+            self.solucion = None
+            return False
+        else:
+            self.solucion = self.variable(self.VARIABLE_SOLUCION)
+            return True
+
+    def contar_resolucion(self, inicio):
+        """Actualizar las estadísticas con una resolución que comenzó en el instante dado"""
+        self.ultima_resolucion = time.perf_counter() - inicio
+        self.tiempo_resolucion += self.ultima_resolucion
+        self.resoluciones += 1
+
+    def variable(self, nombre = VARIABLE_SOLUCION):
+        """Leer el valor de una variable"""
+        try:
+            return self.ampl.get_variable(nombre).get_values().to_list()
+        except:
+            return None
+
+    @staticmethod
+    def iguales(anterior, valor):
+        """Comparar dos valores de un parámetro, que pueden ser arrays de NumPy"""
+        if isinstance(anterior, np.ndarray) or isinstance(valor, np.ndarray):
+            return isinstance(anterior, np.ndarray) and isinstance(valor, np.ndarray) and np.array_equal(anterior, valor)
+        return anterior == valor
+
+    def indexar(self, array, conjuntos):
+        """Convertir un array indexado por los conjuntos dados (ya enviados) en un diccionario por índice, como lo espera amplpy"""
+        ejes = [self.valores[conjunto] for conjunto in conjuntos]
+        indices = ejes[0] if len(ejes) == 1 else itertools.product(*ejes)
+        return dict(zip(indices, array.ravel().tolist()))
+
+    def parametro(self, nombre, valor, *conjuntos):
+        """
+            Cambiar el valor de un parámetro del modelo, si es distinto del que ya tiene. Puede ser un
+            array de NumPy indexado por los conjuntos dados, uno por dimensión y ya enviados (ver conjunto);
+            sólo se convierte a diccionario al enviarlo al intérprete.
+        """
+        if self.iguales(self.valores.get(nombre), valor):
+            self.omitidas += 1
+            return True
+        try:
+            self.ampl.get_parameter(nombre).set_values(self.indexar(valor, conjuntos) if isinstance(valor, np.ndarray) else valor)
+        except:
+            return False
+        self.valores[nombre] = copy.copy(valor)
+        self.actualizaciones += 1
+        return True
+
+    def conjunto(self, nombre, valores):
+        """Cambiar los elementos de un conjunto del modelo, si son distintos de los que ya tiene"""
+        if self.valores.get(nombre) == valores:
+            self.omitidas += 1
+            return True
+        try:
+            self.ampl.get_set(nombre).set_values(valores)
+        except:
+            return False
+        self.valores[nombre] = copy.copy(valores)
+        self.actualizaciones += 1
+        return True
+
+    def ejecutar(self):
+        """
+            Ejecutar el modelo con los parámetros actuales. Si ya se resolvió con los mismos,
+            se toma la solución de la caché sin llamar al solver (ver CacheDecisiones).
+        """
+        clave = g_decisiones.clave((self.tipo, self.solver, self.version), self.valores)
+        self.solucion = g_decisiones.buscar(clave)
+        if self.solucion is None and self.resolver():
+            g_decisiones.añadir(clave, self.tipo, self.version, self.solucion)
+        return self.solucion is not None
+
+def leer_datos_ampl(fichero):
+    """
+        Leer los conjuntos y parámetros de un fichero de datos de AMPL (.dat). Sólo entiende lo
+        que usan los modelos del juego: conjuntos ("set A := ...;"), parámetros indexados por
+        un conjunto ("param K := A1 67 ...;") y tablas ("param Y: A1 A2 ... := C1 120 0 ...;").
+        Algunos ficheros olvidan el punto y coma, así que cada set o param empieza otra sentencia.
+        Devuelve los conjuntos como listas y los parámetros como diccionarios por índice.
+    """
+    with open(fichero, encoding = 'latin-1') as f:
+        lineas = [linea.split('#', 1)[0] for linea in f]
+    conjuntos, parametros = {}, {}
+    for sentencia in re.split(r';|\s(?=(?:set|param)\s)', ' '.join(lineas)):
+        cabecera, _, valores = sentencia.partition(':=')
+        cabecera, valores = cabecera.split(), valores.split()
+        if len(cabecera) < 2:
+            continue
+        tipo, nombre = cabecera[0], cabecera[1].rstrip(':')
+        if tipo == 'set':
+            conjuntos[nombre] = valores
+        elif tipo == 'param' and ':' in sentencia.partition(':=')[0]:
+            columnas = cabecera[2:] if cabecera[1].endswith(':') else cabecera[3:]
+            n = len(columnas) + 1
+            parametros[nombre] = {
+                (fila[0], columna): float(valor)
+                for fila in (valores[i:i + n] for i in range(0, len(valores), n))
+                for columna, valor in zip(columnas, fila[1:])
+            }
+        elif tipo == 'param':
+            parametros[nombre] = {clave: float(valor) for clave, valor in zip(valores[::2], valores[1::2])}
+    return conjuntos, parametros
+
+class AMPLNativo(AMPL):
+    """
+        Modelo resuelto directamente en Python, sin intérprete de AMPL ni solver, para los
+        modelos lo bastante pequeños como para encontrar la solución exacta por fuerza bruta.
+        Tiene la misma interfaz que AMPL, y los datos fijos se leen del mismo fichero .dat;
+        cada subclase implementa optimizar con las restricciones de su fichero .mod.
+    """
+
+    def __init__(self, tipo):
+        self.conjuntos  = {} # Conjuntos del modelo, como listas
+        self.parametros = {} # Parámetros del modelo, como diccionarios por índice
+        self.arrays     = {} # Parámetros ya convertidos a arrays (ver array)
+        self.variables  = {} # Valores de las variables en la última solución
+        super().__init__(tipo, solver = 'nativo')
+
+    def arrancar(self):
+        """No hay intérprete que arrancar"""
+        pass
+
+    def cargar(self):
+        """Leer los datos fijos del modelo"""
+        inicio = time.perf_counter()
+        self.conjuntos, self.parametros = leer_datos_ampl(self.fichero_datos)
+        self.arrays = {}
+        self.valores = {}
+        self.cargas += 1
+        self.tiempo_carga += time.perf_counter() - inicio
+
+    def resetear(self):
+        """Descartar los parámetros y la solución, volviendo a leer los datos del fichero"""
+        self.solucion = None
+        self.variables = {}
+        self.cargar()
+
+    def configurar(self):
+        """No hay solver que configurar"""
+        pass
+
+    def ejecutar(self):
+        """
+            Ejecutar el modelo con los parámetros actuales. No pasa por la caché de decisiones:
+            resolver de forma nativa cuesta menos que calcular la clave de todos los parámetros.
+        """
+        return self.resolver()
+
+    def resolver(self):
+        """Resolver el problema de forma exacta"""
+        inicio = time.perf_counter()
+        self.variables = self.optimizar()
+        self.contar_resolucion(inicio)
+        self.solucion = self.variable(self.VARIABLE_SOLUCION) if self.variables else None
+        return self.solucion is not None
+
+    def optimizar(self):
+        """Valores de las variables en la solución óptima (vacío si no hay solución). Lo implementa cada modelo."""
+        raise NotImplementedError
+
+    def variable(self, nombre = AMPL.VARIABLE_SOLUCION):
+        """Leer el valor de una variable, como pares (índice, valor) igual que amplpy"""
+        valores = self.variables.get(nombre)
+        return list(valores.items()) if valores is not None else None
+
+    def parametro(self, nombre, valor, *conjuntos):
+        """
+            Cambiar el valor de un parámetro del modelo, si es distinto del que ya tiene.
+            Las listas se asignan en el orden de su conjunto, y los arrays se usan tal cual.
+        """
+        if self.iguales(self.valores.get(nombre), valor):
+            self.omitidas += 1
+            return True
+        if isinstance(valor, np.ndarray):
+            nuevo = valor
+        elif isinstance(valor, dict):
+            nuevo = dict(valor)
+        elif len(valor) == 1:
+            nuevo = valor[0]
+        else:
+            indices = next((conjunto for conjunto in self.conjuntos.values() if len(conjunto) == len(valor)), None)
+            if indices is None:
+                return False
+            nuevo = dict(zip(indices, valor))
+        self.parametros[nombre] = nuevo
+        self.arrays.pop(nombre, None)
+        self.valores[nombre] = copy.copy(valor)
+        self.actualizaciones += 1
+        return True
+
+    def conjunto(self, nombre, valores):
+        """Cambiar los elementos de un conjunto del modelo, si son distintos de los que ya tiene"""
+        if self.valores.get(nombre) == valores:
+            self.omitidas += 1
+            return True
+        self.conjuntos[nombre] = list(valores)
+        self.arrays = {} # Los parámetros indexados por el conjunto cambian de forma
+        self.valores[nombre] = copy.copy(valores)
+        self.actualizaciones += 1
+        return True
+
+    def array(self, nombre, *conjuntos):
+        """
+            Parámetro indexado por uno o dos conjuntos, como array de NumPy en el orden de los
+            conjuntos. Se guarda hasta que el parámetro cambie, así los datos fijos se convierten una vez.
+        """
+        if isinstance(self.parametros[nombre], np.ndarray):
+            return self.parametros[nombre]
+        if nombre not in self.arrays:
+            valores = self.parametros[nombre]
+            if len(conjuntos) == 1:
+                array = [valores[i] for i in self.conjuntos[conjuntos[0]]]
+            else:
+                array = [[valores[(i, j)] for j in self.conjuntos[conjuntos[1]]] for i in self.conjuntos[conjuntos[0]]]
+            self.arrays[nombre] = np.array(array, dtype = float)
+        return self.arrays[nombre]
+
+class CompraNativa(AMPLNativo):
+    """
+        Modelo de compra (compra.mod) resuelto enumerando con NumPy todas las combinaciones de
+        acciones, que son pocas (2^9). Para cada acción j, su puntuación es la suma de Y[i,j] de
+        los condicionantes que se dan (S[i] = 1). Se busca la combinación de mayor puntuación que:
+            R1: no cuesta (K) más que el presupuesto (P)
+            R2: sólo incluye acciones cuya puntuación es al menos 3 veces su coste
+        (R2 sólo restringe las acciones que se llevan a cabo, con X[j] = 0 se cumple siempre).
+        Si hay varias combinaciones óptimas, se escoge la más barata.
+    """
+
+    def cargar(self):
+        super().cargar()
+        n = len(self.conjuntos['A'])
+        self.combinaciones = (np.arange(2 ** n)[:, None] >> np.arange(n)) & 1 # Una fila por combinación de acciones
+
+    def optimizar(self):
+        Y = self.array('Y', 'C', 'A')
+        S = self.array('S', 'C')
+        K = self.array('K', 'A')
+        P = float(self.parametros['P'])
+
+        # Restricciones de todas las combinaciones a la vez
+        puntos = S @ Y
+        permitidas = puntos / K >= 3
+        costes = self.combinaciones @ K
+        validas = (costes <= P) & ~self.combinaciones[:, ~permitidas].any(axis = 1)
+
+        # Mejor combinación válida (la vacía siempre lo es), y a igual puntuación la más barata
+        objetivo = self.combinaciones @ puntos
+        candidatas = np.flatnonzero(validas)
+        mejor = candidatas[np.lexsort((costes[candidatas], -objetivo[candidatas]))[0]]
+        return { 'X': dict(zip(self.conjuntos['A'], self.combinaciones[mejor].tolist())) }
+
+class MovimientoNativo(AMPLNativo):
+    """
+        Modelos de despliegue (mov_*.mod) resueltos para todos los medios aéreos de un tipo a la vez.
+        Cada medio a de A, que sale de la base N[a], escoge una casilla j de L, cuya puntuación es
+        la suma de Y[i] de los condicionantes que se dan en ella (S[i,j] = 1), de manera que:
+            R1: cada medio se despliega en una casilla como mucho
+            R2: la distancia de la casilla a la base del medio (D[a,j]) no supera el alcance (R)
+            R3: desde cada base b no se despliegan más de K[b] medios
+        Los medios sólo compiten entre sí por R3, así que basta con llevar cada uno a su mejor
+        casilla y, en cada base, quedarse con los K[b] de mayor puntuación (a igualdad, los primeros).
+        No se despliega en casillas sin puntuación. Como casi todas las X son 0, la solución
+        sólo contiene los despliegues, como pares ((a, j), 1).
+    """
+
+    def optimizar(self):
+        A, L, B = self.conjuntos['A'], self.conjuntos['L'], self.conjuntos['B']
+        if not A or not L:
+            return { 'X': {} }
+        Y = self.array('Y', 'C')
+        S = self.array('S', 'C', 'L')
+        D = self.array('D', 'A', 'L')
+        N = self.array('N', 'A')
+        K = self.array('K', 'B')
+        R = float(self.parametros['R'])
+
+        # Mejor casilla de cada medio dentro de su alcance (R1, R2)
+        puntos = np.where(D <= R, Y @ S, -np.inf)
+        casillas = puntos.argmax(axis = 1)
+        mejores = puntos[np.arange(len(A)), casillas]
+
+        # Puesto de cada medio en su base, de mayor a menor puntuación (R3)
+        posiciones = np.argsort(B)
+        bases = posiciones[np.searchsorted(B, N, sorter = posiciones)] # Posición en B de la base de cada medio
+        clasificacion = np.lexsort((-mejores, bases))
+        primeros = np.searchsorted(bases[clasificacion], bases[clasificacion])
+        puestos = np.empty(len(A), dtype = int)
+        puestos[clasificacion] = np.arange(len(A)) - primeros
+
+        desplegados = np.flatnonzero((puestos < K[bases]) & (mejores > 0))
+        return { 'X': {(A[a], L[casillas[a]]): 1 for a in desplegados} }
+
+class AtaqueNativo(AMPLNativo):
+    """
+        Modelos de ataque (ataque_*.mod) resueltos para todos los medios aéreos de un tipo a la vez.
+        Cada medio a de A escoge una casilla objetivo j de L, cuya puntuación es la suma de Y[i] de los
+        condicionantes que se dan en ella (S[i,j] = 1), de manera que:
+            R1: cada medio ataca una casilla como mucho
+            R2: la distancia del medio a la casilla (D[a,j]) no supera su radio de ataque (R)
+            R3: cada casilla la ataca un medio como mucho (el primer ataque ya destruye todo)
+        Es un emparejamiento en el que sólo puntúan las casillas, así que las casillas que se pueden
+        atacar a la vez forman un matroide, y basta con recorrerlas de mayor a menor puntuación y
+        quedarse con las que admitan un medio, reasignando los ya elegidos si hace falta (caminos de
+        aumento). La solución sólo contiene los ataques, como pares ((a, j), 1).
+    """
+
+    def optimizar(self):
+        A, L = self.conjuntos['A'], self.conjuntos['L']
+        if not A or not L:
+            return { 'X': {} }
+        Y = self.array('Y', 'C')
+        S = self.array('S', 'C', 'L')
+        D = self.array('D', 'A', 'L')
+        R = float(self.parametros['R'])
+        puntos = Y @ S
+        alcance = [np.flatnonzero(fila).tolist() for fila in (D <= R).T] # Medios que alcanzan cada casilla
+        objetivos = {} # Casilla asignada a cada medio
+
+        def asignar(j, vistos):
+            """Buscar un medio para la casilla j, moviendo otros medios a casillas alternativas"""
+            for a in alcance[j]:
+                if a in vistos:
+                    continue
+                vistos.add(a)
+                if a not in objetivos or asignar(objetivos[a], vistos):
+                    objetivos[a] = j
+                    return True
+            return False
+
+        for j in np.argsort(-puntos, kind = 'stable'):
+            if puntos[j] <= 0:
+                break
+            asignar(j, set())
+        return { 'X': {(A[a], L[j]): 1 for a, j in sorted(objetivos.items())} }
+
+class PosicionNativo(AMPLNativo):
+    """
+        Modelos de posición (pos_*.mod) resueltos de forma exacta: se escoge la casilla candidata de mayor
+        puntuación, que es la suma de Y[i] de los condicionantes que se dan en ella (S[i,j] = 1). Las
+        candidatas (L, o B para los medios aéreos, que se colocan en bases; en los ficheros .dat ambos
+        conjuntos aparecen sin rellenar, vale el que se haya enviado) ya cumplen R2, y a igual puntuación
+        se escoge la primera. La solución sólo contiene la casilla escogida.
+    """
+
+    def optimizar(self):
+        conjunto = 'B' if 'B' in self.valores else 'L'
+        casillas = self.conjuntos[conjunto]
+        if not casillas:
+            return {}
+        puntos = self.array('Y', 'C') @ self.array('S', 'C', conjunto)
+        return { 'X': {casillas[int(puntos.argmax())]: 1} }
+
+# Modelos que se pueden resolver sin AMPL (ver AMPL_RESOLUCION)
+RESOLUTORES_NATIVOS = {
+    AMPL_COMPRA: CompraNativa,
+    **{AMPL_MOVIMIENTO + medio: MovimientoNativo for medio in ('caza', 'ataque', 'transporte', 'heli', 'dron')},
+    **{AMPL_ATAQUE + medio: AtaqueNativo for medio in ('caza', 'ataque', 'heli', 'dron')},
+    **{AMPL_POSICION + medio: PosicionNativo for medio in ('caza', 'ataque', 'transporte', 'heli', 'dron', 'radar', 'bateria', 'ciudad', 'base')},
+}
+
+def contrastar_modelo(nombre, parametros):
+    """
+        Resolver un modelo con los mismos parámetros mediante AMPL y de forma nativa, para
+        comprobar que el resolutor nativo es correcto. parametros es una lista de casos, cada
+        uno un diccionario {parámetro: valor}. Devuelve los casos en los que la solución difiere,
+        como tuplas (caso, solución de AMPL, solución nativa). Si hay varias soluciones óptimas,
+        AMPL puede dar cualquiera de ellas, así que hay que revisar esos casos a mano.
+    """
+    ampl, nativo = AMPL(nombre), RESOLUTORES_NATIVOS[nombre](nombre)
+    diferencias = []
+    for caso in parametros:
+        soluciones = []
+        for modelo in (ampl, nativo):
+            for parametro, valor in caso.items():
+                modelo.parametro(parametro, valor)
+            modelo.resolver() # Sin pasar por la caché de decisiones
+            soluciones.append([round(valor) for _, valor in modelo.solucion or []])
+        if soluciones[0] != soluciones[1]:
+            diferencias.append((caso, *soluciones))
+    return diferencias
+
+class CacheDecisiones:
+    """
+        Caché LRU de las soluciones de los modelos que se resuelven con AMPL, compartida por todos
+        ellos. La clave es un resumen del nombre del modelo, la versión de sus ficheros y todos los
+        parámetros enviados, y lo que se guarda es la solución (variable X), de manera que las
+        decisiones que se repiten, en el mismo turno o en otras partidas, no pasan por el solver.
+        Puede guardarse en disco y cargarse en la siguiente sesión; las soluciones de una versión
+        anterior de los ficheros de un modelo se descartan en cuanto se carga el modelo.
+    """
+    FORMATO = 2 # Versión del fichero de la caché (ver guardar)
+
+    def __init__(self, maximo):
+        self.maximo     = maximo                     # Soluciones que se guardan como mucho
+        self.soluciones = collections.OrderedDict()  # Soluciones por clave, de la menos a la más reciente
+        self.cerrojo    = threading.Lock()           # Los modelos se resuelven desde los hilos de la IA
+        self.aciertos   = 0                          # Soluciones encontradas en la caché
+        self.fallos     = 0                          # Soluciones que ha habido que calcular
+        self.versiones  = {}                         # Versión de los ficheros de cada modelo cargado
+
+    @staticmethod
+    def clave(modelo, parametros):
+        """
+            Clave de una ejecución del modelo (nombre, solver y versión) con los parámetros dados.
+            Los arrays de NumPy se resumen a partir de sus bytes, sin convertirlos a texto.
+        """
+        resumen = hashlib.sha1(repr(modelo).encode())
+        for nombre in sorted(parametros):
+            valor = parametros[nombre]
+            resumen.update(nombre.encode())
+            if isinstance(valor, np.ndarray):
+                resumen.update(f'{valor.dtype}{valor.shape}'.encode())
+                resumen.update(np.ascontiguousarray(valor).tobytes())
+            else:
+                resumen.update(repr(valor).encode())
+        return resumen.hexdigest()
+
+    def versionar(self, modelo, version):
+        """Anotar la versión actual de los ficheros de un modelo, descartando las soluciones de otras versiones"""
+        with self.cerrojo:
+            self.versiones[modelo] = version
+            for clave, (nombre, anterior, _) in list(self.soluciones.items()):
+                if nombre == modelo and anterior != version:
+                    del self.soluciones[clave]
+
+    def buscar(self, clave):
+        """Solución guardada con la clave dada, o None si no está"""
+        with self.cerrojo:
+            solucion = self.soluciones.get(clave)
+            if solucion is None:
+                self.fallos += 1
+                return None
+            self.soluciones.move_to_end(clave)
+            self.aciertos += 1
+            return list(solucion[2])
+
+    def añadir(self, clave, modelo, version, solucion):
+        """
+            Guardar una solución del modelo con la versión dada, descartando la usada hace más tiempo
+            si se supera el máximo. Si el modelo ya está cargado con otra versión, no se guarda.
+        """
+        with self.cerrojo:
+            if self.versiones.get(modelo, version) != version:
+                return
+            self.soluciones[clave] = (modelo, version, [tuple(valor) for valor in solucion])
+            self.soluciones.move_to_end(clave)
+            while len(self.soluciones) > self.maximo:
+                self.soluciones.popitem(last = False)
+
+    def tasa(self):
+        """Proporción de aciertos (0.0 - 1.0)"""
+        consultas = self.aciertos + self.fallos
+        return self.aciertos / consultas if consultas else 0
+
+    def guardar(self, fichero):
+        """Guardar las soluciones en un fichero, para la siguiente sesión"""
+        with self.cerrojo:
+            soluciones = [[clave, *solucion] for clave, solucion in self.soluciones.items()]
+        with open(fichero, 'w', encoding = 'utf-8') as f:
+            json.dump({'formato': self.FORMATO, 'soluciones': soluciones}, f)
+
+    def cargar(self, fichero):
+        """
+            Añadir las soluciones guardadas en un fichero (ver guardar). Devuelve si se ha podido.
+            Los ficheros de otro formato, que no llevan la versión de los modelos, se ignoran.
+        """
+        try:
+            with open(fichero, encoding = 'utf-8') as f:
+                datos = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(datos, dict) or datos.get('formato') != self.FORMATO:
+            return False
+        for clave, modelo, version, solucion in datos['soluciones']:
+            self.añadir(clave, modelo, version, solucion)
+        return True
+
+g_decisiones = CacheDecisiones(DECISIONES_MAXIMO) # Soluciones de todos los modelos (ver AMPL.ejecutar)
+
+class ModelosAMPL:
+    """
+        Modelos de AMPL de la IA, compartidos por todos los jugadores y partidas. Cada modelo
+        arranca su propio intérprete de AMPL, lo cual es lento, así que no se crea hasta
+        que algún jugador lo usa por primera vez, y después se reutiliza (también al
+        resetear la partida). Lleva la cuenta de lo que tarda cada uno en cargar y resolver.
+    """
+
+    def __init__(self):
+        self.modelos = {}                 # Modelos ya cargados, por nombre
+        self.cerrojo = threading.Lock()   # Para no cargar dos veces un modelo pedido a la vez desde dos hilos
+
+    def modelo(self, nombre):
+        """Modelo con el nombre dado, cargándolo si es la primera vez que se pide (ver AMPL_RESOLUCION)"""
+        with self.cerrojo:
+            if nombre not in self.modelos:
+                nativo = AMPL_RESOLUCION.get(nombre) == 'nativo' and nombre in RESOLUTORES_NATIVOS
+                self.modelos[nombre] = RESOLUTORES_NATIVOS[nombre](nombre) if nativo else AMPL(nombre)
+            return self.modelos[nombre]
+
+    def estadisticas(self):
+        """Cargas, parámetros enviados y tiempos (en segundos) de carga y resolución de cada modelo cargado"""
+        return {
+            nombre: {
+                'cargas':          modelo.cargas,
+                'carga':           modelo.tiempo_carga,
+                'actualizaciones': modelo.actualizaciones,
+                'omitidas':        modelo.omitidas,
+                'resoluciones':    modelo.resoluciones,
+                'resolucion':      modelo.tiempo_resolucion,
+                'media':           modelo.tiempo_resolucion / modelo.resoluciones if modelo.resoluciones else 0,
+                'ultima':          modelo.ultima_resolucion,
+            }
+            for nombre, modelo in self.modelos.items()
+        }
+
+    def informe(self):
+        """Líneas de texto con los tiempos de cada modelo cargado"""
+        return [
+            f"{nombre}: {e['cargas']} cargas ({1000 * e['carga']:.1f} ms), {e['resoluciones']} resoluciones "
+            f"({1000 * e['resolucion']:.1f} ms, {1000 * e['media']:.1f} ms de media, {1000 * e['ultima']:.1f} ms la última), "
+            f"{e['actualizaciones']} parámetros enviados y {e['omitidas']} sin cambios"
+            for nombre, e in self.estadisticas().items()
+        ] + [
+            f"caché: {g_decisiones.aciertos} aciertos y {g_decisiones.fallos} fallos ({100 * g_decisiones.tasa():.1f} %), "
+            f"{len(g_decisiones.soluciones)} soluciones guardadas"
+        ]
+
+g_modelos = ModelosAMPL() # Modelos compartidos por todos los jugadores (ver Jugador.modelo)
+
+# < -------------------------------------------------------------------------- >
+#                               REPETICIONES
+# < -------------------------------------------------------------------------- >
+
+class Repeticion:
+    """
+        Grabación de una partida: la semilla y configuración con las que empezó, las órdenes
+        de primer nivel que se han ejecutado (ver orden) y fotogramas clave cada cierto número
+        de turnos. Como toda la aleatoriedad sale del generador de la partida, volver a ejecutar
+        las órdenes reproduce exactamente la misma partida, sin interfaz y mucho más rápido.
+    """
+
+    def __init__(self, semilla, ia, saltar_preparacion):
+        self.semilla            = semilla            # Semilla del generador aleatorio de la partida
+        self.ia                 = list(ia)           # Qué jugadores son IA
+        self.saltar_preparacion = saltar_preparacion # Configuración de la partida
+        self.ordenes            = []                 # Órdenes codificadas: [objeto, método, argumentos]
+        self.claves             = {}                 # Fotogramas clave: turno -> (órdenes ejecutadas, instantánea)
+
+    # Codificación de las órdenes
+
+    def codificar(self, objeto, metodo, args):
+        """Codificar una orden de manera que pueda ejecutarse sobre cualquier copia de la partida"""
+        return [self.referencia(objeto), metodo, [self.referencia(arg) for arg in args]]
+
+    def referencia(self, objeto):
+        """Convertir un objeto de la partida en una referencia a él (lista), el resto de valores se dejan igual"""
+        if isinstance(objeto, Partida):
+            return ['P']
+        if isinstance(objeto, Jugador):
+            return ['J', objeto.indice]
+        if isinstance(objeto, Casilla):
+            return ['C', objeto.x, objeto.y]
+        if isinstance(objeto, Medio):
+            return ['M', objeto.jugador.indice, objeto.jugador.medios.index(objeto)]
+        if isinstance(objeto, type):
+            return ['T', objeto.__name__]
+        return objeto
+
+    def resolver(self, partida, referencia):
+        """Obtener el objeto de la partida al que apunta una referencia (ver referencia)"""
+        if not isinstance(referencia, list):
+            return referencia
+        tipo, *datos = referencia
+        if tipo == 'P':
+            return partida
+        if tipo == 'J':
+            return partida.jugadores[datos[0]]
+        if tipo == 'C':
+            return partida.tablero.casillas[datos[0]][datos[1]]
+        if tipo == 'M':
+            return partida.jugadores[datos[0]].medios[datos[1]]
+        if tipo == 'T':
+            return globals()[datos[0]]
+
+    # Grabación
+
+    def registrar(self, registro, partida):
+        """Añadir una orden ya ejecutada a la grabación"""
+        self.ordenes.append(registro)
+        self.fotografiar(partida, len(self.ordenes))
+
+    def fotografiar(self, partida, ejecutadas):
+        """Tomar un fotograma clave si no hay ninguno en los últimos REPETICION_INTERVALO turnos"""
+        turno = partida.turno
+        if turno > 0 and not any(turno - REPETICION_INTERVALO < clave <= turno for clave in self.claves):
+            self.claves[turno] = (ejecutadas, partida.instantanea())
+
+    # Reproducción
+
+    def ejecutar(self, partida, registro):
+        """Ejecutar una orden codificada sobre una partida"""
+        objeto, metodo, args = registro
+        getattr(self.resolver(partida, objeto), metodo)(*[self.resolver(partida, arg) for arg in args])
+
+    def buscar(self, turno = None, vista = None):
+        """
+            Reproducir la partida sin interfaz hasta el comienzo del turno indicado (o hasta el
+            final de la grabación) y devolverla. Se parte del último fotograma clave anterior,
+            así que el coste sólo depende de la distancia a él. Por el camino se toman fotogramas
+            clave nuevos, de manera que las siguientes búsquedas (p. ej. al cargar de fichero) son rápidas.
+        """
+        anteriores = [clave for clave in self.claves if turno is None or clave <= turno]
+        if anteriores:
+            ejecutadas, instantanea = self.claves[max(anteriores)]
+            partida = copy.deepcopy(instantanea, instantanea.compartidos())
+            partida.vista = vista or Vista()
+            partida.grabar = False
+        else:
+            ejecutadas = 0
+            partida = Partida(self.ia, vista, self.saltar_preparacion, self.semilla, grabar = False)
+        for registro in self.ordenes[ejecutadas:]:
+            if turno is not None and partida.turno >= turno:
+                break
+            self.ejecutar(partida, registro)
+            ejecutadas += 1
+            self.fotografiar(partida, ejecutadas)
+        return partida
+
+    # Ficheros
+
+    def guardar(self, fichero):
+        """Guardar la grabación (sin los fotogramas clave, que se regeneran al reproducirla)"""
+        datos = {
+            'semilla':            self.semilla,
+            'ia':                 self.ia,
+            'saltar_preparacion': self.saltar_preparacion,
+            'ordenes':            self.ordenes
+        }
+        with open(fichero, 'w', encoding = 'utf-8') as f:
+            json.dump(datos, f)
+
+    @classmethod
+    def cargar(cls, fichero):
+        """Cargar una grabación guardada con guardar"""
+        with open(fichero, encoding = 'utf-8') as f:
+            datos = json.load(f)
+        repeticion = cls(datos['semilla'], datos['ia'], datos['saltar_preparacion'])
+        repeticion.ordenes = datos['ordenes']
+        return repeticion
+
+# Comparar el resolutor nativo de la compra con AMPL en casos aleatorios: python motor.py --contrastar [casos]
+if __name__ == '__main__' and len(sys.argv) > 1 and sys.argv[1] == '--contrastar':
+    casos = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    aleatorio = np.random.default_rng()
+    parametros = [{ 'P': [int(aleatorio.integers(0, 2000))], 'S': aleatorio.integers(0, 2, 29).tolist() } for _ in range(casos)]
+    diferencias = contrastar_modelo(AMPL_COMPRA, parametros)
+    for caso, solucion_ampl, solucion_nativa in diferencias:
+        print(f"P = {caso['P'][0]}, S = {caso['S']}: AMPL {solucion_ampl}, nativo {solucion_nativa}")
+    print(f"{len(diferencias)} diferencias en {casos} casos")
+
+# Reproducir una repetición sin interfaz: python motor.py <fichero> [turno]
+elif __name__ == '__main__' and len(sys.argv) > 1:
+    repeticion = Repeticion.cargar(sys.argv[1])
+    turno = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    inicio = time.perf_counter()
+    partida = repeticion.buscar(turno)
+    print(f"Turno {partida.turno}, fase {partida.fase}, paso {partida.paso} ({len(repeticion.ordenes)} órdenes, {time.perf_counter() - inicio:.3f}s)")
+    for jugador in partida.jugadores:
+        print(f"J{jugador.indice + 1}: crédito {jugador.credito}, {len(jugador.medios)} medios, {len(jugador.infraestructuras)} infraestructuras")
+    for linea in g_modelos.informe():
+        print(f"AMPL {linea}")
+
+elif __name__ == '__main__':
+    print("Uso: python motor.py <fichero> [turno] | python motor.py --contrastar [casos]")
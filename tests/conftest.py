@@ -0,0 +1,12 @@
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+@pytest.fixture(autouse = True)
+def carpeta_raiz(monkeypatch):
+    """Los ficheros de los modelos, imágenes y sonidos se buscan a partir de la carpeta del juego"""
+    monkeypatch.chdir(RAIZ)
@@ -0,0 +1,54 @@
+"""Comprobar la IA pensando en segundo plano"""
+import time
+
+import pytest
+
+from motor import AvionAtaque, AvionCaza, Bateria, Jugador, Partida, Vista
+
+class Mensajes(Vista):
+    """Vista que recuerda los mensajes recibidos"""
+    def __init__(self):
+        self.mensajes = []
+
+    def mensaje(self, tipo, texto):
+        self.mensajes.append((tipo, texto))
+
+@pytest.mark.parametrize('asincrona', [False, True])
+def test_fallo_del_plan(monkeypatch, capsys, asincrona):
+    """Si el plan de la IA falla, se informa del error y el turno sigue sin hacer nada"""
+    def fallar(self, *args):
+        raise RuntimeError('modelo roto')
+    monkeypatch.setattr(Jugador, 'planificar_compra', fallar)
+
+    vista = Mensajes()
+    partida = Partida(ia = (True, True), vista = vista, saltar_preparacion = True, semilla = 7, asincrona = asincrona)
+    partida.comenzar()
+    limite = time.monotonic() + 10
+    while partida.turno < 3 and time.monotonic() < limite:
+        partida.actualizar()
+        if partida.paso_listo:
+            if partida.paso == partida.PASOS[-1]:
+                partida.siguiente_jugador()
+            else:
+                partida.siguiente_paso()
+    assert partida.turno >= 3
+    assert ('error', 'La IA no ha podido decidir: modelo roto') in vista.mensajes
+    assert 'RuntimeError: modelo roto' in capsys.readouterr().err
+
+def test_ataque_por_categoria(monkeypatch):
+    """Una casilla con medios aéreos y antiaéreos enemigos puede recibir un ataque a cada categoría"""
+    partida = Partida(ia = (True, True), semilla = 7)
+    while not {AvionCaza, AvionAtaque} <= {type(medio) for medio in partida.jugadores[0].medios}:
+        partida.jugar_turno()
+    jugador = partida.jugadores[0]
+    caza = next(medio for medio in jugador.medios if type(medio) is AvionCaza)
+    ataque = next(medio for medio in jugador.medios if type(medio) is AvionAtaque)
+    assert caza.ataque_aire and not ataque.ataque_aire
+
+    # Ambos desplegados en la casilla objetivo, que tiene un avión y una batería enemigos
+    casilla = partida.tablero.casilla(100)
+    enemigos = {casilla.indice: [AvionAtaque.__new__(AvionAtaque)]}, {casilla.indice: [Bateria.__new__(Bateria)]}
+    monkeypatch.setattr(Jugador, 'objetivos', lambda self: enemigos)
+    ataques = jugador.planificar_ataque({caza: casilla, ataque: casilla})
+    assert (caza, casilla) in ataques
+    assert (ataque, casilla) in ataques
@@ -0,0 +1,132 @@
+"""
+    Comprobar los resolutores nativos de los modelos contra el óptimo calculado por fuerza bruta
+    en instancias pequeñas, y contra AMPL si está instalado.
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+import motor
+
+CASOS = 200
+
+@pytest.fixture
+def aleatorio():
+    return np.random.default_rng(0)
+
+def test_compra(aleatorio):
+    modelo = motor.CompraNativa(motor.AMPL_COMPRA)
+    C, A = modelo.conjuntos['C'], modelo.conjuntos['A']
+    for _ in range(CASOS):
+        S = aleatorio.integers(0, 2, len(C)).tolist()
+        P = int(aleatorio.integers(0, 2000))
+        modelo.parametro('S', S)
+        modelo.parametro('P', [P])
+        assert modelo.resolver()
+        Y, K = modelo.array('Y', 'C', 'A'), modelo.array('K', 'A')
+        puntos = np.array(S) @ Y
+
+        def valida(X):
+            return sum(K[j] * x for j, x in enumerate(X)) <= P and all(puntos[j] / K[j] >= 3 for j, x in enumerate(X) if x)
+
+        mejor = max(sum(puntos[j] * x for j, x in enumerate(X)) for X in itertools.product((0, 1), repeat = len(A)) if valida(X))
+        X = [round(valor) for _, valor in modelo.solucion]
+        assert valida(X)
+        assert sum(puntos[j] * x for j, x in enumerate(X)) == pytest.approx(mejor)
+
+@pytest.mark.parametrize('medio', ['caza', 'ataque', 'transporte', 'heli', 'dron'])
+def test_movimiento(aleatorio, medio):
+    modelo = motor.MovimientoNativo(motor.AMPL_MOVIMIENTO + medio)
+    C = modelo.conjuntos['C']
+    R = 29
+    for _ in range(CASOS):
+        A = list(range(aleatorio.integers(1, 4)))
+        L = sorted(aleatorio.choice(375, aleatorio.integers(1, 5), replace = False).tolist())
+        B = sorted(aleatorio.choice(375, aleatorio.integers(1, 3), replace = False).tolist())
+        S = aleatorio.integers(0, 2, (len(C), len(L)))
+        D = aleatorio.integers(0, 40, (len(A), len(L)))
+        N = np.array([B[i] for i in aleatorio.integers(0, len(B), len(A))])
+        K = aleatorio.integers(0, 3, len(B))
+        modelo.conjunto('A', A)
+        modelo.conjunto('L', L)
+        modelo.conjunto('B', B)
+        modelo.parametro('S', S, 'C', 'L')
+        modelo.parametro('D', D, 'A', 'L')
+        modelo.parametro('N', N, 'A')
+        modelo.parametro('K', K, 'B')
+        modelo.parametro('R', [R])
+        assert modelo.resolver()
+        puntos = dict(zip(L, modelo.array('Y', 'C') @ S))
+
+        def valida(destinos):
+            """destinos: casilla de cada medio, o None si no se despliega"""
+            if any(j is not None and D[a, L.index(j)] > R for a, j in enumerate(destinos)):
+                return False
+            return all(sum(1 for a, j in enumerate(destinos) if j is not None and N[a] == b) <= k for b, k in zip(B, K))
+
+        mejor = max(sum(puntos[j] for j in destinos if j is not None) for destinos in itertools.product([None] + L, repeat = len(A)) if valida(destinos))
+        destinos = [None] * len(A)
+        for (a, j), valor in modelo.solucion:
+            assert destinos[a] is None and round(valor) == 1
+            destinos[a] = j
+        assert valida(destinos)
+        assert sum(puntos[j] for j in destinos if j is not None) == pytest.approx(mejor)
+
+@pytest.mark.parametrize('medio', ['caza', 'ataque', 'heli', 'dron'])
+def test_ataque(aleatorio, medio):
+    modelo = motor.AtaqueNativo(motor.AMPL_ATAQUE + medio)
+    C = modelo.conjuntos['C']
+    R = 2
+    for _ in range(CASOS):
+        A = list(range(aleatorio.integers(1, 5)))
+        L = sorted(aleatorio.choice(375, aleatorio.integers(1, 6), replace = False).tolist())
+        S = aleatorio.integers(0, 2, (len(C), len(L)))
+        D = aleatorio.integers(0, 6, (len(A), len(L)))
+        modelo.conjunto('A', A)
+        modelo.conjunto('L', L)
+        modelo.parametro('S', {(i, j): int(S[c, l]) for c, i in enumerate(C) for l, j in enumerate(L)})
+        modelo.parametro('D', {(a, j): int(D[a, l]) for a in A for l, j in enumerate(L)})
+        modelo.parametro('R', [R])
+        assert modelo.resolver()
+        puntos = dict(zip(L, modelo.array('Y', 'C') @ S))
+
+        def valida(objetivos):
+            """objetivos: casilla atacada por cada medio, o None si no ataca"""
+            atacadas = [j for j in objetivos if j is not None]
+            return len(atacadas) == len(set(atacadas)) and all(j is None or D[a, L.index(j)] <= R for a, j in enumerate(objetivos))
+
+        mejor = max(sum(puntos[j] for j in objetivos if j is not None) for objetivos in itertools.product([None] + L, repeat = len(A)) if valida(objetivos))
+        objetivos = [None] * len(A)
+        for (a, j), valor in modelo.solucion:
+            assert objetivos[a] is None and round(valor) == 1
+            objetivos[a] = j
+        assert valida(objetivos)
+        assert sum(puntos[j] for j in objetivos if j is not None) == pytest.approx(mejor)
+
+@pytest.mark.parametrize('medio', ['caza', 'ataque', 'transporte', 'heli', 'dron', 'radar', 'bateria', 'ciudad', 'base'])
+def test_posicion(aleatorio, medio):
+    modelo = motor.PosicionNativo(motor.AMPL_POSICION + medio)
+    C = modelo.conjuntos['C']
+    conjunto = 'B' if medio in ('caza', 'ataque', 'transporte', 'heli', 'dron') else 'L'
+    for _ in range(CASOS):
+        casillas = aleatorio.choice(375, aleatorio.integers(1, 8), replace = False).tolist()
+        S = aleatorio.integers(0, 2, (len(C), len(casillas)))
+        modelo.conjunto(conjunto, casillas)
+        modelo.parametro('S', {(i, j): int(S[c, l]) for c, i in enumerate(C) for l, j in enumerate(casillas)})
+        assert modelo.resolver()
+        puntos = dict(zip(casillas, modelo.array('Y', 'C') @ S))
+        (casilla, valor), = modelo.solucion
+        assert round(valor) == 1
+        assert puntos[casilla] == pytest.approx(max(puntos.values()))
+
+def test_contraste_ampl(aleatorio):
+    """Las soluciones de AMPL y las nativas pueden diferir si hay varios óptimos, pero no su puntuación"""
+    pytest.importorskip('amplpy')
+    nativo = motor.CompraNativa(motor.AMPL_COMPRA)
+    Y, K = nativo.array('Y', 'C', 'A'), nativo.array('K', 'A')
+    casos = [{'P': [int(aleatorio.integers(0, 2000))], 'S': aleatorio.integers(0, 2, len(nativo.conjuntos['C'])).tolist()} for _ in range(20)]
+    for caso, solucion_ampl, solucion_nativa in motor.contrastar_modelo(motor.AMPL_COMPRA, casos):
+        puntos = np.array(caso['S']) @ Y
+        assert np.dot(solucion_ampl, K) <= caso['P'][0]
+        assert np.dot(solucion_ampl, puntos) == pytest.approx(np.dot(solucion_nativa, puntos))
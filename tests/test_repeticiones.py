@@ -0,0 +1,37 @@
+"""Comprobar que las repeticiones reproducen exactamente la partida grabada"""
+import motor
+from motor import Partida, Repeticion
+
+SEMILLA = 7
+
+def estado(partida):
+    """Resumen del estado de una partida que cambia con casi cualquier orden"""
+    return (
+        partida.turno, partida.fase, partida.paso,
+        [jugador.credito for jugador in partida.jugadores],
+        [sorted((type(medio).__name__, medio.casilla.id() if medio.casilla else None) for medio in jugador.medios + jugador.infraestructuras) for jugador in partida.jugadores],
+    )
+
+def jugar(turno):
+    """Partida entre IAs jugada turno a turno hasta el turno indicado"""
+    partida = Partida(ia = (True, True), semilla = SEMILLA)
+    while partida.turno < turno and partida.fase != 'Final':
+        partida.jugar_turno()
+    return partida
+
+def test_buscar_dentro_de_simulacion(tmp_path):
+    partida = Partida(ia = (True, True), semilla = SEMILLA)
+    partida.simular(60)
+    assert partida.turno > 30
+    repeticion = partida.grabacion
+    assert estado(repeticion.buscar()) == estado(partida)
+
+    esperada = estado(jugar(30))
+    assert estado(repeticion.buscar(30)) == esperada
+
+    # Igual desde una grabación cargada de fichero, sin fotogramas clave
+    fichero = tmp_path / 'partida.json'
+    repeticion.guardar(fichero)
+    cargada = Repeticion.cargar(fichero)
+    assert estado(cargada.buscar(30)) == esperada
+    assert estado(cargada.buscar()) == estado(partida)